@@ -6,6 +6,8 @@ bind = "127.0.0.1:8002"     # Nginx will proxy to this
 workers = multiprocessing.cpu_count() * 2 + 1  # Recommended formula
 threads = 2
 worker_class = "gthread"
+# Tells the app how many workers serve it (per-process caches are only used with one)
+raw_env = [f"WEB_CONCURRENCY={workers}"]
 
 # Logging
 accesslog = "/var/log/remindly/remindly_access.log"
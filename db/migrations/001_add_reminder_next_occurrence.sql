@@ -0,0 +1,9 @@
+-- Adds the materialized next occurrence column on reminders
+-- After running, populate existing reminders with:
+--   GET /api/reminder/roll-forward-next-occurrences?backfill=1
+
+USE `remindly`;
+
+ALTER TABLE `reminders`
+  ADD COLUMN `reminder_next_occurrence` date DEFAULT NULL AFTER `reminder_is_completed`,
+  ADD KEY `reminder_user_uuid_next_occurrence_idx` (`reminder_user_uuid`,`reminder_next_occurrence`) USING BTREE;
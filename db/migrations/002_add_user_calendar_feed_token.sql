@@ -0,0 +1,7 @@
+-- Adds the per-user token for the iCalendar (.ics) feed
+
+USE `remindly`;
+
+ALTER TABLE `users`
+  ADD COLUMN `user_calendar_feed_token` varchar(64) DEFAULT NULL AFTER `user_alert_webhook_url`,
+  ADD UNIQUE KEY `user_calendar_feed_token` (`user_calendar_feed_token`) USING BTREE;
@@ -0,0 +1,6 @@
+-- Adds an index on the stored next occurrence for the set-based alert sweep
+
+USE `remindly`;
+
+ALTER TABLE `reminders`
+  ADD KEY `reminder_next_occurrence_idx` (`reminder_next_occurrence`) USING BTREE;
@@ -0,0 +1,24 @@
+-- Adds the alert outbox, one row per (reminder, recipient, occurrence date) alert
+
+USE `remindly`;
+
+CREATE TABLE `alert_outbox` (
+  `alert_outbox_id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `alert_outbox_reminder_uuid` varchar(255) NOT NULL,
+  `alert_outbox_recipient_user_uuid` varchar(255) NOT NULL,
+  `alert_outbox_occurrence_date` date NOT NULL,
+  `alert_outbox_payload` text NOT NULL,
+  `alert_outbox_status` varchar(20) NOT NULL DEFAULT 'PENDING',
+  `alert_outbox_attempts` int(11) NOT NULL DEFAULT 0,
+  `alert_outbox_next_attempt_at` datetime NOT NULL,
+  `alert_outbox_claim_token` varchar(36) DEFAULT NULL,
+  `alert_outbox_last_status_code` int(11) DEFAULT NULL,
+  `alert_outbox_last_error` varchar(500) DEFAULT NULL,
+  `alert_outbox_last_latency_ms` int(11) DEFAULT NULL,
+  `alert_outbox_sent_on` datetime DEFAULT NULL,
+  `created_on` datetime NOT NULL,
+  `updated_on` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`alert_outbox_id`),
+  UNIQUE KEY `alert_outbox_reminder_recipient_occurrence_uq` (`alert_outbox_reminder_uuid`,`alert_outbox_recipient_user_uuid`,`alert_outbox_occurrence_date`) USING BTREE,
+  KEY `alert_outbox_status_next_attempt_idx` (`alert_outbox_status`,`alert_outbox_next_attempt_at`) USING BTREE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
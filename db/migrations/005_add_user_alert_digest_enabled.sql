@@ -0,0 +1,6 @@
+-- Adds the per-user opt-in for digest alert messages
+
+USE `remindly`;
+
+ALTER TABLE `users`
+  ADD COLUMN `user_alert_digest_enabled` tinyint(1) NOT NULL DEFAULT 0 AFTER `user_alert_webhook_url`;
@@ -0,0 +1,7 @@
+-- Adds the recipient hash used by sharded alert workers (flask remindly send-alerts --shard i/N)
+-- Rows queued before this migration get 0 and are drained by shard 0
+
+USE `remindly`;
+
+ALTER TABLE `alert_outbox`
+  ADD COLUMN `alert_outbox_recipient_hash` bigint(20) NOT NULL DEFAULT 0 AFTER `alert_outbox_recipient_user_uuid`;
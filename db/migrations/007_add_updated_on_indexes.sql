@@ -0,0 +1,9 @@
+-- Adds updated_on indexes, used by the alert scheduler to poll for changed reminders and shares
+
+USE `remindly`;
+
+ALTER TABLE `reminders`
+  ADD KEY `reminder_updated_on_idx` (`updated_on`) USING BTREE;
+
+ALTER TABLE `shared_reminders`
+  ADD KEY `shared_reminder_updated_on_idx` (`updated_on`) USING BTREE;
@@ -0,0 +1,14 @@
+-- Adds the alert sweep watermarks used for incremental sweeps
+
+USE `remindly`;
+
+CREATE TABLE `alert_watermarks` (
+  `alert_watermark_id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `alert_watermark_name` varchar(100) NOT NULL,
+  `alert_watermark_run_date` date NOT NULL,
+  `alert_watermark_changed_since` datetime NOT NULL,
+  `created_on` datetime NOT NULL,
+  `updated_on` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`alert_watermark_id`),
+  UNIQUE KEY `alert_watermark_name` (`alert_watermark_name`) USING BTREE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
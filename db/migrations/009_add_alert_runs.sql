@@ -0,0 +1,28 @@
+-- Adds alert run telemetry, one row per alert sweep or scheduler tick that did work
+
+USE `remindly`;
+
+CREATE TABLE `alert_runs` (
+  `alert_run_id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `alert_run_type` varchar(20) NOT NULL,
+  `alert_run_shard` varchar(20) DEFAULT NULL,
+  `alert_run_status` varchar(20) NOT NULL,
+  `alert_run_started_on` datetime NOT NULL,
+  `alert_run_ended_on` datetime NOT NULL,
+  `alert_run_duration_ms` int(11) NOT NULL DEFAULT 0,
+  `alert_run_users_scanned` int(11) NOT NULL DEFAULT 0,
+  `alert_run_reminders_scanned` int(11) NOT NULL DEFAULT 0,
+  `alert_run_alerts_due` int(11) NOT NULL DEFAULT 0,
+  `alert_run_alerts_enqueued` int(11) NOT NULL DEFAULT 0,
+  `alert_run_occurrence_ms` int(11) NOT NULL DEFAULT 0,
+  `alert_run_db_ms` int(11) NOT NULL DEFAULT 0,
+  `alert_run_db_queries` int(11) NOT NULL DEFAULT 0,
+  `alert_run_deliveries_attempted` int(11) NOT NULL DEFAULT 0,
+  `alert_run_deliveries_succeeded` int(11) NOT NULL DEFAULT 0,
+  `alert_run_deliveries_failed` int(11) NOT NULL DEFAULT 0,
+  `alert_run_latency_histogram` text DEFAULT NULL,
+  `alert_run_error` varchar(1000) DEFAULT NULL,
+  `created_on` datetime NOT NULL,
+  PRIMARY KEY (`alert_run_id`),
+  KEY `alert_run_started_on_idx` (`alert_run_started_on`) USING BTREE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,14 @@
+-- Adds leases used to claim alert shards across nodes (and as the named lock on non-MySQL backends)
+
+USE `remindly`;
+
+CREATE TABLE `alert_leases` (
+  `alert_lease_id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `alert_lease_name` varchar(100) NOT NULL,
+  `alert_lease_owner` varchar(100) NOT NULL,
+  `alert_lease_expires_at` datetime NOT NULL,
+  `created_on` datetime NOT NULL,
+  `updated_on` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`alert_lease_id`),
+  UNIQUE KEY `alert_lease_name` (`alert_lease_name`) USING BTREE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,7 @@
+-- Adds the per-user timezone alerts are evaluated in, indexed for timezone-bucketed alert dispatch
+
+USE `remindly`;
+
+ALTER TABLE `users`
+  ADD COLUMN `user_timezone` varchar(64) DEFAULT NULL AFTER `user_alert_digest_enabled`,
+  ADD KEY `user_timezone_idx` (`user_timezone`) USING BTREE;
@@ -0,0 +1,16 @@
+-- Adds the shared dashboard and reminder list cache (VIEW_CACHE_BACKEND=database)
+
+USE `remindly`;
+
+CREATE TABLE `view_cache_entries` (
+  `view_cache_entry_id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `view_cache_key` varchar(255) NOT NULL,
+  `view_cache_user_uuid` varchar(255) NOT NULL,
+  `view_cache_value` mediumtext NOT NULL,
+  `view_cache_expires_at` datetime NOT NULL,
+  `created_on` datetime NOT NULL,
+  `updated_on` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`view_cache_entry_id`),
+  UNIQUE KEY `view_cache_key` (`view_cache_key`) USING BTREE,
+  KEY `view_cache_user_uuid_idx` (`view_cache_user_uuid`) USING BTREE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,7 @@
+-- Renames the alert run counters to what they count: distinct recipients and reminders with due alerts
+
+USE `remindly`;
+
+ALTER TABLE `alert_runs`
+  CHANGE `alert_run_users_scanned` `alert_run_users_alerted` int(11) NOT NULL DEFAULT 0,
+  CHANGE `alert_run_reminders_scanned` `alert_run_reminders_due` int(11) NOT NULL DEFAULT 0;
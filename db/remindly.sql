@@ -25,6 +25,90 @@ USE `remindly`;
 
 -- --------------------------------------------------------
 
+--
+-- Table structure for table `alert_leases`
+--
+
+CREATE TABLE `alert_leases` (
+  `alert_lease_id` bigint(20) NOT NULL,
+  `alert_lease_name` varchar(100) NOT NULL,
+  `alert_lease_owner` varchar(100) NOT NULL,
+  `alert_lease_expires_at` datetime NOT NULL,
+  `created_on` datetime NOT NULL,
+  `updated_on` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp()
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `alert_outbox`
+--
+
+CREATE TABLE `alert_outbox` (
+  `alert_outbox_id` bigint(20) NOT NULL,
+  `alert_outbox_reminder_uuid` varchar(255) NOT NULL,
+  `alert_outbox_recipient_user_uuid` varchar(255) NOT NULL,
+  `alert_outbox_recipient_hash` bigint(20) NOT NULL DEFAULT 0,
+  `alert_outbox_occurrence_date` date NOT NULL,
+  `alert_outbox_payload` text NOT NULL,
+  `alert_outbox_status` varchar(20) NOT NULL DEFAULT 'PENDING',
+  `alert_outbox_attempts` int(11) NOT NULL DEFAULT 0,
+  `alert_outbox_next_attempt_at` datetime NOT NULL,
+  `alert_outbox_claim_token` varchar(36) DEFAULT NULL,
+  `alert_outbox_last_status_code` int(11) DEFAULT NULL,
+  `alert_outbox_last_error` varchar(500) DEFAULT NULL,
+  `alert_outbox_last_latency_ms` int(11) DEFAULT NULL,
+  `alert_outbox_sent_on` datetime DEFAULT NULL,
+  `created_on` datetime NOT NULL,
+  `updated_on` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp()
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `alert_runs`
+--
+
+CREATE TABLE `alert_runs` (
+  `alert_run_id` bigint(20) NOT NULL,
+  `alert_run_type` varchar(20) NOT NULL,
+  `alert_run_shard` varchar(20) DEFAULT NULL,
+  `alert_run_status` varchar(20) NOT NULL,
+  `alert_run_started_on` datetime NOT NULL,
+  `alert_run_ended_on` datetime NOT NULL,
+  `alert_run_duration_ms` int(11) NOT NULL DEFAULT 0,
+  `alert_run_users_alerted` int(11) NOT NULL DEFAULT 0,
+  `alert_run_reminders_due` int(11) NOT NULL DEFAULT 0,
+  `alert_run_alerts_due` int(11) NOT NULL DEFAULT 0,
+  `alert_run_alerts_enqueued` int(11) NOT NULL DEFAULT 0,
+  `alert_run_occurrence_ms` int(11) NOT NULL DEFAULT 0,
+  `alert_run_db_ms` int(11) NOT NULL DEFAULT 0,
+  `alert_run_db_queries` int(11) NOT NULL DEFAULT 0,
+  `alert_run_deliveries_attempted` int(11) NOT NULL DEFAULT 0,
+  `alert_run_deliveries_succeeded` int(11) NOT NULL DEFAULT 0,
+  `alert_run_deliveries_failed` int(11) NOT NULL DEFAULT 0,
+  `alert_run_latency_histogram` text DEFAULT NULL,
+  `alert_run_error` varchar(1000) DEFAULT NULL,
+  `created_on` datetime NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `alert_watermarks`
+--
+
+CREATE TABLE `alert_watermarks` (
+  `alert_watermark_id` bigint(20) NOT NULL,
+  `alert_watermark_name` varchar(100) NOT NULL,
+  `alert_watermark_run_date` date NOT NULL,
+  `alert_watermark_changed_since` datetime NOT NULL,
+  `created_on` datetime NOT NULL,
+  `updated_on` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp()
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- --------------------------------------------------------
+
 --
 -- Table structure for table `reminders`
 --
@@ -42,6 +126,7 @@ CREATE TABLE `reminders` (
   `reminder_date_start` date DEFAULT NULL,
   `reminder_date_end` date DEFAULT NULL,
   `reminder_is_completed` tinyint(1) NOT NULL DEFAULT 0,
+  `reminder_next_occurrence` date DEFAULT NULL,
   `reminder_user_uuid` varchar(255) NOT NULL,
   `created_on` datetime NOT NULL,
   `updated_on` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
@@ -77,15 +162,63 @@ CREATE TABLE `users` (
   `user_password` varchar(255) NOT NULL,
   `user_email` varchar(255) NOT NULL,
   `user_alert_webhook_url` varchar(500) DEFAULT NULL,
+  `user_alert_digest_enabled` tinyint(1) NOT NULL DEFAULT 0,
+  `user_timezone` varchar(64) DEFAULT NULL,
+  `user_calendar_feed_token` varchar(64) DEFAULT NULL,
   `created_on` datetime NOT NULL,
   `updated_on` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
   `is_deleted` tinyint(1) NOT NULL DEFAULT 0
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `view_cache_entries`
+--
+
+CREATE TABLE `view_cache_entries` (
+  `view_cache_entry_id` bigint(20) NOT NULL,
+  `view_cache_key` varchar(255) NOT NULL,
+  `view_cache_user_uuid` varchar(255) NOT NULL,
+  `view_cache_value` mediumtext NOT NULL,
+  `view_cache_expires_at` datetime NOT NULL,
+  `created_on` datetime NOT NULL,
+  `updated_on` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp()
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 --
 -- Indexes for dumped tables
 --
 
+--
+-- Indexes for table `alert_leases`
+--
+ALTER TABLE `alert_leases`
+  ADD PRIMARY KEY (`alert_lease_id`),
+  ADD UNIQUE KEY `alert_lease_name` (`alert_lease_name`) USING BTREE;
+
+--
+-- Indexes for table `alert_outbox`
+--
+ALTER TABLE `alert_outbox`
+  ADD PRIMARY KEY (`alert_outbox_id`),
+  ADD UNIQUE KEY `alert_outbox_reminder_recipient_occurrence_uq` (`alert_outbox_reminder_uuid`,`alert_outbox_recipient_user_uuid`,`alert_outbox_occurrence_date`) USING BTREE,
+  ADD KEY `alert_outbox_status_next_attempt_idx` (`alert_outbox_status`,`alert_outbox_next_attempt_at`) USING BTREE;
+
+--
+-- Indexes for table `alert_runs`
+--
+ALTER TABLE `alert_runs`
+  ADD PRIMARY KEY (`alert_run_id`),
+  ADD KEY `alert_run_started_on_idx` (`alert_run_started_on`) USING BTREE;
+
+--
+-- Indexes for table `alert_watermarks`
+--
+ALTER TABLE `alert_watermarks`
+  ADD PRIMARY KEY (`alert_watermark_id`),
+  ADD UNIQUE KEY `alert_watermark_name` (`alert_watermark_name`) USING BTREE;
+
 --
 -- Indexes for table `reminders`
 --
@@ -93,7 +226,10 @@ ALTER TABLE `reminders`
   ADD PRIMARY KEY (`reminder_id`),
   ADD UNIQUE KEY `reminder_uuid` (`reminder_uuid`),
   ADD UNIQUE KEY `reminder_url_slug` (`reminder_url_slug`),
-  ADD KEY `reminder_user_uuid` (`reminder_user_uuid`) USING BTREE;
+  ADD KEY `reminder_user_uuid` (`reminder_user_uuid`) USING BTREE,
+  ADD KEY `reminder_user_uuid_next_occurrence_idx` (`reminder_user_uuid`,`reminder_next_occurrence`) USING BTREE,
+  ADD KEY `reminder_next_occurrence_idx` (`reminder_next_occurrence`) USING BTREE,
+  ADD KEY `reminder_updated_on_idx` (`updated_on`) USING BTREE;
 
 --
 -- Indexes for table `shared_reminders`
@@ -102,19 +238,54 @@ ALTER TABLE `shared_reminders`
   ADD PRIMARY KEY (`shared_reminder_id`),
   ADD UNIQUE KEY `shared_reminder_uuid` (`shared_reminder_uuid`) USING BTREE,
   ADD KEY `shared_reminder_user_uuid_idx` (`shared_reminder_user_uuid`) USING BTREE,
-  ADD KEY `shared_reminder_reminder_uuid_idx` (`shared_reminder_reminder_uuid`) USING BTREE;
+  ADD KEY `shared_reminder_reminder_uuid_idx` (`shared_reminder_reminder_uuid`) USING BTREE,
+  ADD KEY `shared_reminder_updated_on_idx` (`updated_on`) USING BTREE;
 
 --
 -- Indexes for table `users`
 --
 ALTER TABLE `users`
   ADD PRIMARY KEY (`user_id`),
-  ADD UNIQUE KEY `user_uuid` (`user_uuid`) USING BTREE;
+  ADD UNIQUE KEY `user_uuid` (`user_uuid`) USING BTREE,
+  ADD UNIQUE KEY `user_calendar_feed_token` (`user_calendar_feed_token`) USING BTREE,
+  ADD KEY `user_timezone_idx` (`user_timezone`) USING BTREE;
+
+--
+-- Indexes for table `view_cache_entries`
+--
+ALTER TABLE `view_cache_entries`
+  ADD PRIMARY KEY (`view_cache_entry_id`),
+  ADD UNIQUE KEY `view_cache_key` (`view_cache_key`) USING BTREE,
+  ADD KEY `view_cache_user_uuid_idx` (`view_cache_user_uuid`) USING BTREE;
 
 --
 -- AUTO_INCREMENT for dumped tables
 --
 
+--
+-- AUTO_INCREMENT for table `alert_leases`
+--
+ALTER TABLE `alert_leases`
+  MODIFY `alert_lease_id` bigint(20) NOT NULL AUTO_INCREMENT;
+
+--
+-- AUTO_INCREMENT for table `alert_outbox`
+--
+ALTER TABLE `alert_outbox`
+  MODIFY `alert_outbox_id` bigint(20) NOT NULL AUTO_INCREMENT;
+
+--
+-- AUTO_INCREMENT for table `alert_runs`
+--
+ALTER TABLE `alert_runs`
+  MODIFY `alert_run_id` bigint(20) NOT NULL AUTO_INCREMENT;
+
+--
+-- AUTO_INCREMENT for table `alert_watermarks`
+--
+ALTER TABLE `alert_watermarks`
+  MODIFY `alert_watermark_id` bigint(20) NOT NULL AUTO_INCREMENT;
+
 --
 -- AUTO_INCREMENT for table `reminders`
 --
@@ -132,6 +303,12 @@ ALTER TABLE `shared_reminders`
 --
 ALTER TABLE `users`
   MODIFY `user_id` bigint(20) NOT NULL AUTO_INCREMENT;
+
+--
+-- AUTO_INCREMENT for table `view_cache_entries`
+--
+ALTER TABLE `view_cache_entries`
+  MODIFY `view_cache_entry_id` bigint(20) NOT NULL AUTO_INCREMENT;
 COMMIT;
 
 /*!40101 SET CHARACTER_SET_CLIENT=@OLD_CHARACTER_SET_CLIENT */;
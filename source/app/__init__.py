@@ -5,7 +5,7 @@ import os
 from datetime import datetime
 from flask_bcrypt import Bcrypt
 from app.helpers.logging import setup_logger
-from app.helpers.db import get_db_connection_string
+from app.helpers.db import get_db_connection_string, get_db_engine_options
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
@@ -23,6 +23,7 @@ def init_app():
     app.config["SITE_NAME"] = os.getenv("APP_NAME", "Remindly")
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev_secret")  # for sessions
     app.config["SQLALCHEMY_DATABASE_URI"] = get_db_connection_string()
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = get_db_engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["STATCOUNTER_PROJECT"] = os.getenv("STATCOUNTER_PROJECT")
     app.config["STATCOUNTER_SECURITY"] = os.getenv("STATCOUNTER_SECURITY")
@@ -43,6 +44,10 @@ def init_app():
             "statcounter_security": app.config["STATCOUNTER_SECURITY"],
         }
 
+    # Jinja filters
+    from .helpers.rrule import format_occurrence_date
+    app.add_template_filter(format_occurrence_date, "next_occurrence")
+
     # Register blueprints
     from .routes.auth import auth_bp
     app.register_blueprint(auth_bp)
@@ -52,5 +57,9 @@ def init_app():
     app.register_blueprint(reminders_bp)
     logger.info("Registered reminders blueprint.")
 
+    # Register CLI commands
+    from .cli import remindly_cli
+    app.cli.add_command(remindly_cli)
+
     logger.info("App initialized.")
     return app
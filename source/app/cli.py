@@ -0,0 +1,109 @@
+# source/app/cli.py
+import json
+import time
+import click
+from flask.cli import AppGroup
+from . import db
+from app.helpers.alerts import run_locked_alert_sweep, get_alert_sweep_preview
+from app.helpers.alert_scheduler import AlertScheduler, ALERT_SCHEDULER_POLL_SECONDS, ALERT_SCHEDULER_RESYNC_SECONDS
+from app.helpers.sharding import parse_user_shard
+from app.helpers.locks import claim_shard_leases, get_lock_owner_token
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+# Commands are run as: flask --app app:init_app remindly <command>
+remindly_cli = AppGroup("remindly", help="Remindly maintenance commands.")
+
+
+class UserShardParamType(click.ParamType):
+    name = "i/N"
+
+    def convert(self, value, param, ctx):
+        try:
+            return parse_user_shard(value)
+        except ValueError as e:
+            self.fail(str(e), param, ctx)
+
+
+@remindly_cli.command("send-alerts")
+@click.option("--shard", type=UserShardParamType(), default=None,
+              help="Only handle recipients in shard i of N (0-based), split by user UUID hash.")
+@click.option("--shards", type=click.IntRange(min=1), default=None,
+              help="Split recipients into N shards and sweep whichever shards no other node has claimed this interval.")
+@click.option("--dry-run", is_flag=True, help="Report what would be sent, without writing or sending anything.")
+@click.option("--full-scan", is_flag=True,
+              help="Rescan every due reminder instead of only what changed since the last sweep.")
+@click.option("--worker", is_flag=True, help="Keep running, starting a sweep every --interval seconds.")
+@click.option("--interval", type=click.IntRange(min=1), default=300, show_default=True,
+              help="Seconds between sweep starts in --worker mode.")
+def send_alerts_command(shard, shards, dry_run, full_scan, worker, interval):
+    """
+    Send alert notifications, same sweep as GET /api/reminder/send-alerts.
+    A sweep already running on another node for the same shard is skipped.
+    """
+    logger.info("remindly send-alerts command called")
+
+    if shard is not None and shards is not None:
+        raise click.UsageError("--shard and --shards can't be used together.")
+    if dry_run and shards is not None:
+        raise click.UsageError("--dry-run needs a fixed --shard, not --shards.")
+
+    owner = get_lock_owner_token()
+
+    if dry_run:
+        alerts_to_enqueue, summary = get_alert_sweep_preview(user_shard=shard)
+        for due_alert in alerts_to_enqueue:
+            click.echo(
+                f"{due_alert.reminder_due_date} | {due_alert.reminder_shared_type} | {due_alert.reminder_title} "
+                f"| reminder {due_alert.reminder_uuid} -> user {due_alert.recipient_user_uuid}"
+            )
+        click.echo(json.dumps(summary))
+        return
+
+    while True:
+        started = time.monotonic()
+        try:
+            # With --shards, shards are claimed one at a time (leased for one interval), so nodes
+            # that finish early take more shards and a crashed node's shards are taken over next interval
+            user_shards = claim_shard_leases(shards, owner, lease_seconds=interval) if shards else [shard]
+
+            for user_shard in user_shards:
+                summary = run_locked_alert_sweep(user_shard=user_shard, full_scan=full_scan)
+                if summary is None:
+                    summary = {"skipped": True}
+                if user_shard is not None:
+                    summary = {"shard": f"{user_shard.index}/{user_shard.count}", **summary}
+                click.echo(json.dumps(summary))
+        except Exception:
+            if not worker:
+                raise
+            # Keep the worker alive, the outbox makes the next sweep pick up where this one stopped
+            logger.exception("Alert sweep failed")
+            db.session.rollback()
+        finally:
+            # Don't hold a connection or stale identity map between sweeps
+            db.session.remove()
+
+        if not worker:
+            return
+
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+@remindly_cli.command("alert-scheduler")
+@click.option("--shard", type=UserShardParamType(), default=None,
+              help="Only handle recipients in shard i of N (0-based), split by user UUID hash.")
+@click.option("--poll-interval", type=click.IntRange(min=1), default=ALERT_SCHEDULER_POLL_SECONDS, show_default=True,
+              help="Seconds between polls for reminder changes and outbox retries.")
+@click.option("--resync-interval", type=click.IntRange(min=60), default=ALERT_SCHEDULER_RESYNC_SECONDS, show_default=True,
+              help="Seconds between full reloads of upcoming reminders from the DB.")
+def alert_scheduler_command(shard, poll_interval, resync_interval):
+    """
+    Run the alert scheduler, which fires alerts as reminders enter their alert window.
+    Replaces send-alerts --worker, don't run both for the same shard.
+    """
+    logger.info("remindly alert-scheduler command called")
+
+    AlertScheduler(user_shard=shard).run_forever(poll_interval=poll_interval, resync_interval=resync_interval)
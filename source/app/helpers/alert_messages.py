@@ -0,0 +1,49 @@
+# helpers/alert_messages.py
+import os
+from dotenv import load_dotenv
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+# Load environment variables
+load_dotenv()
+
+# Digest item order
+# Values = DUE_DATE (soonest first), TITLE (alphabetical)
+ALERT_DIGEST_ORDER = os.getenv("ALERT_DIGEST_ORDER", "DUE_DATE").upper()
+# Items listed in one digest message, the rest are summarized as "...and N more"
+ALERT_DIGEST_MAX_ITEMS = int(os.getenv("ALERT_DIGEST_MAX_ITEMS", "20"))
+
+
+def build_alert_payload(reminder_shared_type, reminder_title, reminder_due_date):
+    """
+    Slack/Discord compatible message for one due reminder.
+    """
+    return {
+        "text": f"Remindly Alert for {reminder_shared_type} Reminder : {reminder_title} - Due date {reminder_due_date} is approaching!"
+    }
+
+
+def get_digest_sort_key(alert_item, order):
+    if order == "TITLE":
+        return (alert_item["reminder_title"].lower(), str(alert_item["reminder_due_date"]))
+    return (str(alert_item["reminder_due_date"]), alert_item["reminder_title"].lower())
+
+
+def build_alert_digest_payload(alert_items, order=ALERT_DIGEST_ORDER, max_items=ALERT_DIGEST_MAX_ITEMS):
+    """
+    Slack/Discord compatible message listing several due reminders for one recipient.
+    alert_items are dicts with reminder_shared_type, reminder_title and reminder_due_date.
+    """
+    alert_items = sorted(alert_items, key=lambda alert_item: get_digest_sort_key(alert_item, order))
+
+    lines = [f"Remindly Alert: {len(alert_items)} reminders are due soon"]
+    for alert_item in alert_items[:max_items]:
+        lines.append(
+            f"• {alert_item['reminder_due_date']} - {alert_item['reminder_title']} ({alert_item['reminder_shared_type']})"
+        )
+    if len(alert_items) > max_items:
+        lines.append(f"...and {len(alert_items) - max_items} more")
+
+    return {"text": "\n".join(lines)}
@@ -0,0 +1,415 @@
+# helpers/alert_outbox.py
+from datetime import datetime, timedelta
+from itertools import groupby
+import json
+import os
+import uuid
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, insert, update, true
+from .. import db
+from app.models.alert_outbox import AlertOutbox
+from app.models.user import User
+from app.helpers.webhooks import get_webhook_delivery_engine
+from app.helpers.alert_messages import build_alert_payload, build_alert_digest_payload
+from app.helpers.sharding import get_user_shard_hash
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+# Load environment variables
+load_dotenv()
+
+# Delivery attempts per alert before it is marked FAILED
+ALERT_OUTBOX_MAX_ATTEMPTS = int(os.getenv("ALERT_OUTBOX_MAX_ATTEMPTS", "6"))
+# Retry delay is base * 2^(attempts - 1), capped at max
+ALERT_OUTBOX_BACKOFF_BASE_SECONDS = int(os.getenv("ALERT_OUTBOX_BACKOFF_BASE_SECONDS", "60"))
+ALERT_OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv("ALERT_OUTBOX_BACKOFF_MAX_SECONDS", "21600"))
+# Sent and failed rows are kept this long after their occurrence date
+ALERT_OUTBOX_RETENTION_DAYS = int(os.getenv("ALERT_OUTBOX_RETENTION_DAYS", "30"))
+
+# Rows written per INSERT and claimed per drain batch
+ALERT_OUTBOX_BATCH_SIZE = 500
+
+# A claimed row that is not resolved within this time (e.g. drainer crashed) becomes claimable again
+ALERT_OUTBOX_CLAIM_LEASE_SECONDS = 300
+
+# 4xx responses that are worth retrying, any other 4xx means the webhook itself is wrong
+RETRYABLE_CLIENT_STATUS_CODES = {408, 425, 429}
+
+
+def get_pending_outbox_count(now, user_shard=None):
+    """
+    Number of PENDING rows due for delivery now.
+    """
+    return (
+        db.session.query(db.func.count(AlertOutbox.alert_outbox_id))
+        .filter(
+            AlertOutbox.alert_outbox_status == "PENDING",
+            AlertOutbox.alert_outbox_next_attempt_at <= now,
+            get_outbox_shard_filter(user_shard)
+        )
+        .scalar()
+    )
+
+
+def get_queued_outbox_keys(date_from, date_to):
+    """
+    Set of (reminder_uuid, recipient_user_uuid, occurrence_date) already queued for occurrences in the window.
+    """
+    return set(
+        db.session.query(
+            AlertOutbox.alert_outbox_reminder_uuid,
+            AlertOutbox.alert_outbox_recipient_user_uuid,
+            AlertOutbox.alert_outbox_occurrence_date
+        )
+        .filter(
+            AlertOutbox.alert_outbox_occurrence_date >= date_from,
+            AlertOutbox.alert_outbox_occurrence_date <= date_to
+        )
+        .all()
+    )
+
+
+def get_outbox_retry_delay(attempts):
+    """
+    Exponential backoff delay after the given number of failed attempts.
+    """
+    return timedelta(seconds=min(ALERT_OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), ALERT_OUTBOX_BACKOFF_MAX_SECONDS))
+
+
+def is_retryable_delivery(delivery_result):
+    if delivery_result.status_code is None:
+        return True
+    if 400 <= delivery_result.status_code < 500:
+        return delivery_result.status_code in RETRYABLE_CLIENT_STATUS_CODES
+    return True
+
+
+def enqueue_outbox_alerts(outbox_rows):
+    """
+    Bulk insert outbox rows, silently skipping any that already exist for the same
+    (reminder, recipient, occurrence date). Rows are dicts with reminder_uuid,
+    recipient_user_uuid, occurrence_date and alert_item (the fields the message is built from).
+    Reruns and overlapping sweeps therefore never queue an alert twice.
+    Returns the number of newly queued rows.
+    """
+    logger.info("enqueue_outbox_alerts() called")
+
+    # INSERT IGNORE on MySQL, INSERT OR IGNORE on SQLite
+    statement = (
+        insert(AlertOutbox.__table__)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+
+    now = datetime.utcnow()
+    enqueued_count = 0
+    batch = []
+
+    def flush(batch):
+        # Core executemany on the session's connection, so rowcount reports the rows actually inserted
+        result = db.session.connection().execute(statement, batch)
+        return max(result.rowcount, 0)
+
+    for outbox_row in outbox_rows:
+        batch.append({
+            "alert_outbox_reminder_uuid": outbox_row["reminder_uuid"],
+            "alert_outbox_recipient_user_uuid": outbox_row["recipient_user_uuid"],
+            "alert_outbox_recipient_hash": get_user_shard_hash(outbox_row["recipient_user_uuid"]),
+            "alert_outbox_occurrence_date": outbox_row["occurrence_date"],
+            "alert_outbox_payload": json.dumps(outbox_row["alert_item"]),
+            "alert_outbox_status": "PENDING",
+            "alert_outbox_attempts": 0,
+            "alert_outbox_next_attempt_at": now,
+            "created_on": now,
+            "updated_on": now,
+        })
+        if len(batch) >= ALERT_OUTBOX_BATCH_SIZE:
+            enqueued_count += flush(batch)
+            batch = []
+
+    if batch:
+        enqueued_count += flush(batch)
+
+    db.session.commit()
+
+    logger.info(f"Alert outbox: {enqueued_count} alerts queued")
+    return enqueued_count
+
+
+def get_outbox_shard_filter(user_shard):
+    if user_shard is None:
+        return true()
+    return AlertOutbox.alert_outbox_recipient_hash % user_shard.count == user_shard.index
+
+
+def claim_outbox_batch(now, batch_size=ALERT_OUTBOX_BATCH_SIZE, user_shard=None):
+    """
+    Claims up to batch_size due PENDING rows for this drainer and returns (claim_token, claimed_rows), the rows
+    ordered by recipient as (outbox_id, recipient_user_uuid, attempts, payload, webhook_url, digest_enabled) tuples.
+    The claim is a conditional UPDATE, so a row claimed by another drainer is never returned twice.
+    Outcomes must be recorded with the claim token (see record_outbox_outcomes()), the claim may have been lost since.
+    A recipient's rows are never split across batches unless they alone fill a batch, so a digest covers all of them.
+    With user_shard, only rows for recipients in that shard are claimed.
+    """
+    logger.info("claim_outbox_batch() called")
+
+    candidate_rows = (
+        db.session.query(AlertOutbox.alert_outbox_id, AlertOutbox.alert_outbox_recipient_user_uuid)
+        .filter(
+            AlertOutbox.alert_outbox_status == "PENDING",
+            AlertOutbox.alert_outbox_next_attempt_at <= now,
+            get_outbox_shard_filter(user_shard)
+        )
+        .order_by(AlertOutbox.alert_outbox_recipient_user_uuid, AlertOutbox.alert_outbox_id)
+        .limit(batch_size)
+        .all()
+    )
+    if not candidate_rows:
+        return None, []
+
+    # A full batch may have cut the last recipient short, leave their rows for the next batch
+    last_recipient_user_uuid = candidate_rows[-1][1]
+    if len(candidate_rows) == batch_size and candidate_rows[0][1] != last_recipient_user_uuid:
+        candidate_rows = [row for row in candidate_rows if row[1] != last_recipient_user_uuid]
+
+    candidate_ids = [outbox_id for outbox_id, _ in candidate_rows]
+
+    claim_token = str(uuid.uuid4())
+    db.session.execute(
+        update(AlertOutbox)
+        .where(
+            AlertOutbox.alert_outbox_id.in_(candidate_ids),
+            AlertOutbox.alert_outbox_status == "PENDING",
+            AlertOutbox.alert_outbox_next_attempt_at <= now
+        )
+        .values(
+            alert_outbox_claim_token=claim_token,
+            alert_outbox_next_attempt_at=now + timedelta(seconds=ALERT_OUTBOX_CLAIM_LEASE_SECONDS)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    # The webhook URL and digest setting are read at send time, so retries follow a changed setting
+    return claim_token, (
+        db.session.query(
+            AlertOutbox.alert_outbox_id,
+            AlertOutbox.alert_outbox_recipient_user_uuid,
+            AlertOutbox.alert_outbox_attempts,
+            AlertOutbox.alert_outbox_payload,
+            User.user_alert_webhook_url,
+            User.user_alert_digest_enabled
+        )
+        .outerjoin(
+            User,
+            (AlertOutbox.alert_outbox_recipient_user_uuid == User.user_uuid) & (User.is_deleted == False)
+        )
+        .filter(AlertOutbox.alert_outbox_claim_token == claim_token)
+        .order_by(AlertOutbox.alert_outbox_recipient_user_uuid, AlertOutbox.alert_outbox_id)
+        .all()
+    )
+
+
+def get_outbox_delivery_jobs(claimed_rows, outcome_rows, summary):
+    """
+    Turns claimed rows into (outbox_rows, webhook_url, payload) delivery jobs, where outbox_rows
+    is the list of (outbox_id, attempts) covered by one POST.
+    Recipients in digest mode get one message for all their rows, everyone else one message per row.
+    Rows that cannot be delivered are added to outcome_rows as FAILED.
+    """
+    for _, recipient_rows in groupby(claimed_rows, key=lambda claimed_row: claimed_row[1]):
+        recipient_rows = list(recipient_rows)
+        _, _, _, _, webhook_url, digest_enabled = recipient_rows[0]
+
+        if not webhook_url:
+            # Recipient removed their webhook or account, nothing to retry
+            for outbox_id, _, _, _, _, _ in recipient_rows:
+                outcome_rows.append({
+                    "alert_outbox_id": outbox_id,
+                    "alert_outbox_status": "FAILED",
+                    "alert_outbox_claim_token": None,
+                    "alert_outbox_last_error": "No alert webhook URL",
+                })
+                summary["alerts_given_up"] += 1
+            continue
+
+        if digest_enabled and len(recipient_rows) > 1:
+            alert_items = [json.loads(payload) for _, _, _, payload, _, _ in recipient_rows]
+            yield (
+                [(outbox_id, attempts) for outbox_id, _, attempts, _, _, _ in recipient_rows],
+                webhook_url,
+                build_alert_digest_payload(alert_items)
+            )
+            continue
+
+        for outbox_id, _, attempts, payload, _, _ in recipient_rows:
+            yield [(outbox_id, attempts)], webhook_url, build_alert_payload(**json.loads(payload))
+
+
+def record_outbox_outcomes(outcome_rows, claim_token):
+    """
+    Writes the outcome of claimed rows (dicts of AlertOutbox columns plus alert_outbox_id), only where the row
+    still carries this drainer's claim token. A row whose claim lease ran out and was claimed again by another
+    drainer belongs to that drainer now, its outcome is left to it.
+    Returns the number of rows whose claim was lost.
+    """
+    outbox_table = AlertOutbox.__table__
+    lost_count = 0
+
+    # Core executemany on the session's connection, grouped so every statement shares the same columns,
+    # so rowcount reports the rows still owned
+    outcome_rows_by_columns = {}
+    for outcome_row in outcome_rows:
+        outcome_rows_by_columns.setdefault(tuple(sorted(outcome_row)), []).append(outcome_row)
+    statement = (
+        update(outbox_table)
+        .where(
+            outbox_table.c.alert_outbox_id == bindparam("outcome_outbox_id"),
+            outbox_table.c.alert_outbox_claim_token == claim_token
+        )
+    )
+    for rows in outcome_rows_by_columns.values():
+        # The SET clause is every column of the rows but the primary key, which goes in the WHERE clause
+        params = []
+        for row in rows:
+            columns = dict(row)
+            params.append({"outcome_outbox_id": columns.pop("alert_outbox_id"), **columns})
+        result = db.session.connection().execute(statement, params)
+        lost_count += len(rows) - max(result.rowcount, 0)
+
+    if lost_count:
+        logger.warning(f"Alert outbox: claim lost on {lost_count} rows, their outcome is left to the drainer that claimed them again")
+    return lost_count
+
+
+def drain_alert_outbox(now=None, user_shard=None, latency_histogram=None, lock=None):
+    """
+    Delivers every due PENDING outbox row, batch by batch, and records the outcome:
+    SENT on success, rescheduled with exponential backoff on a retryable failure,
+    FAILED once attempts are exhausted or the failure is permanent.
+    Alert counts in the summary are per outbox row, deliveries counts webhook POSTs.
+    Rows for a host whose circuit is open are deferred until the circuit's cooldown ends.
+    Rows whose claim ran out and was taken over by another drainer mid-batch are counted in alerts_claim_lost.
+    With user_shard, only that shard's recipients are delivered to.
+    Every delivery's latency is added to latency_histogram (a LatencyHistogram) when given.
+    With lock (a NamedLock held by the caller), the lock is renewed before every batch, NamedLockLost is raised if it was lost.
+    Returns a summary dict of the drain.
+    """
+    logger.info("drain_alert_outbox() called")
+
+    if now is None:
+        now = datetime.utcnow()
+
+    summary = {
+        "alerts_sent": 0,
+        "alerts_failed": 0,
+        "alerts_retry_scheduled": 0,
+        "alerts_given_up": 0,
+        "deliveries": 0,
+        "deliveries_failed": 0,
+        "deliveries_skipped": 0,
+        "alerts_deferred": 0,
+        "alerts_claim_lost": 0,
+        "delivery_latency_ms_total": 0.0,
+    }
+    engine = get_webhook_delivery_engine()
+
+    while True:
+        if lock is not None:
+            lock.check()
+
+        claim_token, claimed_rows = claim_outbox_batch(now, user_shard=user_shard)
+        if not claimed_rows:
+            break
+
+        outcome_rows = []
+        delivery_jobs = get_outbox_delivery_jobs(claimed_rows, outcome_rows, summary)
+
+        for delivered_rows, delivery_result in engine.deliver_all(delivery_jobs):
+            if delivery_result.skipped:
+                # Host circuit is open, nothing was sent: retry once it lets a trial delivery through
+                # (the rest of its cooldown, not a full one) without using up an attempt
+                retry_at = datetime.utcnow() + timedelta(
+                    seconds=engine.circuit_breaker.get_retry_in_seconds(delivery_result.host)
+                )
+                for outbox_id, _ in delivered_rows:
+                    outcome_rows.append({
+                        "alert_outbox_id": outbox_id,
+                        "alert_outbox_status": "PENDING",
+                        "alert_outbox_claim_token": None,
+                        "alert_outbox_next_attempt_at": retry_at,
+                        "alert_outbox_last_error": delivery_result.error,
+                    })
+                summary["deliveries_skipped"] += 1
+                summary["alerts_deferred"] += len(delivered_rows)
+                continue
+
+            summary["deliveries"] += 1
+            summary["delivery_latency_ms_total"] += delivery_result.latency_ms
+            if latency_histogram is not None:
+                latency_histogram.add(delivery_result.host, delivery_result.latency_ms)
+
+            if not delivery_result.ok:
+                summary["deliveries_failed"] += 1
+                logger.error(
+                    f"Alert outbox: delivery of {len(delivered_rows)} alerts to {delivery_result.host} failed "
+                    f"| Status: {delivery_result.status_code} | Error: {delivery_result.error}"
+                )
+
+            for outbox_id, attempts in delivered_rows:
+                attempts += 1
+
+                outcome_row = {
+                    "alert_outbox_id": outbox_id,
+                    "alert_outbox_attempts": attempts,
+                    "alert_outbox_claim_token": None,
+                    "alert_outbox_last_status_code": delivery_result.status_code,
+                    "alert_outbox_last_error": (delivery_result.error or "")[:500] or None,
+                    "alert_outbox_last_latency_ms": int(delivery_result.latency_ms),
+                }
+
+                if delivery_result.ok:
+                    outcome_row["alert_outbox_status"] = "SENT"
+                    outcome_row["alert_outbox_sent_on"] = datetime.utcnow()
+                    summary["alerts_sent"] += 1
+                else:
+                    summary["alerts_failed"] += 1
+                    if attempts < ALERT_OUTBOX_MAX_ATTEMPTS and is_retryable_delivery(delivery_result):
+                        outcome_row["alert_outbox_status"] = "PENDING"
+                        outcome_row["alert_outbox_next_attempt_at"] = datetime.utcnow() + get_outbox_retry_delay(attempts)
+                        summary["alerts_retry_scheduled"] += 1
+                    else:
+                        outcome_row["alert_outbox_status"] = "FAILED"
+                        summary["alerts_given_up"] += 1
+
+                outcome_rows.append(outcome_row)
+
+        summary["alerts_claim_lost"] += record_outbox_outcomes(outcome_rows, claim_token)
+        db.session.commit()
+
+    summary["delivery_latency_ms_total"] = round(summary["delivery_latency_ms_total"], 1)
+
+    logger.info("Alert outbox drain summary: %s", summary)
+    return summary
+
+
+def purge_alert_outbox(today, retention_days=ALERT_OUTBOX_RETENTION_DAYS):
+    """
+    Deletes SENT and FAILED rows whose occurrence is older than the retention window.
+    Returns the number of deleted rows.
+    """
+    logger.info("purge_alert_outbox() called")
+
+    purged_count = (
+        db.session.query(AlertOutbox)
+        .filter(
+            AlertOutbox.alert_outbox_status.in_(["SENT", "FAILED"]),
+            AlertOutbox.alert_outbox_occurrence_date < today - timedelta(days=retention_days)
+        )
+        .delete(synchronize_session=False)
+    )
+    db.session.commit()
+
+    return purged_count
@@ -0,0 +1,390 @@
+# helpers/alert_scheduler.py
+from collections import defaultdict
+from datetime import datetime, timedelta
+import heapq
+import os
+import time as time_module
+from dotenv import load_dotenv
+from sqlalchemy import true
+from .. import db
+from app.models.reminder import Reminder
+from app.models.shared_reminder import SharedReminder
+from app.models.user import User
+from app.helpers.reminders import roll_forward_reminder_next_occurrences
+from app.helpers.alerts import ALERT_THRESHOLD_DAYS, enqueue_due_alerts
+from app.helpers.alert_outbox import drain_alert_outbox, purge_alert_outbox
+from app.helpers.alert_telemetry import AlertRunRecorder
+from app.helpers.locks import NamedLockLost, named_lock
+from app.helpers.timezones import get_local_today, get_earliest_local_today, get_local_midnight_utc
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+# Load environment variables
+load_dotenv()
+
+# Seconds between polls for reminder changes (and outbox retries)
+ALERT_SCHEDULER_POLL_SECONDS = int(os.getenv("ALERT_SCHEDULER_POLL_SECONDS", "10"))
+# Seconds between full reloads from the DB, recovers from any change the poll missed
+ALERT_SCHEDULER_RESYNC_SECONDS = int(os.getenv("ALERT_SCHEDULER_RESYNC_SECONDS", "3600"))
+
+# Reminders due further out than threshold + this many days are left for a later resync
+ALERT_SCHEDULER_HORIZON_DAYS = 2
+
+# Reminders passed per due alert query when firing
+ALERT_SCHEDULER_FIRE_BATCH_SIZE = 500
+
+
+class AlertScheduler:
+    """
+    Keeps the time each upcoming reminder enters its alert window in a min-heap, and fires alerts
+    for a reminder at that time instead of rescanning every reminder on a timer.
+    A reminder is scheduled once per timezone its recipients (owner and share recipients) are in,
+    at the start of that timezone's local day, so each timezone bucket is alerted as its day begins.
+
+    Changes made through the web app are picked up by polling reminders.updated_on and
+    shared_reminders.updated_on, which every write path in routes/reminders.py bumps.
+    A periodic resync rebuilds the heap from the DB, and picks up users' timezone changes. Reminders that already
+    fired at their current fire time are remembered across resyncs and not loaded again, so a resync doesn't
+    fire every reminder already in its alert window once more.
+    Replaced heap entries are not removed, they are skipped when popped (lazy deletion).
+    Times are naive UTC.
+    """
+
+    def __init__(self, alert_threshold=ALERT_THRESHOLD_DAYS, user_shard=None):
+        self.alert_threshold = alert_threshold
+        self.user_shard = user_shard
+        # Heap entries are (fire_at, reminder_uuid, timezone key), the key is "" for the server timezone
+        # so entries always compare
+        self._heap = []
+        self._fire_at_by_key = {}
+        self._timezone_keys_by_reminder = defaultdict(set)
+        self._horizon = None
+        # Fire time each (reminder_uuid, timezone key) last fired at, kept across resyncs
+        self._fired_at_by_key = {}
+        # Per table (watermark, ids of rows seen at exactly the watermark)
+        self._reminder_watermark = (None, set())
+        self._shared_reminder_watermark = (None, set())
+
+    def __len__(self):
+        return len(self._fire_at_by_key)
+
+    def get_fire_at(self, next_occurrence, user_timezone=None):
+        """
+        Start (UTC) of the local day the reminder enters its alert window in a timezone.
+        """
+        return get_local_midnight_utc(user_timezone, next_occurrence - timedelta(days=self.alert_threshold))
+
+    def get_next_fire_at(self):
+        while self._heap:
+            fire_at, reminder_uuid, timezone_key = self._heap[0]
+            if self._fire_at_by_key.get((reminder_uuid, timezone_key)) == fire_at:
+                return fire_at
+            heapq.heappop(self._heap)
+        return None
+
+    def schedule(self, reminder_uuid, user_timezone, next_occurrence):
+        """
+        Schedules (or reschedules) a reminder for one recipient timezone, a reminder already in its
+        alert window fires on the next tick. next_occurrence None unschedules it.
+        """
+        key = (reminder_uuid, user_timezone or "")
+        if next_occurrence is None or (self._horizon is not None and next_occurrence > self._horizon):
+            self._remove_key(key)
+            return
+
+        fire_at = self.get_fire_at(next_occurrence, user_timezone)
+        if self._fire_at_by_key.get(key) == fire_at:
+            return
+
+        self._fire_at_by_key[key] = fire_at
+        self._timezone_keys_by_reminder[reminder_uuid].add(key[1])
+        heapq.heappush(self._heap, (fire_at, *key))
+
+    def unschedule(self, reminder_uuid, user_timezone=None, all_timezones=True):
+        """
+        Unschedules a reminder, for every timezone or only user_timezone.
+        """
+        if not all_timezones:
+            self._remove_key((reminder_uuid, user_timezone or ""))
+            return
+        for timezone_key in self._timezone_keys_by_reminder.pop(reminder_uuid, ()):
+            self._fire_at_by_key.pop((reminder_uuid, timezone_key), None)
+
+    def _remove_key(self, key):
+        if self._fire_at_by_key.pop(key, None) is None:
+            return
+        timezone_keys = self._timezone_keys_by_reminder[key[0]]
+        timezone_keys.discard(key[1])
+        if not timezone_keys:
+            del self._timezone_keys_by_reminder[key[0]]
+
+    def pop_due(self, now):
+        """
+        Removes and returns (reminder_uuid, user_timezone) for every reminder whose fire time has been reached.
+        """
+        due_reminders = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, reminder_uuid, timezone_key = heapq.heappop(self._heap)
+            if self._fire_at_by_key.get((reminder_uuid, timezone_key)) != fire_at:
+                continue  # Replaced or unscheduled since it was pushed
+            self._remove_key((reminder_uuid, timezone_key))
+            self._fired_at_by_key[(reminder_uuid, timezone_key)] = fire_at
+            due_reminders.append((reminder_uuid, timezone_key or None))
+        return due_reminders
+
+    def get_recipient_timezone_rows(self, *reminder_filters):
+        """
+        (reminder_uuid, next_occurrence, user_timezone) for every recipient timezone of the reminders
+        matching reminder_filters: the owner's, and those of the users the reminder is shared with.
+        """
+        owned_rows = (
+            db.session.query(Reminder.reminder_uuid, Reminder.reminder_next_occurrence, User.user_timezone)
+            .join(User, Reminder.reminder_user_uuid == User.user_uuid)
+            .filter(User.is_deleted == False, *reminder_filters)
+        )
+        shared_rows = (
+            db.session.query(Reminder.reminder_uuid, Reminder.reminder_next_occurrence, User.user_timezone)
+            .join(SharedReminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
+            .join(User, SharedReminder.shared_reminder_user_uuid == User.user_uuid)
+            .filter(SharedReminder.is_deleted == False, User.is_deleted == False, *reminder_filters)
+        )
+        return owned_rows.union(shared_rows).all()
+
+    def resync(self, now):
+        """
+        Rebuilds the heap from the DB: every incomplete reminder due between the earliest local today and the horizon,
+        except those whose fire time has passed and that already fired at it.
+        """
+        logger.info("AlertScheduler.resync() called")
+
+        if self._horizon is not None:
+            # Changes since the last poll first, a reminder they schedule again (e.g. a new recipient) fires again
+            self.apply_changes()
+        pending_fire_at_by_key = self._fire_at_by_key
+
+        earliest_today = get_earliest_local_today(now)
+        roll_forward_reminder_next_occurrences(today=earliest_today)
+
+        # Read before loading, so changes made during the load are picked up by the next poll
+        self._reminder_watermark = (db.session.query(db.func.max(Reminder.updated_on)).scalar(), set())
+        self._shared_reminder_watermark = (db.session.query(db.func.max(SharedReminder.updated_on)).scalar(), set())
+
+        self._horizon = now.date() + timedelta(days=self.alert_threshold + ALERT_SCHEDULER_HORIZON_DAYS)
+
+        upcoming_rows = self.get_recipient_timezone_rows(
+            Reminder.is_deleted == False,
+            Reminder.reminder_is_completed == False,
+            Reminder.reminder_next_occurrence >= earliest_today,
+            Reminder.reminder_next_occurrence <= self._horizon
+        )
+
+        fired_at_by_key = {}
+        self._fire_at_by_key = {}
+        self._timezone_keys_by_reminder = defaultdict(set)
+        for reminder_uuid, next_occurrence, user_timezone in upcoming_rows:
+            key = (reminder_uuid, user_timezone or "")
+            fire_at = self.get_fire_at(next_occurrence, user_timezone)
+            if fire_at <= now and self._fired_at_by_key.get(key) == fire_at and pending_fire_at_by_key.get(key) != fire_at:
+                fired_at_by_key[key] = fire_at
+                continue
+            self._fire_at_by_key[key] = fire_at
+            self._timezone_keys_by_reminder[reminder_uuid].add(key[1])
+        # Only what is still skipped is remembered, a reminder rolled forward to a new fire time fires again
+        self._fired_at_by_key = fired_at_by_key
+        self._heap = [(fire_at, *key) for key, fire_at in self._fire_at_by_key.items()]
+        heapq.heapify(self._heap)
+
+        logger.info(
+            f"Alert scheduler: {len(self._heap)} reminder timezones scheduled until {self._horizon}, "
+            f"{len(fired_at_by_key)} already fired"
+        )
+
+    def apply_changes(self):
+        """
+        Applies reminders and shares changed since the last poll.
+        Returns the number of changed rows applied.
+        """
+        applied_count = 0
+
+        watermark, watermark_ids = self._reminder_watermark
+        changed_reminders = (
+            db.session.query(
+                Reminder.reminder_id,
+                Reminder.updated_on,
+                Reminder.reminder_uuid,
+                Reminder.reminder_is_completed,
+                Reminder.is_deleted
+            )
+            .filter(Reminder.updated_on >= watermark if watermark is not None else true())
+            .order_by(Reminder.updated_on)
+            .all()
+        )
+        rescheduled_reminder_uuids = []
+        for reminder_id, updated_on, reminder_uuid, is_completed, is_deleted in changed_reminders:
+            if updated_on == watermark and reminder_id in watermark_ids:
+                continue
+            self.unschedule(reminder_uuid)
+            if not (is_completed or is_deleted):
+                rescheduled_reminder_uuids.append(reminder_uuid)
+            applied_count += 1
+        self._reminder_watermark = self.advance_watermark(watermark, watermark_ids, changed_reminders)
+
+        # Scheduled again for every recipient timezone, fetched in batches
+        for start in range(0, len(rescheduled_reminder_uuids), ALERT_SCHEDULER_FIRE_BATCH_SIZE):
+            for reminder_uuid, next_occurrence, user_timezone in self.get_recipient_timezone_rows(
+                Reminder.reminder_uuid.in_(rescheduled_reminder_uuids[start:start + ALERT_SCHEDULER_FIRE_BATCH_SIZE])
+            ):
+                self.schedule(reminder_uuid, user_timezone, next_occurrence)
+
+        watermark, watermark_ids = self._shared_reminder_watermark
+        changed_shared_reminders = (
+            db.session.query(
+                SharedReminder.shared_reminder_id,
+                SharedReminder.updated_on,
+                Reminder.reminder_uuid,
+                Reminder.reminder_next_occurrence,
+                Reminder.reminder_is_completed,
+                Reminder.is_deleted,
+                SharedReminder.is_deleted,
+                User.user_timezone
+            )
+            .join(Reminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
+            .join(User, SharedReminder.shared_reminder_user_uuid == User.user_uuid)
+            .filter(SharedReminder.updated_on >= watermark if watermark is not None else true())
+            .order_by(SharedReminder.updated_on)
+            .all()
+        )
+        for shared_reminder_id, updated_on, reminder_uuid, next_occurrence, is_completed, is_deleted, is_share_deleted, user_timezone in changed_shared_reminders:
+            if updated_on == watermark and shared_reminder_id in watermark_ids:
+                continue
+            if not (is_completed or is_deleted or is_share_deleted):
+                # Fire again for a new recipient, recipients already alerted are skipped by the outbox
+                self.unschedule(reminder_uuid, user_timezone, all_timezones=False)
+                self.schedule(reminder_uuid, user_timezone, next_occurrence)
+            applied_count += 1
+        self._shared_reminder_watermark = self.advance_watermark(watermark, watermark_ids, changed_shared_reminders)
+
+        return applied_count
+
+    @staticmethod
+    def advance_watermark(watermark, watermark_ids, changed_rows):
+        """
+        New (watermark, ids) after a poll. Rows are polled with >= watermark, since updated_on has
+        one second resolution, and the ids at the watermark stop them being applied twice.
+        """
+        if not changed_rows:
+            return watermark, watermark_ids
+
+        new_watermark = changed_rows[-1][1]
+        new_watermark_ids = {row[0] for row in changed_rows if row[1] == new_watermark}
+        if new_watermark == watermark:
+            new_watermark_ids |= watermark_ids
+        return new_watermark, new_watermark_ids
+
+    def fire(self, now, due_reminders):
+        """
+        Queues the alerts of the given (reminder_uuid, user_timezone) pairs, for the recipients in that timezone
+        as of their local date.
+        Returns the number of alerts queued.
+        """
+        logger.info("AlertScheduler.fire() called")
+
+        reminder_uuids_by_timezone = defaultdict(list)
+        for reminder_uuid, user_timezone in due_reminders:
+            reminder_uuids_by_timezone[user_timezone].append(reminder_uuid)
+
+        alerts_enqueued = 0
+        for user_timezone, reminder_uuids in reminder_uuids_by_timezone.items():
+            local_today = get_local_today(user_timezone, now)
+            for start in range(0, len(reminder_uuids), ALERT_SCHEDULER_FIRE_BATCH_SIZE):
+                alerts_enqueued += enqueue_due_alerts(
+                    local_today,
+                    user_shard=self.user_shard,
+                    reminder_uuids=reminder_uuids[start:start + ALERT_SCHEDULER_FIRE_BATCH_SIZE],
+                    user_timezones=[user_timezone]
+                )["alerts_enqueued"]
+
+        return alerts_enqueued
+
+    def get_lock_name(self):
+        if self.user_shard is None:
+            return "alert-scheduler"
+        return f"alert-scheduler:{self.user_shard.index}/{self.user_shard.count}"
+
+    def run_forever(self, poll_interval=ALERT_SCHEDULER_POLL_SECONDS, resync_interval=ALERT_SCHEDULER_RESYNC_SECONDS):
+        """
+        Runs the scheduler while holding its named lock, so only one scheduler per shard is active
+        across all nodes. The others wait on standby and take over when the active one stops or its lock is lost.
+        """
+        logger.info("AlertScheduler.run_forever() called")
+
+        while True:
+            with named_lock(self.get_lock_name()) as scheduler_lock:
+                if scheduler_lock is not None:
+                    logger.info(f"Alert scheduler: active, holding {scheduler_lock.name}")
+                    self.run_while_locked(scheduler_lock, poll_interval, resync_interval)
+                    logger.warning(f"Alert scheduler: lost {scheduler_lock.name}, back to standby")
+            db.session.remove()
+            time_module.sleep(poll_interval)
+
+    def run_while_locked(self, scheduler_lock, poll_interval, resync_interval):
+        """
+        Scheduler loop: resync on start, hourly and when the day changes; poll for changes,
+        fire due reminders and drain outbox retries every tick. Returns when the lock can't be renewed.
+        """
+        next_resync_at = None
+        resync_day = None
+
+        while True:
+            now = datetime.utcnow()
+            try:
+                if not scheduler_lock.renew():
+                    return
+
+                # Only ticks that queued or delivered something are recorded
+                with AlertRunRecorder("SCHEDULER", user_shard=self.user_shard, record_idle=False) as alert_run_recorder:
+                    if next_resync_at is None or now >= next_resync_at or now.date() != resync_day:
+                        with alert_run_recorder.measure_occurrences():
+                            self.resync(now)
+                        purge_alert_outbox(get_earliest_local_today(now))
+                        next_resync_at = now + timedelta(seconds=resync_interval)
+                        resync_day = now.date()
+                    else:
+                        self.apply_changes()
+
+                    due_reminders = self.pop_due(now)
+                    alerts_enqueued = 0
+                    if due_reminders:
+                        alerts_enqueued = self.fire(now, due_reminders)
+                        logger.info(f"Alert scheduler: fired {len(due_reminders)} reminder timezones, {alerts_enqueued} alerts queued")
+
+                    alert_run_recorder.summary["reminders_due"] = len({reminder_uuid for reminder_uuid, _ in due_reminders})
+                    alert_run_recorder.summary["alerts_enqueued"] = alerts_enqueued
+                    alert_run_recorder.summary.update(drain_alert_outbox(
+                        user_shard=self.user_shard, latency_histogram=alert_run_recorder.latency_histogram,
+                        lock=scheduler_lock
+                    ))
+            except NamedLockLost:
+                # Lost mid-drain, another scheduler may be active now
+                db.session.rollback()
+                return
+            except Exception:
+                # A failed tick leaves the outbox and heap consistent, force a resync and carry on.
+                # Popped reminders may not have been queued, so the resync fires everything in its alert window
+                # again, the outbox skips what was queued already
+                logger.exception("Alert scheduler tick failed")
+                db.session.rollback()
+                self._fired_at_by_key = {}
+                next_resync_at = None
+            finally:
+                # Don't hold a connection or stale identity map between ticks
+                db.session.remove()
+
+            # Sleep until the next fire time, at most one poll interval
+            sleep_until = now + timedelta(seconds=poll_interval)
+            next_fire_at = self.get_next_fire_at()
+            if next_fire_at is not None and next_fire_at < sleep_until:
+                sleep_until = next_fire_at
+            time_module.sleep(max(0.0, (sleep_until - datetime.utcnow()).total_seconds()))
@@ -0,0 +1,185 @@
+# helpers/alert_telemetry.py
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import threading
+import time
+from sqlalchemy import event
+from .. import db
+from app.models.alert_run import AlertRun
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+# Upper bounds (ms) of the webhook latency histogram buckets, slower deliveries go in "+Inf"
+LATENCY_HISTOGRAM_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """
+    Per-host webhook latency histogram with fixed buckets.
+    """
+
+    def __init__(self):
+        self._counts_by_host = {}
+        self._totals_by_host = {}
+
+    def add(self, host, latency_ms):
+        counts = self._counts_by_host.setdefault(host, [0] * (len(LATENCY_HISTOGRAM_BUCKETS_MS) + 1))
+        for bucket_index, upper_bound_ms in enumerate(LATENCY_HISTOGRAM_BUCKETS_MS):
+            if latency_ms <= upper_bound_ms:
+                counts[bucket_index] += 1
+                break
+        else:
+            counts[-1] += 1
+        self._totals_by_host[host] = self._totals_by_host.get(host, 0.0) + latency_ms
+
+    def to_dict(self):
+        """
+        {host: {"count", "avg_ms", "buckets": [{"le_ms": 50, "count": n}, ..., {"le_ms": None, "count": n}]}}
+        Buckets are a list so their order survives JSON serialization, le_ms None is the +Inf bucket.
+        """
+        upper_bounds_ms = list(LATENCY_HISTOGRAM_BUCKETS_MS) + [None]
+        histogram = {}
+        for host, counts in self._counts_by_host.items():
+            count = sum(counts)
+            histogram[host] = {
+                "count": count,
+                "avg_ms": round(self._totals_by_host[host] / count, 1),
+                "buckets": [
+                    {"le_ms": upper_bound_ms, "count": bucket_count}
+                    for upper_bound_ms, bucket_count in zip(upper_bounds_ms, counts)
+                ],
+            }
+        return histogram
+
+
+class AlertRunRecorder:
+    """
+    Records one alert run (a sweep or a scheduler tick) in alert_runs.
+    Used as a context manager around the run: DB time and query count are measured with SQLAlchemy
+    cursor events for the calling thread only, the run's summary dict is stored on exit.
+    A run that raises is stored as FAILED with the error, and the exception is re-raised.
+    With record_idle=False, a run that neither queued nor delivered anything is not stored.
+    """
+
+    def __init__(self, run_type, user_shard=None, record_idle=True):
+        self.run_type = run_type
+        self.user_shard = user_shard
+        self.record_idle = record_idle
+        self.summary = {}
+        self.latency_histogram = LatencyHistogram()
+        self.occurrence_ms = 0.0
+        self.db_ms = 0.0
+        self.db_queries = 0
+        self._thread_id = threading.get_ident()
+        self._query_started = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread_id:
+            self._query_started.append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread_id and self._query_started:
+            self.db_ms += (time.perf_counter() - self._query_started.pop()) * 1000
+            self.db_queries += 1
+
+    @contextmanager
+    def measure_occurrences(self):
+        """
+        Adds the time spent in the block, minus its DB time, to the occurrence computation time.
+        """
+        started = time.perf_counter()
+        db_ms_before = self.db_ms
+        try:
+            yield
+        finally:
+            self.occurrence_ms += (time.perf_counter() - started) * 1000 - (self.db_ms - db_ms_before)
+
+    def __enter__(self):
+        self.started_on = datetime.utcnow()
+        self._started = time.perf_counter()
+        event.listen(db.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(db.engine, "after_cursor_execute", self._after_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event.remove(db.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(db.engine, "after_cursor_execute", self._after_cursor_execute)
+
+        if exc_type is not None:
+            db.session.rollback()
+        elif not self.record_idle and not (self.summary.get("alerts_enqueued") or self.summary.get("deliveries")):
+            return False
+
+        try:
+            self.save(error=exc_value)
+        except Exception:
+            # Telemetry must never turn a successful run into a failed one
+            logger.exception("Could not record alert run")
+            db.session.rollback()
+
+        return False
+
+    def save(self, error=None):
+        summary = self.summary
+        alert_run = AlertRun(
+            alert_run_type=self.run_type,
+            alert_run_shard=f"{self.user_shard.index}/{self.user_shard.count}" if self.user_shard else None,
+            alert_run_status="FAILED" if error is not None else "SUCCESS",
+            alert_run_started_on=self.started_on,
+            alert_run_ended_on=datetime.utcnow(),
+            alert_run_duration_ms=int((time.perf_counter() - self._started) * 1000),
+            alert_run_users_alerted=summary.get("users_alerted", 0),
+            alert_run_reminders_due=summary.get("reminders_due", 0),
+            alert_run_alerts_due=summary.get("alerts_due", 0),
+            alert_run_alerts_enqueued=summary.get("alerts_enqueued", 0),
+            alert_run_occurrence_ms=int(self.occurrence_ms),
+            alert_run_db_ms=int(self.db_ms),
+            alert_run_db_queries=self.db_queries,
+            alert_run_deliveries_attempted=summary.get("deliveries", 0),
+            alert_run_deliveries_succeeded=summary.get("deliveries", 0) - summary.get("deliveries_failed", 0),
+            alert_run_deliveries_failed=summary.get("deliveries_failed", 0),
+            alert_run_latency_histogram=json.dumps(self.latency_histogram.to_dict()),
+            alert_run_error=f"{type(error).__name__}: {error}"[:1000] if error is not None else None,
+        )
+        db.session.add(alert_run)
+        db.session.commit()
+
+
+def get_recent_alert_runs(limit=50, run_type=None):
+    """
+    Latest alert runs, newest first, as JSON-ready dicts.
+    """
+    logger.info("get_recent_alert_runs() called")
+
+    query = AlertRun.query
+    if run_type:
+        query = query.filter(AlertRun.alert_run_type == run_type)
+
+    alert_runs = query.order_by(AlertRun.alert_run_started_on.desc()).limit(limit).all()
+
+    return [
+        {
+            "type": alert_run.alert_run_type,
+            "shard": alert_run.alert_run_shard,
+            "status": alert_run.alert_run_status,
+            "started_on": alert_run.alert_run_started_on.isoformat(),
+            "ended_on": alert_run.alert_run_ended_on.isoformat(),
+            "duration_ms": alert_run.alert_run_duration_ms,
+            "users_alerted": alert_run.alert_run_users_alerted,
+            "reminders_due": alert_run.alert_run_reminders_due,
+            "alerts_due": alert_run.alert_run_alerts_due,
+            "alerts_enqueued": alert_run.alert_run_alerts_enqueued,
+            "occurrence_ms": alert_run.alert_run_occurrence_ms,
+            "db_ms": alert_run.alert_run_db_ms,
+            "db_queries": alert_run.alert_run_db_queries,
+            "deliveries_attempted": alert_run.alert_run_deliveries_attempted,
+            "deliveries_succeeded": alert_run.alert_run_deliveries_succeeded,
+            "deliveries_failed": alert_run.alert_run_deliveries_failed,
+            "latency_histogram": json.loads(alert_run.alert_run_latency_histogram or "{}"),
+            "error": alert_run.alert_run_error,
+        }
+        for alert_run in alert_runs
+    ]
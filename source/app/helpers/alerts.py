@@ -0,0 +1,391 @@
+# helpers/alerts.py
+from collections import namedtuple
+from datetime import datetime, timedelta
+import os
+from dotenv import load_dotenv
+from sqlalchemy import true, false, or_
+from sqlalchemy.orm import aliased
+from .. import db
+from app.models.reminder import Reminder
+from app.models.shared_reminder import SharedReminder
+from app.models.user import User
+from app.models.alert_watermark import AlertWatermark
+from app.helpers.reminders import roll_forward_reminder_next_occurrences
+from app.helpers.webhooks import get_webhook_delivery_engine
+from app.helpers.alert_messages import build_alert_payload
+from app.helpers.alert_outbox import (
+    enqueue_outbox_alerts,
+    drain_alert_outbox,
+    purge_alert_outbox,
+    get_pending_outbox_count,
+    get_queued_outbox_keys
+)
+from app.helpers.sharding import is_user_in_shard
+from app.helpers.timezones import get_local_today
+from app.helpers.alert_telemetry import AlertRunRecorder
+from app.helpers.locks import NamedLockLost, named_lock
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+# Load environment variables
+load_dotenv()
+
+# Alerts are sent when the next occurrence is within this many days
+ALERT_THRESHOLD_DAYS = int(os.getenv("ALERT_THRESHOLD_DAYS", "5"))
+
+# Rows fetched per round trip while streaming due alerts
+ALERT_ROWS_PER_FETCH = 1000
+
+# Incremental sweeps rescan rows changed this long before the previous sweep started. The watermark and every
+# updated_on compared with it (reminders, shares, users) come from the same DB clock, so this only has to cover
+# writes stamped before a sweep started but committed after its scan, i.e. write transactions must not stay open
+# longer than this. The outbox drops the duplicates.
+ALERT_WATERMARK_OVERLAP_SECONDS = 300
+
+# One alert to deliver: a reminder due within the threshold, for one recipient
+DueAlert = namedtuple("DueAlert", [
+    "reminder_uuid",
+    "reminder_title",
+    "reminder_due_date",
+    "reminder_shared_type",
+    "recipient_user_uuid",
+    "recipient_alert_webhook_url",
+])
+
+
+# Function to send alert notification
+def send_alert_notification(reminder_shared_type, user_alert_webhook_url, reminder_title, reminder_due_date):
+    """
+    Sends one alert and returns its DeliveryResult (status, latency, error).
+    """
+    payload = build_alert_payload(reminder_shared_type, reminder_title, reminder_due_date)
+    return get_webhook_delivery_engine().deliver(user_alert_webhook_url, payload)
+
+
+def get_user_timezone_filter(user_timezone_column, user_timezones):
+    """
+    SQL filter for users in the given timezone buckets, None in user_timezones is the server timezone bucket.
+    """
+    named_timezones = [user_timezone for user_timezone in user_timezones if user_timezone is not None]
+    timezone_filters = [user_timezone_column.in_(named_timezones)] if named_timezones else []
+    if None in user_timezones:
+        timezone_filters.append(user_timezone_column == None)
+    return or_(*timezone_filters) if timezone_filters else false()
+
+
+def get_due_alerts(today, alert_threshold=ALERT_THRESHOLD_DAYS, user_shard=None, reminder_uuids=None, alert_watermark=None,
+                   user_timezones=None):
+    """
+    Generator over every DueAlert for today, across all users with an alert webhook URL.
+    Uses two set-based queries (owned and shared reminders) streamed in chunks,
+    no per-user or per-reminder queries.
+    With user_shard, only alerts for recipients in that shard are yielded.
+    With reminder_uuids, only alerts for those reminders are yielded.
+    With user_timezones, only alerts for recipients in those timezone buckets are yielded,
+    today should then be their local date.
+    With alert_watermark (last_run_date, changed_since), only alerts that may not have been seen by that
+    run are yielded: reminders that entered the window after last_run_date, and reminders, shares or
+    recipients changed since changed_since.
+    """
+    logger.info("get_due_alerts() called")
+
+    last_alert_date = today + timedelta(days=alert_threshold)
+
+    if alert_watermark is not None:
+        last_run_date, changed_since = alert_watermark
+        newly_due_after = last_run_date + timedelta(days=alert_threshold)
+
+    # Part-1: Reminders due for their owners
+    owned_query = (
+        db.session.query(
+            Reminder.reminder_uuid,
+            Reminder.reminder_title,
+            Reminder.reminder_next_occurrence,
+            User.user_uuid,
+            User.user_alert_webhook_url
+        )
+        .join(User, Reminder.reminder_user_uuid == User.user_uuid)
+        .filter(
+            User.is_deleted == False,
+            User.user_alert_webhook_url != None,
+            User.user_alert_webhook_url != "",
+            Reminder.is_deleted == False,
+            Reminder.reminder_is_completed == False,
+            Reminder.reminder_next_occurrence >= today,
+            Reminder.reminder_next_occurrence <= last_alert_date
+        )
+        .filter(Reminder.reminder_uuid.in_(reminder_uuids) if reminder_uuids is not None else true())
+        .filter(get_user_timezone_filter(User.user_timezone, user_timezones) if user_timezones is not None else true())
+        .filter(
+            or_(
+                Reminder.reminder_next_occurrence > newly_due_after,
+                Reminder.updated_on >= changed_since,
+                User.updated_on >= changed_since
+            ) if alert_watermark is not None else true()
+        )
+        .order_by(User.user_uuid, Reminder.reminder_next_occurrence)
+    )
+
+    for reminder_uuid, reminder_title, reminder_due_date, user_uuid, user_alert_webhook_url in owned_query.yield_per(ALERT_ROWS_PER_FETCH):
+        if not is_user_in_shard(user_uuid, user_shard):
+            continue
+        yield DueAlert(reminder_uuid, reminder_title, reminder_due_date, "Your Reminder", user_uuid, user_alert_webhook_url)
+
+    # Part-2: Reminders due for the users they are shared with
+    user_reminder_shared_with = aliased(User)
+    user_reminder_owner = aliased(User)
+
+    shared_query = (
+        db.session.query(
+            Reminder.reminder_uuid,
+            Reminder.reminder_title,
+            Reminder.reminder_next_occurrence,
+            user_reminder_shared_with.user_uuid,
+            user_reminder_shared_with.user_alert_webhook_url
+        )
+        # Join shared reminder
+        .join(SharedReminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
+        # Join the user the reminder is shared with
+        .join(user_reminder_shared_with, SharedReminder.shared_reminder_user_uuid == user_reminder_shared_with.user_uuid)
+        # Join the owner of the reminder
+        .join(user_reminder_owner, Reminder.reminder_user_uuid == user_reminder_owner.user_uuid)
+        .filter(
+            SharedReminder.is_deleted == False,
+            user_reminder_shared_with.is_deleted == False,
+            user_reminder_shared_with.user_alert_webhook_url != None,
+            user_reminder_shared_with.user_alert_webhook_url != "",
+            user_reminder_owner.is_deleted == False,
+            Reminder.is_deleted == False,
+            Reminder.reminder_is_completed == False,
+            Reminder.reminder_next_occurrence >= today,
+            Reminder.reminder_next_occurrence <= last_alert_date
+        )
+        .filter(Reminder.reminder_uuid.in_(reminder_uuids) if reminder_uuids is not None else true())
+        .filter(
+            get_user_timezone_filter(user_reminder_shared_with.user_timezone, user_timezones)
+            if user_timezones is not None else true()
+        )
+        .filter(
+            or_(
+                Reminder.reminder_next_occurrence > newly_due_after,
+                Reminder.updated_on >= changed_since,
+                SharedReminder.updated_on >= changed_since,
+                user_reminder_shared_with.updated_on >= changed_since
+            ) if alert_watermark is not None else true()
+        )
+        .order_by(user_reminder_shared_with.user_uuid, Reminder.reminder_next_occurrence)
+    )
+
+    for reminder_uuid, reminder_title, reminder_due_date, user_uuid, user_alert_webhook_url in shared_query.yield_per(ALERT_ROWS_PER_FETCH):
+        if not is_user_in_shard(user_uuid, user_shard):
+            continue
+        yield DueAlert(reminder_uuid, reminder_title, reminder_due_date, "Shared Reminder", user_uuid, user_alert_webhook_url)
+
+
+def enqueue_due_alerts(today, user_shard=None, reminder_uuids=None, alert_watermark=None, user_timezones=None):
+    """
+    Queues an outbox row for every due alert, see get_due_alerts() for the filters.
+    Returns a summary dict: alerts_due, alerts_enqueued, and the distinct users (recipients) and reminders scanned.
+    """
+    logger.info("enqueue_due_alerts() called")
+
+    # Collected before inserting, the due alert queries stream over the same connection
+    outbox_rows = [
+        {
+            "reminder_uuid": due_alert.reminder_uuid,
+            "recipient_user_uuid": due_alert.recipient_user_uuid,
+            "occurrence_date": due_alert.reminder_due_date,
+            "alert_item": {
+                "reminder_shared_type": due_alert.reminder_shared_type,
+                "reminder_title": due_alert.reminder_title,
+                "reminder_due_date": due_alert.reminder_due_date.isoformat(),
+            },
+        }
+        for due_alert in get_due_alerts(
+            today, user_shard=user_shard, reminder_uuids=reminder_uuids, alert_watermark=alert_watermark,
+            user_timezones=user_timezones
+        )
+    ]
+
+    return {
+        "users_alerted": len({outbox_row["recipient_user_uuid"] for outbox_row in outbox_rows}),
+        "reminders_due": len({outbox_row["reminder_uuid"] for outbox_row in outbox_rows}),
+        "alerts_due": len(outbox_rows),
+        "alerts_enqueued": enqueue_outbox_alerts(outbox_rows),
+    }
+
+
+def get_alert_timezones():
+    """
+    Distinct user timezones (None for the server's), the buckets an alert sweep works through.
+    Served from user_timezone_idx.
+    """
+    return [user_timezone for (user_timezone,) in db.session.query(User.user_timezone).distinct()]
+
+
+def get_alert_watermark_name(user_shard=None, user_timezone=None):
+    watermark_name = "sweep" if user_shard is None else f"sweep:{user_shard.index}/{user_shard.count}"
+    if user_timezone is not None:
+        watermark_name += f"@{user_timezone}"
+    return watermark_name
+
+
+def run_alert_sweep(today=None, user_shard=None, full_scan=False, lock=None):
+    """
+    Queues an alert in the outbox for every reminder due within the alert threshold, owned or shared,
+    then drains the outbox. Alerts already queued for the same occurrence are not queued again.
+    With user_shard, only recipients in that shard are handled, so several workers can split a sweep.
+    Recipients are handled in timezone buckets, each against its own local date and watermark, so the reminders
+    entering the alert window are picked up as each bucket's local day begins instead of all at server midnight.
+    After a bucket's first full scan, its sweeps are incremental from the previous successful sweep's watermark,
+    unless full_scan is set. today, when given, is used as every bucket's local date.
+    Returns a summary dict of the sweep.
+    """
+    logger.info("run_alert_sweep() called")
+
+    now = datetime.utcnow()
+
+    with AlertRunRecorder("SWEEP", user_shard=user_shard) as alert_run_recorder:
+        # Read from the DB clock, the same clock that stamps updated_on on insert and update (see the models),
+        # and before the roll forward below so the reminders it changes are rescanned by the next sweep too.
+        # Never take it from datetime.utcnow(), the app and DB servers' clocks can differ
+        # (see ALERT_WATERMARK_OVERLAP_SECONDS)
+        sweep_started_on = db.session.query(db.func.current_timestamp()).scalar()
+
+        user_timezones = get_alert_timezones()
+        local_today_by_timezone = {
+            user_timezone: today or get_local_today(user_timezone, now)
+            for user_timezone in user_timezones
+        }
+        earliest_today = min(local_today_by_timezone.values(), default=today or get_local_today(None, now))
+
+        watermark_names = {
+            user_timezone: get_alert_watermark_name(user_shard, user_timezone) for user_timezone in user_timezones
+        }
+        watermarks = {
+            watermark.alert_watermark_name: watermark
+            for watermark in AlertWatermark.query.filter(AlertWatermark.alert_watermark_name.in_(watermark_names.values()))
+        }
+
+        # Buckets on the same local date and watermark are scanned together, usually a handful of groups
+        # (one per local date in use, plus the buckets whose day just began)
+        timezones_by_scan = {}
+        timezone_buckets_rolled_over = 0
+        for user_timezone in user_timezones:
+            local_today = local_today_by_timezone[user_timezone]
+            watermark = watermarks.get(watermark_names[user_timezone])
+
+            alert_watermark = None
+            if watermark and not full_scan and watermark.alert_watermark_run_date <= local_today:
+                alert_watermark = (
+                    watermark.alert_watermark_run_date,
+                    watermark.alert_watermark_changed_since - timedelta(seconds=ALERT_WATERMARK_OVERLAP_SECONDS)
+                )
+            if watermark is None or watermark.alert_watermark_run_date != local_today:
+                timezone_buckets_rolled_over += 1
+
+            timezones_by_scan.setdefault((local_today, alert_watermark), []).append(user_timezone)
+
+        # Bring stale stored next occurrences up to date before filtering on them, as of the earliest local date
+        # so no bucket loses an occurrence that is still today for it
+        with alert_run_recorder.measure_occurrences():
+            reminders_rolled_forward = roll_forward_reminder_next_occurrences(today=earliest_today)
+        if lock is not None:
+            lock.check()
+
+        # Queue first, then deliver, so a crash mid-delivery leaves a record of what is still owed
+        # and a rerun only sends what has not been sent yet
+        summary = alert_run_recorder.summary
+        scan_types = {"incremental" if alert_watermark else "full" for _, alert_watermark in timezones_by_scan}
+        summary["alerts_scan"] = scan_types.pop() if len(scan_types) == 1 else "mixed"
+        summary["timezone_buckets"] = len(user_timezones)
+        summary["timezone_buckets_rolled_over"] = timezone_buckets_rolled_over
+        summary["reminders_rolled_forward"] = reminders_rolled_forward
+        for key in ("users_alerted", "reminders_due", "alerts_due", "alerts_enqueued"):
+            summary[key] = 0
+        for (local_today, alert_watermark), scan_timezones in timezones_by_scan.items():
+            scan_summary = enqueue_due_alerts(
+                local_today, user_shard=user_shard, alert_watermark=alert_watermark, user_timezones=scan_timezones
+            )
+            for key, value in scan_summary.items():
+                summary[key] += value
+            if lock is not None:
+                lock.check()
+
+        # Everything due is in the outbox now, later sweeps only need to look at what changes after this point
+        for user_timezone in user_timezones:
+            watermark = watermarks.get(watermark_names[user_timezone])
+            if watermark is None:
+                watermark = AlertWatermark(alert_watermark_name=watermark_names[user_timezone])
+                db.session.add(watermark)
+            watermark.alert_watermark_run_date = local_today_by_timezone[user_timezone]
+            watermark.alert_watermark_changed_since = sweep_started_on
+        db.session.commit()
+
+        summary.update(drain_alert_outbox(
+            user_shard=user_shard, latency_histogram=alert_run_recorder.latency_histogram, lock=lock
+        ))
+        summary["alerts_purged"] = purge_alert_outbox(earliest_today)
+
+    logger.info("Alert sweep summary: %s", summary)
+    return summary
+
+
+def run_locked_alert_sweep(today=None, user_shard=None, full_scan=False):
+    """
+    run_alert_sweep() under a cross-node named lock for the sweep's shard, renewed between batches.
+    Returns the summary, or None when another node is already running the same sweep
+    or took it over because this one lost the lock.
+    """
+    logger.info("run_locked_alert_sweep() called")
+
+    lock_name = "alert-" + get_alert_watermark_name(user_shard)
+    with named_lock(lock_name) as sweep_lock:
+        if sweep_lock is None:
+            logger.info(f"Alert sweep {lock_name} is already running on another node, skipped")
+            return None
+        try:
+            return run_alert_sweep(today=today, user_shard=user_shard, full_scan=full_scan, lock=sweep_lock)
+        except NamedLockLost:
+            # Another node may be sweeping now, the outbox keeps either sweep from sending an alert twice
+            logger.warning(f"Alert sweep {lock_name} lost its lock, stopped")
+            db.session.rollback()
+            return None
+
+
+def get_alert_sweep_preview(today=None, user_shard=None):
+    """
+    Dry run of run_alert_sweep(), nothing is written or sent.
+    Returns (alerts_to_enqueue, summary) where alerts_to_enqueue lists the DueAlerts not yet in the outbox.
+    Stored next occurrences are not rolled forward, so reminders whose roll forward is overdue are not included.
+    """
+    logger.info("get_alert_sweep_preview() called")
+
+    now = datetime.utcnow()
+
+    timezones_by_local_today = {}
+    for user_timezone in get_alert_timezones():
+        timezones_by_local_today.setdefault(today or get_local_today(user_timezone, now), []).append(user_timezone)
+
+    queued_keys = set()
+    if timezones_by_local_today:
+        queued_keys = get_queued_outbox_keys(
+            min(timezones_by_local_today), max(timezones_by_local_today) + timedelta(days=ALERT_THRESHOLD_DAYS)
+        )
+
+    alerts_due = 0
+    alerts_to_enqueue = []
+    for local_today, user_timezones in timezones_by_local_today.items():
+        for due_alert in get_due_alerts(local_today, user_shard=user_shard, user_timezones=user_timezones):
+            alerts_due += 1
+            if (due_alert.reminder_uuid, due_alert.recipient_user_uuid, due_alert.reminder_due_date) not in queued_keys:
+                alerts_to_enqueue.append(due_alert)
+
+    summary = {
+        "alerts_due": alerts_due,
+        "alerts_to_enqueue": len(alerts_to_enqueue),
+        "alerts_pending_in_outbox": get_pending_outbox_count(now, user_shard=user_shard),
+    }
+    return alerts_to_enqueue, summary
@@ -1,9 +1,18 @@
-from flask import redirect, session, url_for
+import hmac
+import os
+from dotenv import load_dotenv
+from flask import redirect, request, session, url_for
 from app.helpers.logging import setup_logger
 
 
 logger = setup_logger()
 
+# Load environment variables
+load_dotenv()
+
+# Shared secret for the /api/admin/* endpoints, sent as "Authorization: Bearer <token>". Unset closes them
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
 
 def check_login_for_page():
     logger.info("check_login_for_page() called")
@@ -24,4 +33,21 @@ def check_login_for_api():
         logger.info("User not logged in, returning error")
         return ValueError("User not logged in.")
     else:
-        return session_user_uuid
\ No newline at end of file
+        return session_user_uuid
+
+
+def check_admin_token_for_api():
+    """
+    True when the request carries ADMIN_API_TOKEN as a Bearer token, always False while it is not set.
+    """
+    logger.info("check_admin_token_for_api() called")
+
+    if not ADMIN_API_TOKEN:
+        logger.info("ADMIN_API_TOKEN not set, admin APIs are closed")
+        return False
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_API_TOKEN.encode()):
+        logger.info("Missing or wrong admin token")
+        return False
+    return True
@@ -12,6 +12,12 @@ load_dotenv()
 def get_db_connection_string():
     logger.info("Getting database connection string...")
 
+    # A full SQLAlchemy URL, when set, is used as is (e.g. for the local benchmark)
+    database_url = os.getenv("DATABASE_URL")
+    if database_url:
+        logger.debug("Using DATABASE_URL")
+        return database_url
+
     db_host = os.getenv("DB_HOST", "localhost")
     db_port = os.getenv("DB_PORT", "3306")
     db_user = os.getenv("DB_USER", "remindly")
@@ -23,4 +29,16 @@ def get_db_connection_string():
     logger.debug("Database Name: %s", db_name)
     logger.debug("Database connection string: %s", f"mysql+pymysql://<hidden>:<hidden>@{db_host}:{db_port}/{db_name}")
 
-    return f"mysql+pymysql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
\ No newline at end of file
+    return f"mysql+pymysql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+
+
+def get_db_engine_options(connection_string):
+    """
+    SQLAlchemy engine options for a connection string.
+    MySQL sessions are pinned to UTC: CURRENT_TIMESTAMP (which stamps updated_on on update) and TIMESTAMP reads
+    are then UTC like the datetime.utcnow() values the app writes, whatever the server's time_zone is.
+    SQLite's CURRENT_TIMESTAMP is always UTC.
+    """
+    if connection_string.startswith("mysql"):
+        return {"connect_args": {"init_command": "SET time_zone = '+00:00'"}}
+    return {}
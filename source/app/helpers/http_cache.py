@@ -0,0 +1,77 @@
+# helpers/http_cache.py
+from datetime import date, datetime, time
+from functools import lru_cache
+import hashlib
+import os
+from flask import Response, current_app, make_response, request
+from werkzeug.http import is_resource_modified
+from app.helpers.timezones import get_local_midnight_utc
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+# Browsers keep the page but revalidate it on every visit
+PAGE_CACHE_CONTROL = "private, no-cache"
+
+
+@lru_cache(maxsize=1)
+def get_templates_version():
+    """
+    Hash of every template file, part of page ETags so a deploy that changes the markup isn't answered with 304.
+    Computed once per worker process. The same on every worker and node running the same code.
+    """
+    templates_hash = hashlib.sha1()
+    for dir_path, _, file_names in sorted(os.walk(os.path.join(current_app.root_path, current_app.template_folder))):
+        for file_name in sorted(file_names):
+            with open(os.path.join(dir_path, file_name), "rb") as template_file:
+                templates_hash.update(file_name.encode())
+                templates_hash.update(template_file.read())
+    return templates_hash.hexdigest()[:12]
+
+
+def get_page_validator(page_name, user_uuid, last_modified, data_etag):
+    """
+    Returns (last_modified, etag) of a user's HTML page from the validator of the data it shows.
+    Pages also depend on the date (rolled forward next occurrences, upcoming vs overdue) and on who is logged in,
+    so the server and UTC dates and the user are part of the ETag, and Last-Modified is never before the day began.
+    """
+    today = date.today()
+    utc_today = datetime.utcnow().date()
+
+    etag = hashlib.sha1("|".join([
+        page_name, user_uuid, data_etag, today.isoformat(), utc_today.isoformat(), get_templates_version()
+    ]).encode()).hexdigest()
+
+    day_started_on = max(get_local_midnight_utc(None, today), datetime.combine(utc_today, time.min))
+    if last_modified is None or last_modified < day_started_on:
+        last_modified = day_started_on
+
+    return last_modified, etag
+
+
+def get_not_modified_response(last_modified, etag):
+    """
+    A 304 response when the request's If-None-Match (or, without it, If-Modified-Since) still matches, else None.
+    """
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+
+    logger.info("Not modified: %s", request.path)
+    response = Response(status=304)
+    set_page_validator(response, last_modified, etag)
+    return response
+
+
+def make_page_response(body, last_modified, etag):
+    response = make_response(body)
+    set_page_validator(response, last_modified, etag)
+    return response
+
+
+def set_page_validator(response, last_modified, etag):
+    response.headers["Cache-Control"] = PAGE_CACHE_CONTROL
+    # No validator when the page was built without one (e.g. a share added in the meantime)
+    if etag:
+        response.set_etag(etag)
+        response.last_modified = last_modified
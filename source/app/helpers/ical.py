@@ -0,0 +1,108 @@
+# helpers/ical.py
+from datetime import datetime
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+
+def escape_ical_text(value):
+    """
+    Escape a TEXT value per RFC 5545 (backslash, semicolon, comma, newline).
+    """
+    if not value:
+        return ""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_ical_line(line):
+    """
+    Fold a content line to 75 octets per RFC 5545, continuation lines start with a space.
+    """
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+
+    parts = []
+    limit = 75
+    while encoded:
+        # Do not split a multi-byte UTF-8 character
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def get_ical_rrule_line(rrule_string):
+    """
+    Return the RRULE line of a stored rrule string as-is, with UNTIL reduced to a DATE
+    to match the all-day DTSTART of the event.
+    """
+    for line in rrule_string.splitlines():
+        if line.startswith("RRULE:"):
+            parts = []
+            for part in line[len("RRULE:"):].split(";"):
+                if part.startswith("UNTIL=") and len(part) > len("UNTIL=") + 8:
+                    part = part[:len("UNTIL=") + 8]
+                parts.append(part)
+            return "RRULE:" + ";".join(parts)
+    return None
+
+
+def generate_ical_feed(calendar_name, reminder_rows, site_host):
+    """
+    Generator yielding an iCalendar document line by line.
+    reminder_rows is an iterable of (Reminder, owner_username or None) tuples.
+    """
+    logger.info("generate_ical_feed() called")
+
+    yield fold_ical_line("BEGIN:VCALENDAR")
+    yield fold_ical_line("VERSION:2.0")
+    yield fold_ical_line("PRODID:-//Remindly//Reminders//EN")
+    yield fold_ical_line("CALSCALE:GREGORIAN")
+    yield fold_ical_line("X-WR-CALNAME:" + escape_ical_text(calendar_name))
+
+    dtstamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+
+    for reminder, reminder_owner_username in reminder_rows:
+        if reminder.reminder_recurrence_type == "NONE":
+            event_date = reminder.reminder_date_end
+            rrule_line = None
+        else:
+            event_date = reminder.reminder_date_start
+            rrule_line = get_ical_rrule_line(reminder.reminder_recurrence_rrule) if reminder.reminder_recurrence_rrule else None
+
+        if not event_date:
+            continue
+
+        summary = reminder.reminder_title
+        if reminder_owner_username:
+            summary = f"{summary} (shared by {reminder_owner_username})"
+
+        yield fold_ical_line("BEGIN:VEVENT")
+        yield fold_ical_line(f"UID:{reminder.reminder_uuid}@{site_host}")
+        yield fold_ical_line(f"DTSTAMP:{dtstamp}")
+        if reminder.updated_on:
+            # Naive UTC, DB sessions are pinned to UTC (see get_db_engine_options())
+            yield fold_ical_line("LAST-MODIFIED:" + reminder.updated_on.strftime("%Y%m%dT%H%M%SZ"))
+        yield fold_ical_line("DTSTART;VALUE=DATE:" + event_date.strftime("%Y%m%d"))
+        if rrule_line:
+            yield fold_ical_line(rrule_line)
+        yield fold_ical_line("SUMMARY:" + escape_ical_text(summary))
+        if reminder.reminder_desc:
+            yield fold_ical_line("DESCRIPTION:" + escape_ical_text(reminder.reminder_desc))
+        if reminder.reminder_link:
+            yield fold_ical_line("URL:" + reminder.reminder_link)
+        yield fold_ical_line("CATEGORIES:" + escape_ical_text(reminder.reminder_type))
+        yield fold_ical_line("END:VEVENT")
+
+    yield fold_ical_line("END:VCALENDAR")
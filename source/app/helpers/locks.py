@@ -0,0 +1,173 @@
+# helpers/locks.py
+from contextlib import contextmanager
+from datetime import timedelta
+import os
+import random
+import socket
+import uuid
+from sqlalchemy import insert, update, or_, text
+from .. import db
+from app.models.alert_lease import AlertLease
+from app.helpers.sharding import UserShard
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+# Lease length of lease-based named locks, renewed by the holder while it runs
+NAMED_LOCK_LEASE_SECONDS = 300
+
+# MySQL lock names are server wide, keep ours apart from other apps on the same server
+NAMED_LOCK_PREFIX = "remindly:"
+
+
+def get_lock_owner_token():
+    """
+    Unique owner token for this process, readable in alert_leases when debugging.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def get_db_now():
+    return db.session.query(db.func.current_timestamp()).scalar()
+
+
+def try_acquire_lease(lease_name, owner, lease_seconds):
+    """
+    Takes or renews a lease if it is free, expired, or already held by owner. Returns True if owner holds it now.
+    Works on any backend: a conditional UPDATE, then an insert-ignore for a lease that doesn't exist yet.
+    Times come from the DB clock, so nodes with skewed clocks still agree.
+    """
+    now = get_db_now()
+    expires_at = now + timedelta(seconds=lease_seconds)
+
+    result = db.session.execute(
+        update(AlertLease)
+        .where(
+            AlertLease.alert_lease_name == lease_name,
+            or_(AlertLease.alert_lease_expires_at <= now, AlertLease.alert_lease_owner == owner)
+        )
+        .values(alert_lease_owner=owner, alert_lease_expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+    acquired = result.rowcount == 1
+
+    if not acquired:
+        result = db.session.connection().execute(
+            insert(AlertLease.__table__)
+            .prefix_with("IGNORE", dialect="mysql")
+            .prefix_with("OR IGNORE", dialect="sqlite"),
+            {
+                "alert_lease_name": lease_name,
+                "alert_lease_owner": owner,
+                "alert_lease_expires_at": expires_at,
+                "created_on": now,
+                "updated_on": now,
+            }
+        )
+        acquired = result.rowcount == 1
+
+    db.session.commit()
+    return acquired
+
+
+def release_lease(lease_name, owner):
+    """
+    Releases a lease held by owner, no-op if someone else holds it.
+    """
+    db.session.execute(
+        update(AlertLease)
+        .where(AlertLease.alert_lease_name == lease_name, AlertLease.alert_lease_owner == owner)
+        .values(alert_lease_expires_at=get_db_now())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+class NamedLockLost(Exception):
+    """
+    Raised by NamedLock.check() once the lock has been lost, e.g. its lease lapsed while its holder was busy.
+    """
+
+
+class NamedLock:
+    """
+    Handle of a held named lock. renew() returns False once the lock has been lost.
+    """
+
+    def __init__(self, name, renew):
+        self.name = name
+        self._renew = renew
+
+    def renew(self):
+        return self._renew()
+
+    def check(self):
+        """
+        Renews the lock, raises NamedLockLost if it has been lost. Long runs call it between batches,
+        so a lease-based lock never lapses while its holder is still working.
+        """
+        if not self.renew():
+            raise NamedLockLost(f"Lost named lock {self.name}")
+
+
+@contextmanager
+def named_lock(name, lease_seconds=NAMED_LOCK_LEASE_SECONDS):
+    """
+    Cross-node mutual exclusion, yields a NamedLock if acquired or None if someone else holds it (no waiting).
+
+    MySQL uses GET_LOCK on a dedicated connection, released by RELEASE_LOCK or automatically
+    when the connection drops, so a crashed holder never blocks others.
+    Other backends (SQLite in development) use a lease row in alert_leases that lapses after
+    lease_seconds unless renewed, the holder must call renew() or check() more often than that.
+    """
+    lock_name = NAMED_LOCK_PREFIX + name
+
+    if db.engine.dialect.name == "mysql":
+        connection = db.engine.connect()
+        try:
+            acquired = connection.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": lock_name}).scalar() == 1
+            connection.commit()
+            if not acquired:
+                yield None
+                return
+
+            def renew():
+                held = connection.execute(
+                    text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": lock_name}
+                ).scalar()
+                connection.commit()
+                return bool(held)
+
+            try:
+                yield NamedLock(lock_name, renew)
+            finally:
+                connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": lock_name})
+                connection.commit()
+        finally:
+            connection.close()
+        return
+
+    owner = get_lock_owner_token()
+    if not try_acquire_lease(lock_name, owner, lease_seconds):
+        yield None
+        return
+
+    try:
+        yield NamedLock(lock_name, lambda: try_acquire_lease(lock_name, owner, lease_seconds))
+    finally:
+        release_lease(lock_name, owner)
+
+
+def claim_shard_leases(shard_count, owner, lease_seconds):
+    """
+    Generator over the shards of shard_count this owner managed to lease, trying them in a random
+    order so concurrent nodes spread out. A shard is leased until lease_seconds after it was claimed,
+    so across all nodes each shard is claimed at most once per lease period, and the shard of a
+    crashed node is picked up once its lease lapses.
+    """
+    start = random.randrange(shard_count)
+    for offset in range(shard_count):
+        shard_index = (start + offset) % shard_count
+        if try_acquire_lease(f"alert-shard:{shard_index}/{shard_count}", owner, lease_seconds):
+            yield UserShard(shard_index, shard_count)
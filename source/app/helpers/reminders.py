@@ -1,97 +1,297 @@
-from datetime import datetime, date
-from app.helpers.rrule import get_next_occurrences_date_only
+from datetime import date
+from .. import db
+from sqlalchemy.orm import aliased
+from app.models.user import User
+from app.models.reminder import Reminder
+from app.models.shared_reminder import SharedReminder
+from app.helpers.rrule import get_occurrence_dates_from
+from app.helpers.timezones import get_earliest_local_today
 from app.helpers.logging import setup_logger
-import requests
 
 
 logger = setup_logger()
 
 
-def get_reminder_next_occurrence(reminder_uuid, reminder_recurrence_type, reminder_recurrence_rrule, reminder_date_start, reminder_date_end):
+def compute_next_occurrences(reminders, today=None):
     """
-    Returns a tuple: (reminder_display_date_next_occurrence, reminder_sort_date_next_occurrence)
-    based on recurrence type, recurrence rrule, and end date.
-
-    - reminder_recurrence_type: string, e.g., "NONE", "DAILY", etc.
-    - reminder_recurrence_rrule: string rrule, e.g., "FREQ=DAILY;INTERVAL=1"
-    - reminder_date_end: date object or None
+    Returns the next occurrence on or after `today` of each Reminder in `reminders` as a list of datetime.date,
+    aligned with `reminders`. None means the reminder has no next occurrence.
+    Non-recurring reminders use their end date (due date).
+    Reminders sharing the same RRULE are only evaluated once.
     """
-    logger.info("get_reminder_next_occurrence() called")
+    logger.info("compute_next_occurrences() called")
 
-    reminder_display_date_next_occurrence = None
-    reminder_sort_date_next_occurrence = None
+    if today is None:
+        today = date.today()
 
-    if reminder_recurrence_type == "NONE":
-        logger.debug("reminder_recurrence_type is NONE (Non-Recurring)")
+    next_occurrence_by_rrule = {}
+    next_occurrences = []
 
-        # Get Reminder Due Date/ End Date
-        if reminder_date_end:
-            reminder_display_date_next_occurrence = reminder_date_end
-            reminder_sort_date_next_occurrence = reminder_date_end
-            logger.debug(
-                "reminder_display_date_next_occurrence is the end date due to non-recurring: %s",
-                reminder_display_date_next_occurrence
-            )
+    for reminder in reminders:
+        if reminder.reminder_recurrence_type == "NONE":
+            next_occurrence = reminder.reminder_date_end
+            if not next_occurrence:
+                # This is unlikely to happen since it's mandatory for non-recurring reminders to have an end date
+                logger.error("ERROR: next occurrence - unlikely scenario happened for reminder_uuid: %s", reminder.reminder_uuid)
         else:
-            # This is unlikely to happen since it's mandatory for non-recurring reminders to have an end date
-            reminder_display_date_next_occurrence = "N/A"
-            reminder_sort_date_next_occurrence = date.min
-            logger.error(
-                "ERROR: reminder_display_date_next_occurrence - unlikely scenario happened for reminder_uuid: %s | %s", 
-                reminder_uuid,
-                reminder_display_date_next_occurrence
+            rrule_string = reminder.reminder_recurrence_rrule
+            if rrule_string not in next_occurrence_by_rrule:
+                occurrence_dates = get_occurrence_dates_from(rrule_string, today, count=1)
+                next_occurrence_by_rrule[rrule_string] = occurrence_dates[0] if occurrence_dates else None
+
+            next_occurrence = next_occurrence_by_rrule[rrule_string]
+
+        next_occurrences.append(next_occurrence)
+
+    logger.debug("compute_next_occurrences evaluated %s rules for %s reminders", len(next_occurrence_by_rrule), len(reminders))
+    return next_occurrences
+
+
+def refresh_reminders_next_occurrence(reminders, today=None):
+    """
+    Recalculates and stores reminder_next_occurrence for a list of reminders in one batch.
+    Caller is responsible for committing the session.
+    """
+    logger.info("refresh_reminders_next_occurrence() called")
+
+    for reminder, next_occurrence in zip(reminders, compute_next_occurrences(reminders, today)):
+        reminder.reminder_next_occurrence = next_occurrence
+
+
+def refresh_reminder_next_occurrence(reminder):
+    """
+    Recalculates and stores reminder.reminder_next_occurrence.
+    Caller is responsible for committing the session.
+    """
+    refresh_reminders_next_occurrence([reminder])
+    logger.debug("reminder_next_occurrence: %s", reminder.reminder_next_occurrence)
+    return reminder.reminder_next_occurrence
+
+
+def roll_forward_reminder_next_occurrences(today=None, reminder_user_uuid=None, shared_with_user_uuid=None, backfill=False):
+    """
+    Recalculates the stored next occurrence of recurring reminders whose occurrence has passed.
+    today defaults to the earliest local date of any timezone, like the alert sweep and scheduler use,
+    so an occurrence that is still today for a recipient behind the server is never rolled past before its alert.
+    Optionally restricted to the reminders owned by, or shared with, a user.
+    With backfill=True every reminder is recalculated (used once after adding the column).
+    Returns the number of reminders updated.
+    """
+    logger.info("roll_forward_reminder_next_occurrences() called")
+
+    if today is None:
+        today = get_earliest_local_today()
+
+    query = Reminder.query.filter(Reminder.is_deleted == False)
+
+    if not backfill:
+        query = query.filter(
+            Reminder.reminder_recurrence_type != "NONE",
+            Reminder.reminder_next_occurrence < today
+        )
+
+    if reminder_user_uuid:
+        query = query.filter(Reminder.reminder_user_uuid == reminder_user_uuid)
+
+    if shared_with_user_uuid:
+        shared_reminder_uuids = (
+            db.session.query(SharedReminder.shared_reminder_reminder_uuid)
+            .filter(
+                SharedReminder.shared_reminder_user_uuid == shared_with_user_uuid,
+                SharedReminder.is_deleted == False
             )
-    else:
-        logger.debug("reminder_recurrence_type is NOT NONE (Recurring)")
-
-        # Get next 1 occurrence
-        next_occurrence = get_next_occurrences_date_only(reminder_date_start, reminder_recurrence_rrule, count=1)
-
-        if next_occurrence and next_occurrence[0]:
-            display_date_next_occurrence_to_date = datetime.strptime(next_occurrence[0], "%Y-%m-%d").date()
-            sort_date_next_occurrence_to_date = datetime.strptime(next_occurrence[0], "%Y-%m-%d").date()
-
-            logger.debug("display_date_next_occurrence_to_date: %s", display_date_next_occurrence_to_date)
-            logger.debug("sort_date_next_occurrence_to_date: %s", sort_date_next_occurrence_to_date)
-
-            # Check if the next occurrence is not in the past
-            if sort_date_next_occurrence_to_date < date.today():
-                # If the next occurrence is in the past, set to "N/A"
-                reminder_display_date_next_occurrence = "N/A"
-                reminder_sort_date_next_occurrence = date.min
-                logger.debug(
-                    "reminder_display_date_next_occurrence is in the past: %s",
-                    reminder_display_date_next_occurrence
-                )
-            else:
-                # If the next occurrence is now or in the future, set to the date
-                reminder_display_date_next_occurrence = display_date_next_occurrence_to_date
-                reminder_sort_date_next_occurrence = sort_date_next_occurrence_to_date
-                logger.debug(
-                    "reminder_display_date_next_occurrence is now or in the future: %s",
-                    reminder_display_date_next_occurrence
+        )
+        query = query.filter(Reminder.reminder_uuid.in_(shared_reminder_uuids))
+
+    reminders = query.all()
+    refresh_reminders_next_occurrence(reminders, today)
+
+    if reminders:
+        db.session.commit()
+
+    logger.debug("roll_forward_reminder_next_occurrences updated: %s", len(reminders))
+    return len(reminders)
+
+
+def get_user_reminders_validator(user_uuid):
+    """
+    Returns (last_modified, etag) for everything a user can see: owned reminders and who they are shared with,
+    and reminders shared with them. Only aggregate columns are queried, no ORM objects are loaded, so it is cheap enough to answer conditional GETs.
+    Deleted rows are included on purpose, a soft delete bumps updated_on.
+    """
+    logger.info("get_user_reminders_validator() called")
+
+    owned_last_modified, owned_count = (
+        db.session.query(db.func.max(Reminder.updated_on), db.func.count(Reminder.reminder_id))
+        .filter(Reminder.reminder_user_uuid == user_uuid)
+        .one()
+    )
+
+    shared_reminder_last_modified, shared_last_modified, shared_count = (
+        db.session.query(
+            db.func.max(Reminder.updated_on),
+            db.func.max(SharedReminder.updated_on),
+            db.func.count(SharedReminder.shared_reminder_id)
+        )
+        .join(Reminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
+        .filter(SharedReminder.shared_reminder_user_uuid == user_uuid)
+        .one()
+    )
+
+    # Shares of the user's own reminders, they decide the "shared" flag on /my-reminders
+    owned_shares_last_modified, owned_shares_count = (
+        db.session.query(db.func.max(SharedReminder.updated_on), db.func.count(SharedReminder.shared_reminder_id))
+        .join(Reminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
+        .filter(Reminder.reminder_user_uuid == user_uuid)
+        .one()
+    )
+
+    last_modified_candidates = [
+        d for d in (owned_last_modified, shared_reminder_last_modified, shared_last_modified, owned_shares_last_modified) if d
+    ]
+    last_modified = max(last_modified_candidates) if last_modified_candidates else None
+
+    etag = "{}-{}-{}-{}".format(
+        last_modified.strftime("%Y%m%d%H%M%S") if last_modified else "0",
+        owned_count,
+        shared_count,
+        owned_shares_count
+    )
+
+    logger.debug("user reminders validator: %s", etag)
+    return last_modified, etag
+
+
+def get_reminder_validator(reminder_uuid, user_uuid):
+    """
+    Returns (last_modified, etag) for a single reminder as a user sees it: the reminder and its shares.
+    Returns None when the reminder doesn't exist or the user may not view it,
+    the caller then takes the regular path, which answers 404 or 403.
+    """
+    logger.info("get_reminder_validator() called")
+
+    reminder_row = (
+        db.session.query(Reminder.reminder_user_uuid, Reminder.updated_on)
+        .filter(Reminder.reminder_uuid == reminder_uuid, Reminder.is_deleted == False)
+        .first()
+    )
+    if reminder_row is None:
+        return None
+    reminder_user_uuid, reminder_last_modified = reminder_row
+
+    shares_last_modified, shares_count, user_share_count = (
+        db.session.query(
+            db.func.max(SharedReminder.updated_on),
+            db.func.count(SharedReminder.shared_reminder_id),
+            db.func.count(
+                db.case(
+                    (db.and_(SharedReminder.shared_reminder_user_uuid == user_uuid, SharedReminder.is_deleted == False), 1)
                 )
-        else:
-            # In case there are no more occurrences - cases where recurrence type and end date leads to no occurrences
-            reminder_display_date_next_occurrence = "N/A"
-            reminder_sort_date_next_occurrence = date.min
-            logger.debug(
-                "reminder_display_date_next_occurrence has no more occurrences: %s",
-                reminder_display_date_next_occurrence
             )
+        )
+        .filter(SharedReminder.shared_reminder_reminder_uuid == reminder_uuid)
+        .one()
+    )
+    if reminder_user_uuid != user_uuid and not user_share_count:
+        return None
+
+    last_modified = max(d for d in (reminder_last_modified, shares_last_modified) if d)
 
-    return reminder_display_date_next_occurrence, reminder_sort_date_next_occurrence
+    etag = "{}-{}".format(last_modified.strftime("%Y%m%d%H%M%S"), shares_count)
 
+    logger.debug("reminder validator: %s", etag)
+    return last_modified, etag
 
-# Function to send alert notification
-def send_alert_notification(reminder_shared_type, user_alert_webhook_url, reminder_title, reminder_due_date):
-    payload = {
-        "text": f"Remindly Alert for {reminder_shared_type} Reminder : {reminder_title} - Due date {reminder_due_date} is approaching!"
+
+def get_reminder_list_item(reminder, **extra_fields):
+    """
+    The reminder fields the list and dashboard templates show, as a plain dict that can be cached.
+    """
+    return {
+        "reminder_uuid": reminder.reminder_uuid,
+        "reminder_title": reminder.reminder_title,
+        "reminder_type": reminder.reminder_type,
+        "reminder_recurrence_type": reminder.reminder_recurrence_type,
+        "reminder_date_end": reminder.reminder_date_end,
+        "reminder_next_occurrence": reminder.reminder_next_occurrence,
+        "reminder_is_completed": reminder.reminder_is_completed,
+        **extra_fields
     }
-    response = requests.post(user_alert_webhook_url, json=payload)
-    if response.status_code == 200:
-        print("Notification sent successfully!")
-        return True
-    else:
-        print("Error sending notification:", response.text)
-        return False
\ No newline at end of file
+
+
+def get_my_reminders_list(user_uuid):
+    """
+    Reminders owned by a user ordered by next occurrence, as list items with reminder_is_shared.
+    Shared state comes from one query over all of them instead of a lookup per reminder.
+    """
+    logger.info("get_my_reminders_list() called")
+
+    # Bring stale stored next occurrences up to date before ordering on them, as of the earliest local date
+    # so the page never rolls past an occurrence whose alert is still due in another timezone
+    roll_forward_reminder_next_occurrences(today=get_earliest_local_today(), reminder_user_uuid=user_uuid)
+
+    my_reminders = Reminder.query.filter_by(
+        reminder_user_uuid=user_uuid,
+        is_deleted=False
+    ).order_by(Reminder.reminder_next_occurrence).all()
+
+    # Same conditions as Reminder.reminder_shared_with: active shares with users that still exist
+    shared_reminder_uuids = {
+        row[0] for row in (
+            db.session.query(SharedReminder.shared_reminder_reminder_uuid)
+            .join(Reminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
+            .join(User, SharedReminder.shared_reminder_user_uuid == User.user_uuid)
+            .filter(
+                Reminder.reminder_user_uuid == user_uuid,
+                Reminder.is_deleted == False,
+                SharedReminder.is_deleted == False,
+                User.is_deleted == False
+            )
+            .distinct()
+            .all()
+        )
+    }
+
+    return [
+        get_reminder_list_item(reminder, reminder_is_shared=reminder.reminder_uuid in shared_reminder_uuids)
+        for reminder in my_reminders
+    ]
+
+
+def get_shared_reminders_list(user_uuid):
+    """
+    Reminders shared with a user ordered by next occurrence, as list items with the owner's username.
+    """
+    logger.info("get_shared_reminders_list() called")
+
+    # Bring stale stored next occurrences up to date before ordering on them, as of the earliest local date
+    # so the page never rolls past an occurrence whose alert is still due in another timezone
+    roll_forward_reminder_next_occurrences(today=get_earliest_local_today(), shared_with_user_uuid=user_uuid)
+
+    # Aliases for User table
+    user_reminder_shared_with = aliased(User)
+    user_reminder_owner = aliased(User)
+
+    my_shared_reminders = (
+        db.session.query(Reminder, user_reminder_owner.user_username)
+            # Join shared reminder
+            .join(SharedReminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
+            # Join the user the reminder is shared with
+            .join(user_reminder_shared_with, SharedReminder.shared_reminder_user_uuid == user_reminder_shared_with.user_uuid)
+            # Join the owner of the reminder
+            .join(user_reminder_owner, Reminder.reminder_user_uuid == user_reminder_owner.user_uuid)
+            .filter(
+                SharedReminder.shared_reminder_user_uuid == user_uuid,
+                SharedReminder.is_deleted == False,
+                Reminder.is_deleted == False,
+                user_reminder_shared_with.is_deleted == False,
+                user_reminder_owner.is_deleted == False
+            )
+            .order_by(Reminder.reminder_next_occurrence)
+            .all()
+    )
+
+    return [
+        get_reminder_list_item(reminder, reminder_owner_username=owner_username)
+        for reminder, owner_username in my_shared_reminders
+    ]
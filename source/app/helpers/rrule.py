@@ -1,12 +1,19 @@
 # helpers/rrule.py
 from dateutil.rrule import rrule, rrulestr, DAILY, WEEKLY, MONTHLY, YEARLY, MO, TU, WE, TH, FR, SA, SU
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from calendar import monthrange
 from itertools import islice
+import os
+from dotenv import load_dotenv
+from app.helpers.cache import LRUCache
 from app.helpers.logging import setup_logger
 
 
 logger = setup_logger()
 
+# Load environment variables
+load_dotenv()
+
 WEEKDAY_MAP = {'MO': MO, 'TU': TU, 'WE': WE, 'TH': TH, 'FR': FR, 'SA': SA, 'SU': SU}
 FREQ_MAP = {
     "DAILY": DAILY,
@@ -15,6 +22,28 @@ FREQ_MAP = {
     "YEARLY": YEARLY
 }
 
+# Consecutive periods without any occurrence after which a fast path rule is treated as exhausted
+# (400 Gregorian years of months covers every leap-day and month-length cycle)
+FAST_PATH_MAX_EMPTY_PERIODS = 4800
+
+
+rrule_cache = LRUCache(max_size=int(os.getenv("RRULE_CACHE_SIZE", "1024")))
+preview_cache = LRUCache(max_size=int(os.getenv("PREVIEW_CACHE_SIZE", "2048")))
+
+
+def get_compiled_rrule(rrule_string):
+    """
+    Return the compiled rule object for an RRULE string, from the cache when possible.
+    """
+    return rrule_cache.get_or_set(rrule_string, lambda: rrulestr(rrule_string))
+
+
+def get_rrule_cache_stats():
+    """
+    Return hit/miss/eviction counters of the compiled RRULE cache for monitoring.
+    """
+    return rrule_cache.stats()
+
 
 def build_rrule_string(recurrence_type, start_date, end_date=None, interval=1, byweekday=None, bymonthday=None):
     """
@@ -68,7 +97,7 @@ def parse_rrule(rrule_string):
     if not rrule_string:
         return {}
 
-    rule_obj = rrulestr(rrule_string)
+    rule_obj = get_compiled_rrule(rrule_string)
     parsed = {
         "INTERVAL": rule_obj._interval,
         "BYDAY": [d.__repr__()[:2] for d in rule_obj._byweekday] if rule_obj._byweekday else None,
@@ -78,10 +107,196 @@ def parse_rrule(rrule_string):
     return parsed
 
 
+def is_fast_path_rrule(rule):
+    """
+    Return True if the rule only uses FREQ (DAILY/WEEKLY/MONTHLY/YEARLY), INTERVAL, DTSTART, UNTIL
+    and BYDAY/BYMONTHDAY/BYMONTH in the shapes build_rrule_string() produces,
+    so its occurrences can be computed arithmetically.
+    """
+    if not isinstance(rule, rrule):
+        return False
+    if rule._dtstart.tzinfo is not None or rule._count is not None:
+        return False
+    if rule._bysetpos or rule._byyearday or rule._byweekno or rule._byeaster or rule._bynweekday or rule._bynmonthday:
+        return False
+    if not rule._timeset or len(rule._timeset) != 1:
+        return False
+
+    if rule._freq == DAILY:
+        return rule._byweekday is None and not rule._bymonthday and rule._bymonth is None
+    if rule._freq == WEEKLY:
+        return bool(rule._byweekday) and not rule._bymonthday and rule._bymonth is None
+    if rule._freq == MONTHLY:
+        return rule._byweekday is None and bool(rule._bymonthday) and rule._bymonth is None
+    if rule._freq == YEARLY:
+        return rule._byweekday is None and bool(rule._bymonthday) and bool(rule._bymonth)
+    return False
+
+
+def _iter_fast_path_periods(rule, first_date):
+    """
+    Yield (period_start, sorted candidate dates) for each period of the rule,
+    starting from the period that contains first_date.
+    """
+    dtstart_date = rule._dtstart.date()
+    interval = rule._interval
+
+    if rule._freq == DAILY:
+        k = max(0, -(-(first_date - dtstart_date).days // interval))
+        while True:
+            day = dtstart_date + timedelta(days=k * interval)
+            yield day, [day]
+            k += 1
+
+    elif rule._freq == WEEKLY:
+        wkst = rule._wkst
+        week_start = dtstart_date - timedelta(days=(dtstart_date.weekday() - wkst) % 7)
+        offsets = sorted((weekday - wkst) % 7 for weekday in rule._byweekday)
+        k = max(0, (first_date - week_start).days // (7 * interval))
+        while True:
+            period_start = week_start + timedelta(days=7 * interval * k)
+            yield period_start, [period_start + timedelta(days=offset) for offset in offsets]
+            k += 1
+
+    elif rule._freq == MONTHLY:
+        dtstart_month_index = dtstart_date.year * 12 + dtstart_date.month - 1
+        first_month_index = first_date.year * 12 + first_date.month - 1
+        monthdays = sorted(rule._bymonthday)
+        k = max(0, (first_month_index - dtstart_month_index) // interval)
+        while True:
+            year, month = divmod(dtstart_month_index + k * interval, 12)
+            month += 1
+            days_in_month = monthrange(year, month)[1]
+            yield date(year, month, 1), [date(year, month, day) for day in monthdays if day <= days_in_month]
+            k += 1
+
+    elif rule._freq == YEARLY:
+        months = sorted(rule._bymonth)
+        monthdays = sorted(rule._bymonthday)
+        k = max(0, (first_date.year - dtstart_date.year) // interval)
+        while True:
+            year = dtstart_date.year + k * interval
+            dates = []
+            for month in months:
+                days_in_month = monthrange(year, month)[1]
+                dates.extend(date(year, month, day) for day in monthdays if day <= days_in_month)
+            yield date(year, 1, 1), dates
+            k += 1
+
+
+def get_fast_path_occurrences_after(rule, after, count=None, before=None):
+    """
+    Closed-form equivalent of list(rule.xafter(after, count=count)) for rules accepted by is_fast_path_rrule().
+    If `before` is given, occurrences stop there (inclusive), so `count` can be None.
+    """
+    occurrences = []
+    dtstart_date = rule._dtstart.date()
+    occurrence_time = rule._timeset[0]
+    until = rule._until
+    if before and (until is None or before < until):
+        until = before
+    empty_periods = 0
+
+    try:
+        for period_start, dates in _iter_fast_path_periods(rule, max(dtstart_date, after.date())):
+            if until and datetime.combine(period_start, occurrence_time) > until:
+                break
+
+            found = False
+            for day in dates:
+                if day < dtstart_date:
+                    continue
+                occurrence = datetime.combine(day, occurrence_time)
+                if occurrence <= after:
+                    continue
+                if until and occurrence > until:
+                    return occurrences
+                occurrences.append(occurrence)
+                found = True
+                if count and len(occurrences) >= count:
+                    return occurrences
+
+            empty_periods = 0 if found else empty_periods + 1
+            if empty_periods > FAST_PATH_MAX_EMPTY_PERIODS:
+                break
+    except (ValueError, OverflowError):
+        # Went past year 9999, same limit as dateutil
+        pass
+
+    return occurrences
+
+
+def get_occurrences_after(rule, after, count):
+    """
+    Return up to `count` occurrences of a compiled rule strictly after `after`.
+    Uses closed-form arithmetic when possible and falls back to dateutil otherwise (e.g. CUSTOM rules).
+    """
+    if is_fast_path_rrule(rule):
+        return get_fast_path_occurrences_after(rule, after, count)
+    return list(islice(rule.xafter(after, count=count), count))
+
+
+def get_occurrence_dates_between(rrule_string, date_from, date_to):
+    """
+    Return every occurrence date (datetime.date) of the given rrule string within [date_from, date_to], inclusive.
+    """
+    logger.info("get_occurrence_dates_between() called")
+
+    logger.debug("rrule_string: %s", rrule_string)
+    logger.debug("date_from: %s", date_from)
+    logger.debug("date_to: %s", date_to)
+
+    if not rrule_string:
+        return []
+
+    rule = get_compiled_rrule(rrule_string)
+    after = datetime.combine(date_from, datetime.min.time())
+    before = datetime.combine(date_to, datetime.max.time())
+
+    if is_fast_path_rrule(rule):
+        # Fast path is exclusive of `after`, occurrences have whole-second precision
+        occurrences = get_fast_path_occurrences_after(rule, after - timedelta(microseconds=1), before=before)
+    else:
+        occurrences = rule.between(after, before, inc=True)
+
+    return [dt.date() for dt in occurrences]
+
+
+def get_next_occurrence_dates(rrule_string, count=5, after=None):
+    """
+    Return the next `count` occurrence dates (datetime.date) of the given rrule string, strictly after `after` (default now).
+    If an UNTIL date is defined in the rrule, occurrences will not go beyond it.
+    """
+    logger.info("get_next_occurrence_dates() called")
+
+    logger.debug("rrule_string: %s", rrule_string)
+    logger.debug("count: %s", count)
+
+    if not rrule_string:
+        return []
+
+    if after is None:
+        after = datetime.now()
+
+    rule = get_compiled_rrule(rrule_string)
+    return [dt.date() for dt in get_occurrences_after(rule, after, count)]
+
+
+def get_occurrence_dates_from(rrule_string, from_date, count=1):
+    """
+    Return the next `count` occurrence dates (datetime.date) on or after the date `from_date`.
+    The bound is the start of that day, not the current time on it, so the result doesn't depend on the time of day
+    and an occurrence on `from_date` itself is kept, also when `from_date` isn't the server's date (e.g. the earliest local date).
+    """
+    after = datetime.combine(from_date, datetime.min.time()) - timedelta(microseconds=1)
+    return get_next_occurrence_dates(rrule_string, count=count, after=after)
+
+
 def get_next_occurrences(reminder_date_start, rrule_string, count=5):
     """
     Return the next `count` occurrences of the given rrule string.
     If an UNTIL date is defined in the rrule, occurrences will not go beyond it.
+    Returns datetimes in YYYY-MM-DD HH:MM format.
     """
     logger.info("get_next_occurrences() called")
 
@@ -89,39 +304,42 @@ def get_next_occurrences(reminder_date_start, rrule_string, count=5):
     logger.debug("rrule_string: %s", rrule_string)
     logger.debug("count: %s", count)
 
-    # Ensure reminder_date_start is a date object
-    if isinstance(reminder_date_start, str):
-        reminder_date_start = datetime.strptime(reminder_date_start, "%Y-%m-%d").date()
-
     if not rrule_string:
         return []
 
-    rule = rrulestr(rrule_string)
-    now = datetime.now()
-    date_now = now.date()
-
-    # Pull occurrences after "now"
-    occurrences = list(islice(rule.xafter(now, count=count), count))
-
-    # If UNTIL is defined, filter out dates beyond it
-    until = getattr(rule, "_until", None)
-    if until:
-        occurrences = [dt for dt in occurrences if dt <= until]
-
-    # If reminder_date_start is in the future, that becomes the first occurrence instead
-    # And remove the last occurrence
-    #if reminder_date_start > date_now:
-    #    logger.debug("reminder_date_start is in the future, using it as first occurrence")
-    #    occurrences = [reminder_date_start] + occurrences
-    #    # Remove last occurrence
-    #    occurrences = occurrences[:-1]
+    rule = get_compiled_rrule(rrule_string)
+
+    # Pull occurrences after "now", UNTIL is already applied
+    occurrences = get_occurrences_after(rule, datetime.now(), count)
         
     return [dt.strftime("%Y-%m-%d %H:%M") for dt in occurrences]
 
 
+def get_preview_next_occurrences(recurrence_type, start_date, end_date=None, interval=1, byweekday=None, bymonthday=None, count=5, today=None):
+    """
+    Build the RRULE from recurrence inputs and return the next `count` occurrences in YYYY-MM-DD format.
+    Memoized per (recurrence_type, start, end, interval, byweekday, bymonthday, today) in a bounded cache.
+    """
+    logger.info("get_preview_next_occurrences() called")
+
+    if today is None:
+        today = date.today()
+
+    cache_key = (recurrence_type, start_date, end_date, interval, tuple(byweekday or ()), bymonthday, count, today)
+
+    def build_preview():
+        rrule_str = build_rrule_string(recurrence_type, start_date, end_date, interval=interval, byweekday=byweekday, bymonthday=bymonthday)
+        logger.debug(f"RRULE: {rrule_str}")
+        if not rrule_str:
+            return []
+        return get_next_occurrences_date_only(start_date, rrule_str, count=count)
+
+    return preview_cache.get_or_set(cache_key, build_preview)
+
+
 def get_next_occurrences_date_only(reminder_date_start, rrule_string, count=5):
     """
-    Wrapper over get_next_occurrences to strip out time.
+    JSON/template boundary wrapper over get_next_occurrence_dates.
     Returns only date in YYYY-MM-DD format.
     """
     logger.info("get_next_occurrences_date_only() called")
@@ -130,5 +348,14 @@ def get_next_occurrences_date_only(reminder_date_start, rrule_string, count=5):
     logger.debug("rrule_string: %s", rrule_string)
     logger.debug("count: %s", count)
 
-    occurrences = get_next_occurrences(reminder_date_start, rrule_string, count)
-    return [dt.split(" ")[0] for dt in occurrences]
\ No newline at end of file
+    return [format_occurrence_date(d) for d in get_next_occurrence_dates(rrule_string, count)]
+
+
+def format_occurrence_date(value):
+    """
+    Format an occurrence date for display, None (no occurrence) is shown as N/A.
+    Registered as the `next_occurrence` Jinja filter.
+    """
+    if value is None:
+        return "N/A"
+    return value.strftime("%Y-%m-%d")
@@ -0,0 +1,33 @@
+# helpers/sharding.py
+from collections import namedtuple
+import zlib
+
+
+# One slice of the user population, index is 0-based
+UserShard = namedtuple("UserShard", ["index", "count"])
+
+
+def parse_user_shard(value):
+    """
+    Parses "i/N" into a UserShard, raises ValueError for anything else.
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid shard {value!r}, expected i/N")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard {value!r}, expected 0 <= i < N")
+    return UserShard(index, count)
+
+
+def get_user_shard_hash(user_uuid):
+    """
+    Stable 32-bit hash of a user UUID, the same in every process and on every host.
+    """
+    return zlib.crc32(user_uuid.encode("utf-8"))
+
+
+def is_user_in_shard(user_uuid, user_shard):
+    if user_shard is None:
+        return True
+    return get_user_shard_hash(user_uuid) % user_shard.count == user_shard.index
@@ -1,275 +1,232 @@
-from datetime import date, datetime
-from flask import session
+from datetime import date, datetime, time
+import heapq
 from .. import db
 from sqlalchemy.orm import aliased
 #from sqlalchemy.dialects import mysql # For debugging only
 from app.models.reminder import Reminder
 from app.models.shared_reminder import SharedReminder
 from app.models.user import User
-from app.helpers.reminders import get_reminder_next_occurrence
+from app.helpers.reminders import compute_next_occurrences, get_reminder_list_item, refresh_reminders_next_occurrence
+from app.helpers.timezones import get_earliest_local_today
 from app.helpers.logging import setup_logger
 
 
 logger = setup_logger()
 
-
-def get_my_total_reminders_count():
-    logger.info("my_total_reminders_count() called")
-    session_user_uuid = session.get("user_uuid")
-    count = Reminder.query.filter_by(reminder_user_uuid=session_user_uuid, is_deleted=False).count()
-    logger.debug("my_total_reminders_count: %s", count)
-    return count
-
-
-def get_my_total_shared_reminders_count():
-    logger.info("my_total_shared_reminders_count() called")
-    session_user_uuid = session.get("user_uuid")
-    
-    # Join the share_reminders table with reminders table to get reminders that are shared with the logged-in user
-    count = ( db.session.query(SharedReminder, User, Reminder)
-                .join(Reminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
-                .join(User, SharedReminder.shared_reminder_user_uuid == User.user_uuid)
-                .filter(
-                    SharedReminder.shared_reminder_user_uuid == session_user_uuid,
-                    SharedReminder.is_deleted == False,
-                    Reminder.is_deleted == False,
-                    User.is_deleted == False
-                )
-                .count()
-            )
-
-    logger.debug("my_total_shared_reminders_count: %s", count)
-    return count
-
-
-def get_upcoming_my_non_recurring_reminders_list():
-    logger.info("get_upcoming_my_non_recurring_reminders_list() called")
-    session_user_uuid = session.get("user_uuid")
-
-    upcoming_my_non_recurring_reminders_list = ( db.session.query(Reminder)
-        .filter(
-            Reminder.reminder_user_uuid == session_user_uuid,
-            Reminder.reminder_recurrence_type == "NONE",
-            Reminder.reminder_is_completed == False,
-            Reminder.is_deleted == False,
-            Reminder.reminder_date_end >= datetime.utcnow()
-        )
-        .order_by(Reminder.reminder_date_end)
-        .limit(5)
-        .all()
-    )
-
-    logger.debug("upcoming_my_non_recurring_reminders_list: %s", upcoming_my_non_recurring_reminders_list)
-    return upcoming_my_non_recurring_reminders_list
-
-
-def get_upcoming_my_recurring_reminders_list():
-    logger.info("get_upcoming_my_recurring_reminders_list() called")
-    session_user_uuid = session.get("user_uuid")
-
-    # Note: If recurring, no filtering on end date as end date is not mandatory
-
-    upcoming_my_recurring_reminders_query = (
-        Reminder.query
-        .filter(
-            Reminder.reminder_user_uuid == session_user_uuid,
-            Reminder.reminder_recurrence_type != "NONE",
-            Reminder.reminder_is_completed == False,
-            Reminder.is_deleted == False,
-        )
-        .order_by(Reminder.reminder_date_start)
-    )
-    #TODO: Consider storing the next one occurrence in the database else this query needs to pull all reminders from the database for that user each time.
-
-    upcoming_my_recurring_reminders_list = upcoming_my_recurring_reminders_query.all()
-
-    # Get next 1 occurence for each reminder
-    for reminder in upcoming_my_recurring_reminders_list:
-        # Dynamically add 'Reminder Next Occurrence' property - next 1 occurrence
-        # Property to only use for display
-        reminder.reminder_display_date_next_occurrence = None
-
-        # Property to only use for sorting
-        reminder.reminder_sort_date_next_occurrence = None
-
-        # Calculate next occurrence
-        reminder_display_date_next_occurrence, reminder_sort_date_next_occurrence = get_reminder_next_occurrence(
-            reminder.reminder_uuid,
-            reminder.reminder_recurrence_type,
-            reminder.reminder_recurrence_rrule,
-            reminder.reminder_date_start,
-            reminder.reminder_date_end
-        )
-
-        logger.debug("reminder_display_date_next_occurrence: %s", reminder_display_date_next_occurrence)
-        logger.debug("reminder_sort_date_next_occurrence: %s", reminder_sort_date_next_occurrence)
-
-        reminder.reminder_display_date_next_occurrence = reminder_display_date_next_occurrence
-        reminder.reminder_sort_date_next_occurrence = reminder_sort_date_next_occurrence
-
-
-    # Order reminders by next occurrence date and limit 5
-    upcoming_my_recurring_reminders_list.sort(key=lambda x: x.reminder_sort_date_next_occurrence)
-    upcoming_my_recurring_reminders_list = upcoming_my_recurring_reminders_list[:5]
-
-    logger.debug("upcoming_my_recurring_reminders_list: %s", upcoming_my_recurring_reminders_list)
-    return upcoming_my_recurring_reminders_list
-
-
-def get_upcoming_shared_non_recurring_reminders_list():
-    logger.info("get_upcoming_shared_non_recurring_reminders_list() called")
-    session_user_uuid = session.get("user_uuid")
-
-     # Aliases for User table
-    user_reminder_shared_with = aliased(User)
-    user_reminder_owner = aliased(User)
-
-    upcoming_shared_non_recurring_reminders_list = (
-        db.session.query(Reminder, SharedReminder, user_reminder_shared_with, user_reminder_owner)
-        # Join shared reminder
-        .join(SharedReminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
-        # Join the user the reminder is shared with
-        .join(user_reminder_shared_with, SharedReminder.shared_reminder_user_uuid == user_reminder_shared_with.user_uuid)
-        # Join the owner of the reminder
-        .join(user_reminder_owner, Reminder.reminder_user_uuid == user_reminder_owner.user_uuid)
-        .filter(
-            SharedReminder.shared_reminder_user_uuid == session_user_uuid,
-            SharedReminder.is_deleted == False,
-            Reminder.is_deleted == False,
-            user_reminder_shared_with.is_deleted == False,
-            user_reminder_owner.is_deleted == False,
-            Reminder.reminder_recurrence_type == "NONE",
-            Reminder.reminder_is_completed == False,
-            Reminder.reminder_date_end >= datetime.utcnow(),
-        )
-        .order_by(Reminder.reminder_date_end)
-        .limit(5)
-        .all()
+# Reminders shown per dashboard panel
+DASHBOARD_PANEL_SIZE = 5
+# Rows pulled from the DB at a time while building the dashboard
+DASHBOARD_ROWS_PER_FETCH = 500
+
+# Dashboard panel fragments, fetched separately by the dashboard page: (owner, state) of their reminder lists
+DASHBOARD_PANELS = {
+    "counts": None,
+    "upcoming_mine": ("my", "upcoming"),
+    "upcoming_shared": ("shared", "upcoming"),
+    "overdue_mine": ("my", "overdue"),
+    "overdue_shared": ("shared", "overdue"),
+}
+
+
+class TopKSelection:
+    """
+    Keeps the k items with the smallest date keys pushed so far, in O(k) memory.
+    Ties go to the item pushed first, so the result is what a stable sort of everything pushed, sliced to k, gives.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        # Min-heap of (-date ordinal, -push order, item): the root is the current k-th best item
+        self._heap = []
+        self._pushed = 0
+
+    def get_threshold(self):
+        """
+        Date key of the current k-th best item, None while fewer than k items are kept.
+        """
+        if len(self._heap) < self.k:
+            return None
+        return date.fromordinal(-self._heap[0][0])
+
+    def push(self, key, item):
+        self._pushed += 1
+        entry = (-key.toordinal(), -self._pushed, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def get_sorted_items(self):
+        return [entry[2] for entry in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+def get_dashboard_queries(user_uuid):
+    """
+    The two dashboard queries, not executed yet: every reminder the user owns, and every reminder shared with them
+    as (reminder, shared_reminder, user_reminder_shared_with, user_reminder_owner) rows.
+    Completed reminders are included, they count towards the totals.
+    """
+    owned_query = Reminder.query.filter(
+        Reminder.reminder_user_uuid == user_uuid,
+        Reminder.is_deleted == False
     )
 
-    logger.debug("upcoming_shared_non_recurring_reminders_list: %s", upcoming_shared_non_recurring_reminders_list)
-    return upcoming_shared_non_recurring_reminders_list
-
-
-def get_upcoming_shared_recurring_reminders_list():
-    logger.info("get_upcoming_shared_recurring_reminders_list() called")
-    session_user_uuid = session.get("user_uuid")
-
-     # Aliases for User table
+    # Aliases for User table
     user_reminder_shared_with = aliased(User)
     user_reminder_owner = aliased(User)
 
-    # Note: If recurring, no filtering on end date as end date is not mandatory
-
-    upcoming_shared_recurring_reminders_list = (
+    shared_query = (
         db.session.query(Reminder, SharedReminder, user_reminder_shared_with, user_reminder_owner)
         # Join shared reminder
         .join(SharedReminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
         # Join the user the reminder is shared with
         .join(user_reminder_shared_with, SharedReminder.shared_reminder_user_uuid == user_reminder_shared_with.user_uuid)
-        # Join the owner of the reminder
-        .join(user_reminder_owner, Reminder.reminder_user_uuid == user_reminder_owner.user_uuid)
+        # Join the owner of the reminder, outer so the total still counts shares whose owner is gone
+        .outerjoin(user_reminder_owner, Reminder.reminder_user_uuid == user_reminder_owner.user_uuid)
         .filter(
-            SharedReminder.shared_reminder_user_uuid == session_user_uuid,
+            SharedReminder.shared_reminder_user_uuid == user_uuid,
             SharedReminder.is_deleted == False,
             Reminder.is_deleted == False,
-            user_reminder_shared_with.is_deleted == False,
-            user_reminder_owner.is_deleted == False,
-            Reminder.reminder_recurrence_type != "NONE",
-            Reminder.reminder_is_completed == False
+            user_reminder_shared_with.is_deleted == False
         )
-        .order_by(Reminder.reminder_date_start)
-        .all()
     )
 
-    #TODO: Consider storing the next one occurrence in the database
-
-    # Get next 1 occurence for each reminder
-    for reminder, shared_reminder, user_reminder_shared_with, user_reminder_owner in upcoming_shared_recurring_reminders_list:
-        # Dynamically add 'Reminder Next Occurrence' property - next 1 occurrence
-        # Property to only use for display
-        reminder.reminder_display_date_next_occurrence = None
-
-        # Property to only use for sorting
-        reminder.reminder_sort_date_next_occurrence = None
-
-        # Calculate next occurrence
-        reminder_display_date_next_occurrence, reminder_sort_date_next_occurrence = get_reminder_next_occurrence(
-            reminder.reminder_uuid,
-            reminder.reminder_recurrence_type,
-            reminder.reminder_recurrence_rrule,
-            reminder.reminder_date_start,
-            reminder.reminder_date_end
-        )
-
-        logger.debug("reminder_display_date_next_occurrence: %s", reminder_display_date_next_occurrence)
-        logger.debug("reminder_sort_date_next_occurrence: %s", reminder_sort_date_next_occurrence)
+    return owned_query, shared_query
 
-        reminder.reminder_display_date_next_occurrence = reminder_display_date_next_occurrence
-        reminder.reminder_sort_date_next_occurrence = reminder_sort_date_next_occurrence
 
-
-    # Order reminders by next occurrence date
-    upcoming_shared_recurring_reminders_list.sort(key=lambda x: x[0].reminder_sort_date_next_occurrence)
-
-    # Limit to 5 records
-    upcoming_shared_recurring_reminders_list = upcoming_shared_recurring_reminders_list[:5]
-
-    logger.debug("upcoming_shared_recurring_reminders_list: %s", upcoming_shared_recurring_reminders_list)
-    return upcoming_shared_recurring_reminders_list
-
-
-def get_overdue_my_non_recurring_reminders_list():
-    logger.info("get_overdue_my_non_recurring_reminders_list() called")
-    session_user_uuid = session.get("user_uuid")
-
-    overdue_my_non_recurring_reminders_list = ( db.session.query(Reminder)
-        .filter(
-            Reminder.reminder_user_uuid == session_user_uuid,
-            Reminder.reminder_recurrence_type == "NONE",
-            Reminder.reminder_is_completed == False,
-            Reminder.is_deleted == False,
-            Reminder.reminder_date_end < datetime.utcnow(),
-        )
-        .order_by(Reminder.reminder_date_end)
-        .limit(5)
-        .all()
+def is_next_occurrence_stale(reminder, today):
+    return (
+        reminder.reminder_recurrence_type != "NONE"
+        and reminder.reminder_next_occurrence is not None
+        and reminder.reminder_next_occurrence < today
     )
 
-    logger.debug("overdue_my_non_recurring_reminders_list: %s", overdue_my_non_recurring_reminders_list)
-    return overdue_my_non_recurring_reminders_list
-
-
-def get_overdue_shared_non_recurring_reminders_list():
-    logger.info("get_overdue_shared_non_recurring_reminders_list() called")
-    session_user_uuid = session.get("user_uuid")
-
-    # Aliases for User table
-    user_reminder_shared_with = aliased(User)
-    user_reminder_owner = aliased(User)
-
-    overdue_shared_non_recurring_reminders_list = (
-        db.session.query(Reminder, SharedReminder, user_reminder_shared_with, user_reminder_owner)
-        # Join shared reminder
-        .join(SharedReminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
-        # Join the user the reminder is shared with
-        .join(user_reminder_shared_with, SharedReminder.shared_reminder_user_uuid == user_reminder_shared_with.user_uuid)
-        # Join the owner of the reminder
-        .join(user_reminder_owner, Reminder.reminder_user_uuid == user_reminder_owner.user_uuid)
-        .filter(
-            SharedReminder.shared_reminder_user_uuid == session_user_uuid,
-            SharedReminder.is_deleted == False,
-            Reminder.is_deleted == False,
-            user_reminder_shared_with.is_deleted == False,
-            user_reminder_owner.is_deleted == False,
-            Reminder.reminder_recurrence_type == "NONE",
-            Reminder.reminder_is_completed == False,
-            Reminder.reminder_date_end < datetime.utcnow(),
-        )
-        .order_by(Reminder.reminder_date_end)
-        .limit(5)
-        .all()
-    )
 
-    logger.debug("overdue_shared_non_recurring_reminders_list: %s", overdue_shared_non_recurring_reminders_list)
-    return overdue_shared_non_recurring_reminders_list
\ No newline at end of file
+def get_dashboard_panel_key(reminder, now):
+    """
+    (upcoming|overdue, recurring|non_recurring) panel a reminder belongs in.
+    Recurring reminders are always upcoming, the end date is not mandatory for them.
+    """
+    if reminder.reminder_recurrence_type != "NONE":
+        return "upcoming", "recurring"
+    # Same comparison the per-panel queries made, DATE end date against the current UTC DATETIME
+    if datetime.combine(reminder.reminder_date_end, time.min) >= now:
+        return "upcoming", "non_recurring"
+    return "overdue", "non_recurring"
+
+
+def get_dashboard_sort_key(reminder_recurrence_type, reminder_date_end, reminder_next_occurrence):
+    # Non-recurring by end date, recurring by next occurrence with ended rules (no next occurrence) last
+    if reminder_recurrence_type == "NONE":
+        return reminder_date_end
+    return reminder_next_occurrence or date.max
+
+
+def select_dashboard_reminder(panel, reminder, today, owner_username=None):
+    """
+    Offers a reminder to its panel's top-k selection as (reminder, owner_username, is_stale, next_occurrence).
+    A stale stored next occurrence is recomputed first, unless no occurrence of the rule can come before the panel's
+    current k-th best date (its DTSTART, or today, is already past it), then the rule isn't expanded at all.
+    """
+    next_occurrence = reminder.reminder_next_occurrence
+    is_stale = is_next_occurrence_stale(reminder, today)
+
+    if is_stale:
+        threshold = panel.get_threshold()
+        earliest_next_occurrence = max(today, reminder.reminder_date_start or today)
+        # Ties go to the reminders already kept, so a rule starting on the threshold can't make it either
+        if threshold is not None and earliest_next_occurrence >= threshold:
+            return
+        next_occurrence = compute_next_occurrences([reminder], today)[0]
+
+    sort_key = get_dashboard_sort_key(reminder.reminder_recurrence_type, reminder.reminder_date_end, next_occurrence)
+    panel.push(sort_key, (reminder, owner_username, is_stale, next_occurrence))
+
+
+def get_dashboard_counts(user_uuid):
+    """
+    Both dashboard totals, counted in SQL over the same rows the panels stream (completed reminders included).
+    """
+    owned_query, shared_query = get_dashboard_queries(user_uuid)
+
+    return {
+        "my_total_reminders_count": owned_query.with_entities(db.func.count(Reminder.reminder_id)).scalar(),
+        "my_total_shared_reminders_count": shared_query.with_entities(db.func.count(SharedReminder.shared_reminder_id)).scalar(),
+    }
+
+
+def get_dashboard_lists(user_uuid, owner, state):
+    """
+    The (recurring and non-recurring) panels of one state (upcoming|overdue) for owned ("my") or shared reminders.
+    Rows are streamed in chunks into a top-k selection per panel, so memory stays O(panel size) however many
+    reminders a user has. Returns a dict keyed by the dashboard template's variable names,
+    with panels as plain list items (see get_reminder_list_item()) so it can be cached.
+    """
+    logger.info("get_dashboard_lists() called")
+
+    now = datetime.utcnow()
+    today = date.today()
+
+    owned_query, shared_query = get_dashboard_queries(user_uuid)
+    query = owned_query if owner == "my" else shared_query
+    query = query.filter(Reminder.reminder_is_completed == False)
+    if state == "overdue":
+        # Recurring reminders are never overdue
+        query = query.filter(Reminder.reminder_recurrence_type == "NONE")
+
+    panels = {
+        (panel_state, recurrence): TopKSelection(DASHBOARD_PANEL_SIZE)
+        for panel_state, recurrence in (("upcoming", "non_recurring"), ("upcoming", "recurring"), ("overdue", "non_recurring"))
+        if panel_state == state
+    }
+
+    for row in query.yield_per(DASHBOARD_ROWS_PER_FETCH):
+        if owner == "my":
+            reminder, owner_username = row, None
+        else:
+            reminder, _, _, user_reminder_owner = row
+            if user_reminder_owner is None or user_reminder_owner.is_deleted:
+                continue
+            owner_username = user_reminder_owner.user_username
+        panel = panels.get(get_dashboard_panel_key(reminder, now))
+        if panel is not None:
+            select_dashboard_reminder(panel, reminder, today, owner_username)
+
+    dashboard_lists = {}
+    earliest_today = get_earliest_local_today()
+    roll_forward_reminders = []
+    for (panel_state, recurrence), panel in panels.items():
+        panel_list = []
+        for reminder, owner_username, is_stale, next_occurrence in panel.get_sorted_items():
+            extra_fields = {} if owner == "my" else {"reminder_owner_username": owner_username}
+            if is_stale:
+                extra_fields["reminder_next_occurrence"] = next_occurrence
+                if reminder.reminder_next_occurrence < earliest_today:
+                    roll_forward_reminders.append(reminder)
+            panel_list.append(get_reminder_list_item(reminder, **extra_fields))
+        dashboard_lists[f"{panel_state}_{owner}_{recurrence}_reminders_list"] = panel_list
+
+    # Store the next occurrence of the stale reminders shown, the rest is left to the daily roll forward.
+    # As of the earliest local date like every stored roll forward, not the server date the panels show,
+    # so no recipient behind the server loses an occurrence before its alert.
+    # After the list items are built, the commit expires the loaded rows
+    if roll_forward_reminders:
+        refresh_reminders_next_occurrence(roll_forward_reminders, earliest_today)
+        db.session.commit()
+        logger.debug("get_dashboard_lists rolled forward: %s", len(roll_forward_reminders))
+
+    logger.debug("dashboard_lists: %s", dashboard_lists)
+    return dashboard_lists
+
+
+def get_dashboard_panel(user_uuid, panel_name):
+    """
+    Template variables of one dashboard panel fragment (see DASHBOARD_PANELS), each built on its own
+    so the dashboard can fetch them in parallel. Returns None for an unknown panel.
+    """
+    if panel_name not in DASHBOARD_PANELS:
+        return None
+    if panel_name == "counts":
+        return get_dashboard_counts(user_uuid)
+    owner, state = DASHBOARD_PANELS[panel_name]
+    return get_dashboard_lists(user_uuid, owner, state)
@@ -0,0 +1,66 @@
+# helpers/timezones.py
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+# Furthest any timezone is behind UTC (UTC-12), no local date anywhere is earlier than UTC now minus this
+EARLIEST_UTC_OFFSET = timedelta(hours=-12)
+
+
+@lru_cache(maxsize=None)
+def get_timezone(timezone_name):
+    """
+    ZoneInfo for an IANA timezone name, or None for the server's timezone (no name, or an unknown one).
+    """
+    if not timezone_name:
+        return None
+    try:
+        return ZoneInfo(timezone_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown timezone {timezone_name!r}, using the server timezone")
+        return None
+
+
+def is_valid_timezone(timezone_name):
+    return timezone_name in get_timezone_choices()
+
+
+@lru_cache(maxsize=1)
+def get_timezone_choices():
+    """
+    Sorted IANA timezone names, for the settings form.
+    """
+    return sorted(available_timezones())
+
+
+def get_local_today(timezone_name, now=None):
+    """
+    Local date in a timezone (None for the server's) at now, a naive UTC datetime.
+    """
+    if now is None:
+        now = datetime.utcnow()
+    return now.replace(tzinfo=timezone.utc).astimezone(get_timezone(timezone_name)).date()
+
+
+def get_earliest_local_today(now=None):
+    """
+    Earliest local date of any timezone at now (naive UTC).
+    """
+    if now is None:
+        now = datetime.utcnow()
+    return (now + EARLIEST_UTC_OFFSET).date()
+
+
+def get_local_midnight_utc(timezone_name, local_date):
+    """
+    Naive UTC datetime at which local_date begins in a timezone (None for the server's).
+    """
+    local_midnight = datetime.combine(local_date, time.min)
+    zone = get_timezone(timezone_name)
+    if zone is not None:
+        local_midnight = local_midnight.replace(tzinfo=zone)
+    return local_midnight.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,303 @@
+# helpers/view_cache.py
+from datetime import date, datetime, timedelta
+import json
+import os
+import time
+from dotenv import load_dotenv
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from .. import db
+from app.models.shared_reminder import SharedReminder
+from app.models.view_cache_entry import ViewCacheEntry
+from app.helpers.cache import LRUCache
+from app.helpers.stats import DASHBOARD_PANELS
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+# Load environment variables
+load_dotenv()
+
+# database: view_cache_entries table shared by every worker and node, none: off,
+# memory: per process LRU, only used when a single worker process serves the app (see create_view_cache_backend())
+VIEW_CACHE_BACKEND = os.getenv("VIEW_CACHE_BACKEND", "database").lower()
+# Worker processes serving the app, config/gunicorn/gunicorn_config.py passes its workers setting on to them
+WEB_CONCURRENCY = os.getenv("WEB_CONCURRENCY")
+VIEW_CACHE_SIZE = int(os.getenv("VIEW_CACHE_SIZE", "2048"))
+# Upper bound on how stale a view can get from writes outside the invalidated paths
+VIEW_CACHE_TTL_SECONDS = int(os.getenv("VIEW_CACHE_TTL_SECONDS", "600"))
+
+# Every cached per-user view, invalidation drops all of them
+VIEW_NAMES = ("my_reminders", "shared_reminders", *(f"dashboard_{panel_name}" for panel_name in DASHBOARD_PANELS))
+
+
+class MemoryViewCacheBackend:
+    """
+    Cached views in an LRUCache of this worker process, with a TTL on each entry.
+    Invalidation only reaches this process, so it is only used when a single worker process serves the app.
+    """
+
+    def __init__(self, max_size, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self._cache = LRUCache(max_size=max_size)
+
+    def get(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._cache.delete(key)
+            return None
+        return value
+
+    def set(self, key, user_uuid, value):
+        self._cache.set(key, (time.monotonic() + self.ttl_seconds, value))
+
+    def delete(self, keys, user_uuids):
+        for key in keys:
+            self._cache.delete(key)
+
+    def purge_expired(self):
+        # Expired entries are dropped on read or pushed out by the LRU
+        return 0
+
+    def stats(self):
+        return {"backend": "memory", "ttl_seconds": self.ttl_seconds, **self._cache.stats()}
+
+    def clear(self):
+        self._cache.clear()
+
+
+class DatabaseViewCacheBackend:
+    """
+    Cached views as JSON rows in view_cache_entries, shared by every worker process and node.
+    Runs on its own connection and transaction, so it never commits or rolls back the request's session.
+    A DB error (e.g. migration 012 not run yet) is logged and the view is built uncached, it never fails the request,
+    nor a write or roll forward that has already committed before its views are invalidated or purged.
+    """
+
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            with db.engine.begin() as connection:
+                value = connection.execute(
+                    select(ViewCacheEntry.view_cache_value)
+                    .where(
+                        ViewCacheEntry.view_cache_key == key,
+                        ViewCacheEntry.view_cache_expires_at > datetime.utcnow()
+                    )
+                ).scalar()
+        except SQLAlchemyError:
+            logger.exception("View cache read failed")
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value, object_hook=decode_view_value)
+
+    def set(self, key, user_uuid, value):
+        now = datetime.utcnow()
+        row = {
+            "view_cache_user_uuid": user_uuid,
+            "view_cache_value": json.dumps(value, default=encode_view_value),
+            "view_cache_expires_at": now + timedelta(seconds=self.ttl_seconds),
+            "updated_on": now,
+        }
+        try:
+            with db.engine.begin() as connection:
+                result = connection.execute(
+                    update(ViewCacheEntry.__table__)
+                    .where(ViewCacheEntry.view_cache_key == key)
+                    .values(**row)
+                )
+                if result.rowcount == 0:
+                    # Insert-ignore, another worker may have cached the same view in the meantime
+                    connection.execute(
+                        insert(ViewCacheEntry.__table__)
+                        .prefix_with("IGNORE", dialect="mysql")
+                        .prefix_with("OR IGNORE", dialect="sqlite"),
+                        {"view_cache_key": key, "created_on": now, **row}
+                    )
+        except SQLAlchemyError:
+            logger.exception("View cache write failed")
+
+    def delete(self, keys, user_uuids):
+        # By user rather than by key, so entries of earlier days go too
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(
+                    delete(ViewCacheEntry.__table__)
+                    .where(ViewCacheEntry.view_cache_user_uuid.in_(list(user_uuids)))
+                )
+        except SQLAlchemyError:
+            # The write itself is already committed, its users see it once their entries expire
+            logger.exception("View cache invalidation failed")
+
+    def purge_expired(self):
+        try:
+            with db.engine.begin() as connection:
+                result = connection.execute(
+                    delete(ViewCacheEntry.__table__)
+                    .where(ViewCacheEntry.view_cache_expires_at <= datetime.utcnow())
+                )
+        except SQLAlchemyError:
+            logger.exception("View cache purge failed")
+            return 0
+        return result.rowcount
+
+    def stats(self):
+        return {"backend": "database", "ttl_seconds": self.ttl_seconds, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(delete(ViewCacheEntry.__table__))
+        except SQLAlchemyError:
+            # Called after writes that are already committed (e.g. a backfill), entries expire with their TTL
+            logger.exception("View cache clear failed")
+        self.hits = 0
+        self.misses = 0
+
+
+class NullViewCacheBackend:
+    """
+    Caching turned off, every view is built on every request.
+    """
+
+    def get(self, key):
+        return None
+
+    def set(self, key, user_uuid, value):
+        pass
+
+    def delete(self, keys, user_uuids):
+        pass
+
+    def purge_expired(self):
+        return 0
+
+    def stats(self):
+        return {"backend": "none"}
+
+    def clear(self):
+        pass
+
+
+def create_view_cache_backend(backend_name, web_concurrency=None):
+    """
+    Backend for VIEW_CACHE_BACKEND. The memory backend's invalidation only reaches the process that made the change,
+    other workers would serve stale views until the TTL, so it is only used with WEB_CONCURRENCY=1.
+    """
+    if backend_name == "none":
+        return NullViewCacheBackend()
+    if backend_name == "memory":
+        if web_concurrency == "1":
+            return MemoryViewCacheBackend(VIEW_CACHE_SIZE, VIEW_CACHE_TTL_SECONDS)
+        logger.warning(
+            f"VIEW_CACHE_BACKEND=memory needs a single worker process (WEB_CONCURRENCY=1), "
+            f"WEB_CONCURRENCY is {web_concurrency!r}, using database"
+        )
+    elif backend_name != "database":
+        logger.warning(f"Unknown VIEW_CACHE_BACKEND {backend_name!r}, using database")
+    return DatabaseViewCacheBackend(VIEW_CACHE_TTL_SECONDS)
+
+
+view_cache = create_view_cache_backend(VIEW_CACHE_BACKEND, WEB_CONCURRENCY)
+
+
+def encode_view_value(value):
+    # Dates are tagged so decode_view_value() can bring them back, the templates format them
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    raise TypeError(f"Can't cache a value of type {type(value).__name__}")
+
+
+def decode_view_value(value):
+    if len(value) == 1 and "__date__" in value:
+        return date.fromisoformat(value["__date__"])
+    return value
+
+
+def get_view_cache_key(user_uuid, view_name):
+    """
+    Cache key of a user's view. Views change with the server date (rolled forward next occurrences)
+    and the UTC date (upcoming vs overdue), so both are part of the key and yesterday's entries are never read.
+    """
+    return "{}:{}:{}:{}".format(view_name, user_uuid, date.today().isoformat(), datetime.utcnow().date().isoformat())
+
+
+def get_cached_view(user_uuid, view_name, build_view, validator=None):
+    """
+    Returns a user's view from the cache, calling build_view() to build and cache it on a miss.
+    Views must be plain data (dicts, lists, strings, numbers, dates, None), not ORM objects.
+    The validator the view is sent under (e.g. the page's ETag) is cached with it. An entry cached under another
+    validator, e.g. by a worker that had not seen the last write yet, is rebuilt and replaced rather than served,
+    so a page never goes out under an ETag that is newer than its body.
+    """
+    key = get_view_cache_key(user_uuid, view_name)
+    entry = view_cache.get(key)
+    # Entries are {"validator": ..., "view": ...}, anything else (e.g. cached by an older version) is rebuilt
+    if isinstance(entry, dict) and "view" in entry and entry.get("validator") == validator:
+        return entry["view"]
+    if entry is None:
+        logger.debug("View cache miss: %s", key)
+    else:
+        logger.debug("View cache entry with another validator: %s", key)
+    view = build_view()
+    view_cache.set(key, user_uuid, {"validator": validator, "view": view})
+    return view
+
+
+def invalidate_user_views(user_uuids):
+    """
+    Drops every cached view of the given users. Call after the write is committed,
+    otherwise a request in between could cache the state from before it again.
+    """
+    user_uuids = {user_uuid for user_uuid in user_uuids if user_uuid}
+    if not user_uuids:
+        return
+    keys = [get_view_cache_key(user_uuid, view_name) for user_uuid in user_uuids for view_name in VIEW_NAMES]
+    view_cache.delete(keys, user_uuids)
+    logger.debug("Invalidated cached views of %s users", len(user_uuids))
+
+
+def invalidate_reminder_views(reminder, *user_uuids):
+    """
+    Drops the cached views of everyone who sees a reminder: its owner, every user it is shared with,
+    and any extra users passed in (e.g. the recipient of a share that was just removed).
+    """
+    recipient_uuids = (
+        db.session.query(SharedReminder.shared_reminder_user_uuid)
+        .filter(
+            SharedReminder.shared_reminder_reminder_uuid == reminder.reminder_uuid,
+            SharedReminder.is_deleted == False
+        )
+        .all()
+    )
+    invalidate_user_views([reminder.reminder_user_uuid, *user_uuids, *(row[0] for row in recipient_uuids)])
+
+
+def purge_expired_view_cache():
+    """
+    Deletes expired entries (database backend), returns how many were deleted.
+    """
+    return view_cache.purge_expired()
+
+
+def clear_view_cache():
+    view_cache.clear()
+    logger.info("View cache cleared")
+
+
+def get_view_cache_stats():
+    """
+    Return the view cache counters of this worker process for monitoring.
+    """
+    return view_cache.stats()
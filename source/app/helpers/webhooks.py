@@ -0,0 +1,261 @@
+# helpers/webhooks.py
+from collections import namedtuple, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+# Load environment variables
+load_dotenv()
+
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_MAX_PER_HOST = int(os.getenv("WEBHOOK_MAX_PER_HOST", "2"))
+WEBHOOK_CONNECT_TIMEOUT = float(os.getenv("WEBHOOK_CONNECT_TIMEOUT", "3"))
+WEBHOOK_READ_TIMEOUT = float(os.getenv("WEBHOOK_READ_TIMEOUT", "10"))
+# Consecutive failures (errors, timeouts, 5xx, 429) after which a host's circuit opens
+WEBHOOK_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("WEBHOOK_CIRCUIT_FAILURE_THRESHOLD", "5"))
+# Seconds an open circuit skips deliveries before letting one trial delivery through
+WEBHOOK_CIRCUIT_COOLDOWN_SECONDS = int(os.getenv("WEBHOOK_CIRCUIT_COOLDOWN_SECONDS", "300"))
+
+# Outcome of one webhook POST, skipped is True when no request was made because the host's circuit is open
+DeliveryResult = namedtuple(
+    "DeliveryResult", ["url", "host", "ok", "status_code", "latency_ms", "error", "skipped"], defaults=(False,)
+)
+
+
+def get_webhook_host(url):
+    """
+    Return the host[:port] of a webhook URL, used for per-host limits.
+    """
+    return urlsplit(url).netloc.lower()
+
+
+def is_host_failure(delivery_result):
+    """
+    Whether a result says the host itself is unhealthy, other 4xx responses mean the host answered fine.
+    """
+    if delivery_result.status_code is None:
+        return True
+    return delivery_result.status_code >= 500 or delivery_result.status_code == 429
+
+
+class HostCircuitBreaker:
+    """
+    Per-host circuit breaker, shared by every thread of the process.
+    closed: deliveries go through. open: after failure_threshold consecutive failures, deliveries are
+    skipped for cooldown_seconds. half-open: after the cooldown a single trial delivery goes through,
+    success closes the circuit, failure opens it for another cooldown.
+    """
+
+    def __init__(self, failure_threshold=WEBHOOK_CIRCUIT_FAILURE_THRESHOLD, cooldown_seconds=WEBHOOK_CIRCUIT_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        # host -> [consecutive_failures, opened_until (monotonic) or None, trial_in_flight]
+        self._hosts = {}
+
+    def allow(self, host):
+        with self._lock:
+            host_state = self._hosts.get(host)
+            if host_state is None or host_state[1] is None:
+                return True
+            if time.monotonic() < host_state[1] or host_state[2]:
+                return False
+            host_state[2] = True  # half-open, this caller makes the trial delivery
+            return True
+
+    def record(self, host, delivery_result):
+        with self._lock:
+            if not is_host_failure(delivery_result):
+                # Healthy hosts aren't tracked, keeps the map as small as the set of failing hosts
+                self._hosts.pop(host, None)
+                return
+
+            host_state = self._hosts.setdefault(host, [0, None, False])
+            host_state[0] += 1
+            host_state[2] = False
+            if host_state[1] is not None or host_state[0] >= self.failure_threshold:
+                host_state[1] = time.monotonic() + self.cooldown_seconds
+                logger.warning(f"Webhook circuit open for {host} after {host_state[0]} consecutive failures")
+
+    def get_retry_in_seconds(self, host):
+        """
+        Seconds until the host's open circuit lets a trial delivery through, 0 when it is closed or half-open.
+        """
+        with self._lock:
+            host_state = self._hosts.get(host)
+            if host_state is None or host_state[1] is None:
+                return 0.0
+            return max(0.0, host_state[1] - time.monotonic())
+
+    def get_stats(self):
+        """
+        {host: {"state", "consecutive_failures", "retry_in_seconds"}} for every host currently failing.
+        """
+        now = time.monotonic()
+        with self._lock:
+            stats = {}
+            for host, (consecutive_failures, opened_until, trial_in_flight) in self._hosts.items():
+                if opened_until is None:
+                    state = "closed"
+                elif trial_in_flight or now >= opened_until:
+                    state = "half_open"
+                else:
+                    state = "open"
+                stats[host] = {
+                    "state": state,
+                    "consecutive_failures": consecutive_failures,
+                    "retry_in_seconds": max(0, int(opened_until - now)) if opened_until is not None else 0,
+                }
+            return stats
+
+
+class WebhookDeliveryEngine:
+    """
+    Delivers webhook POSTs concurrently on a thread pool.
+    Connections are pooled and kept alive per worker thread, every call has a connect/read timeout,
+    and at most max_per_host deliveries run against the same host at once.
+    Deliveries to a host whose circuit is open are skipped without a request.
+    """
+
+    def __init__(self, max_workers=WEBHOOK_WORKERS, max_per_host=WEBHOOK_MAX_PER_HOST,
+                 connect_timeout=WEBHOOK_CONNECT_TIMEOUT, read_timeout=WEBHOOK_READ_TIMEOUT, circuit_breaker=None):
+        self.circuit_breaker = circuit_breaker or HostCircuitBreaker()
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.timeout = (connect_timeout, read_timeout)
+        self._local = threading.local()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_session(self):
+        # requests.Session is not guaranteed thread-safe, keep one per worker thread
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_per_host)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="webhook")
+            return self._executor
+
+    def deliver(self, url, payload):
+        """
+        POST payload as JSON to url and return a DeliveryResult, never raises.
+        """
+        host = get_webhook_host(url)
+        if not self.circuit_breaker.allow(host):
+            return self.get_skipped_result(url, host)
+
+        delivery_result = self._post(url, host, payload)
+        self.circuit_breaker.record(host, delivery_result)
+        return delivery_result
+
+    @staticmethod
+    def get_skipped_result(url, host):
+        return DeliveryResult(url, host, False, None, 0.0, "Circuit open, delivery skipped", skipped=True)
+
+    def _post(self, url, host, payload):
+        started = time.perf_counter()
+        try:
+            response = self._get_session().post(url, json=payload, timeout=self.timeout)
+            latency_ms = (time.perf_counter() - started) * 1000
+            ok = 200 <= response.status_code < 300
+            error = None if ok else (response.text or "")[:500]
+            return DeliveryResult(url, host, ok, response.status_code, latency_ms, error)
+        except requests.RequestException as e:
+            latency_ms = (time.perf_counter() - started) * 1000
+            return DeliveryResult(url, host, False, None, latency_ms, f"{type(e).__name__}: {e}")
+
+    def deliver_all(self, jobs):
+        """
+        Deliver an iterable of (job_key, url, payload) concurrently.
+        Yields (job_key, DeliveryResult) as deliveries complete.
+        Jobs are pulled lazily, so only a bounded number are held in memory.
+        Jobs for a host whose circuit is open are yielded straight away with a skipped result.
+        """
+        executor = self._get_executor()
+        jobs = iter(jobs)
+        max_in_flight = self.max_workers * 4
+
+        in_flight = {}
+        in_flight_per_host = defaultdict(int)
+        waiting_per_host = defaultdict(deque)
+        waiting_count = 0
+        jobs_exhausted = False
+        skipped = deque()
+
+        def start(job_key, url, payload, host):
+            if not self.circuit_breaker.allow(host):
+                skipped.append((job_key, self.get_skipped_result(url, host)))
+                return
+            future = executor.submit(self._post, url, host, payload)
+            in_flight[future] = (job_key, host)
+            in_flight_per_host[host] += 1
+
+        while True:
+            # Fill the pool, parking jobs for hosts already at their limit
+            while not jobs_exhausted and len(in_flight) + waiting_count < max_in_flight:
+                try:
+                    job_key, url, payload = next(jobs)
+                except StopIteration:
+                    jobs_exhausted = True
+                    break
+                host = get_webhook_host(url)
+                if in_flight_per_host[host] < self.max_per_host:
+                    start(job_key, url, payload, host)
+                else:
+                    waiting_per_host[host].append((job_key, url, payload))
+                    waiting_count += 1
+
+            while skipped:
+                yield skipped.popleft()
+
+            if not in_flight:
+                if jobs_exhausted:
+                    break
+                continue
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                job_key, host = in_flight.pop(future)
+                in_flight_per_host[host] -= 1
+                delivery_result = future.result()
+                self.circuit_breaker.record(host, delivery_result)
+
+                # Start the next parked jobs for the host that just freed up, skipped ones don't take its slot
+                while waiting_per_host[host] and in_flight_per_host[host] < self.max_per_host:
+                    waiting_count -= 1
+                    start(*waiting_per_host[host].popleft(), host)
+
+                yield job_key, delivery_result
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+webhook_delivery_engine = WebhookDeliveryEngine()
+
+
+def get_webhook_delivery_engine():
+    """
+    Return the process-wide delivery engine, so connection pools are reused across sweeps.
+    """
+    return webhook_delivery_engine
@@ -4,3 +4,8 @@ from .. import db
 from app.models.user import User
 from app.models.reminder import Reminder
 from app.models.shared_reminder import SharedReminder
+from app.models.alert_outbox import AlertOutbox
+from app.models.alert_watermark import AlertWatermark
+from app.models.alert_run import AlertRun
+from app.models.alert_lease import AlertLease
+from app.models.view_cache_entry import ViewCacheEntry
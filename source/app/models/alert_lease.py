@@ -0,0 +1,25 @@
+from datetime import datetime
+from .. import db
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+
+class AlertLease(db.Model):
+    logger.debug("AlertLease Model class initialized")
+
+    __tablename__ = "alert_leases"
+
+    alert_lease_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    # e.g. "alert-shard:1/4"
+    alert_lease_name = db.Column(db.String(100), unique=True, nullable=False)
+    # Random token of the process holding the lease
+    alert_lease_owner = db.Column(db.String(100), nullable=False)
+    # DB time the lease lapses, anyone may take it over after that
+    alert_lease_expires_at = db.Column(db.DateTime, nullable=False)
+    created_on = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_on = db.Column(db.TIMESTAMP, default=datetime.utcnow, onupdate=db.func.current_timestamp(), nullable=False)
+
+    def __repr__(self):
+        return "<AlertLease {} {}>".format(self.alert_lease_name, self.alert_lease_owner)
@@ -0,0 +1,51 @@
+from datetime import datetime
+from .. import db
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+
+class AlertOutbox(db.Model):
+    logger.debug("AlertOutbox Model class initialized")
+
+    __tablename__ = "alert_outbox"
+    __table_args__ = (
+        # One alert per reminder, recipient and occurrence, enforced by the DB
+        db.UniqueConstraint(
+            "alert_outbox_reminder_uuid", "alert_outbox_recipient_user_uuid", "alert_outbox_occurrence_date",
+            name="alert_outbox_reminder_recipient_occurrence_uq"
+        ),
+        db.Index("alert_outbox_status_next_attempt_idx", "alert_outbox_status", "alert_outbox_next_attempt_at"),
+    )
+
+    alert_outbox_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    alert_outbox_reminder_uuid = db.Column(db.String(255), nullable=False)
+    alert_outbox_recipient_user_uuid = db.Column(db.String(255), nullable=False)
+    # get_user_shard_hash() of the recipient, lets sharded drainers filter in SQL
+    alert_outbox_recipient_hash = db.Column(db.BigInteger, nullable=False, default=0)
+    alert_outbox_occurrence_date = db.Column(db.Date, nullable=False)
+
+    # JSON alert details (shared type, title, due date) the webhook message is built from
+    alert_outbox_payload = db.Column(db.Text, nullable=False)
+
+    # Delivery status
+    # Values = PENDING (waiting for a first or next attempt), SENT, FAILED (gave up)
+    alert_outbox_status = db.Column(db.String(20), nullable=False, default="PENDING")
+    alert_outbox_attempts = db.Column(db.Integer, nullable=False, default=0)
+    alert_outbox_next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Set by the drainer that claimed the row, so overlapping drainers never send the same row
+    alert_outbox_claim_token = db.Column(db.String(36), nullable=True)
+
+    alert_outbox_last_status_code = db.Column(db.Integer, nullable=True)
+    alert_outbox_last_error = db.Column(db.String(500), nullable=True)
+    alert_outbox_last_latency_ms = db.Column(db.Integer, nullable=True)
+    alert_outbox_sent_on = db.Column(db.DateTime, nullable=True)
+
+    created_on = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_on = db.Column(db.TIMESTAMP, default=datetime.utcnow, onupdate=db.func.current_timestamp(), nullable=False)
+
+    def __repr__(self):
+        return "<AlertOutbox {} {} {}>".format(
+            self.alert_outbox_reminder_uuid, self.alert_outbox_recipient_user_uuid, self.alert_outbox_occurrence_date
+        )
@@ -0,0 +1,53 @@
+from datetime import datetime
+from .. import db
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+
+class AlertRun(db.Model):
+    logger.debug("AlertRun Model class initialized")
+
+    __tablename__ = "alert_runs"
+    __table_args__ = (
+        db.Index("alert_run_started_on_idx", "alert_run_started_on"),
+    )
+
+    alert_run_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+
+    # Run type
+    # Values = SWEEP (send-alerts API/CLI), SCHEDULER (alert scheduler tick that fired reminders)
+    alert_run_type = db.Column(db.String(20), nullable=False)
+    # "i/N" for sharded runs
+    alert_run_shard = db.Column(db.String(20), nullable=True)
+    # Values = SUCCESS, FAILED
+    alert_run_status = db.Column(db.String(20), nullable=False)
+
+    alert_run_started_on = db.Column(db.DateTime, nullable=False)
+    alert_run_ended_on = db.Column(db.DateTime, nullable=False)
+    alert_run_duration_ms = db.Column(db.Integer, nullable=False, default=0)
+
+    # Distinct recipients and reminders that had due alerts
+    alert_run_users_alerted = db.Column(db.Integer, nullable=False, default=0)
+    alert_run_reminders_due = db.Column(db.Integer, nullable=False, default=0)
+    alert_run_alerts_due = db.Column(db.Integer, nullable=False, default=0)
+    alert_run_alerts_enqueued = db.Column(db.Integer, nullable=False, default=0)
+
+    # Time spent computing next occurrences (roll forward), excluding its DB time
+    alert_run_occurrence_ms = db.Column(db.Integer, nullable=False, default=0)
+    alert_run_db_ms = db.Column(db.Integer, nullable=False, default=0)
+    alert_run_db_queries = db.Column(db.Integer, nullable=False, default=0)
+
+    # Webhook POSTs, a digest counts as one
+    alert_run_deliveries_attempted = db.Column(db.Integer, nullable=False, default=0)
+    alert_run_deliveries_succeeded = db.Column(db.Integer, nullable=False, default=0)
+    alert_run_deliveries_failed = db.Column(db.Integer, nullable=False, default=0)
+    # JSON per-host latency histogram, see LatencyHistogram.to_dict()
+    alert_run_latency_histogram = db.Column(db.Text, nullable=True)
+
+    alert_run_error = db.Column(db.String(1000), nullable=True)
+    created_on = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return "<AlertRun {} {}>".format(self.alert_run_type, self.alert_run_started_on)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from .. import db
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+
+class AlertWatermark(db.Model):
+    logger.debug("AlertWatermark Model class initialized")
+
+    __tablename__ = "alert_watermarks"
+
+    alert_watermark_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    # One row per sweep scope, e.g. "sweep" or "sweep:1/3" for a sharded worker
+    alert_watermark_name = db.Column(db.String(100), unique=True, nullable=False)
+    # Day the last successful sweep ran for, reminders due within the threshold of it were already scanned
+    alert_watermark_run_date = db.Column(db.Date, nullable=False)
+    # DB time the last successful sweep started, rows changed since then are scanned again
+    alert_watermark_changed_since = db.Column(db.DateTime, nullable=False)
+    created_on = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_on = db.Column(db.TIMESTAMP, default=datetime.utcnow, onupdate=db.func.current_timestamp(), nullable=False)
+
+    def __repr__(self):
+        return "<AlertWatermark {}>".format(self.alert_watermark_name)
@@ -14,6 +14,11 @@ class Reminder(db.Model):
     logger.debug("Reminder Model class initialized")
 
     __tablename__ = "reminders"
+    __table_args__ = (
+        db.Index("reminder_user_uuid_next_occurrence_idx", "reminder_user_uuid", "reminder_next_occurrence"),
+        db.Index("reminder_next_occurrence_idx", "reminder_next_occurrence"),
+        db.Index("reminder_updated_on_idx", "updated_on"),
+    )
 
     reminder_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     reminder_uuid = db.Column(db.String(255), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
@@ -36,10 +41,14 @@ class Reminder(db.Model):
     reminder_date_start = db.Column(db.Date, nullable=True)
     reminder_date_end = db.Column(db.Date, nullable=False)
     reminder_is_completed = db.Column(db.Boolean, nullable=False, default=False)
+    # Materialized next occurrence (due date for non-recurring reminders)
+    # NULL when a recurring reminder has no more occurrences
+    reminder_next_occurrence = db.Column(db.Date, nullable=True)
     reminder_user_uuid = db.Column(db.String(255), nullable=False)
     
     created_on = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_on = db.Column(db.TIMESTAMP, default=datetime.utcnow, onupdate=db.func.current_timestamp(), nullable=False)
+    # Stamped by the DB clock on insert too, incremental alert sweeps compare it with a DB clock watermark
+    updated_on = db.Column(db.TIMESTAMP, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp(), nullable=False)
     is_deleted = db.Column(db.Boolean, nullable=False, default=False)
 
     def __repr__(self):
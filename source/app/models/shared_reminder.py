@@ -11,13 +11,17 @@ class SharedReminder(db.Model):
     logger.debug("SharedReminder Model class initialized")
 
     __tablename__ = "shared_reminders"
+    __table_args__ = (
+        db.Index("shared_reminder_updated_on_idx", "updated_on"),
+    )
 
     shared_reminder_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     shared_reminder_uuid = db.Column(db.String(255), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
     shared_reminder_reminder_uuid = db.Column(db.String(255), nullable=False)
     shared_reminder_user_uuid = db.Column(db.String(255), nullable=False)
     created_on = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_on = db.Column(db.TIMESTAMP, default=datetime.utcnow, onupdate=db.func.current_timestamp(), nullable=False)
+    # Stamped by the DB clock on insert too, incremental alert sweeps compare it with a DB clock watermark
+    updated_on = db.Column(db.TIMESTAMP, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp(), nullable=False)
     is_deleted = db.Column(db.Boolean, default=False, nullable=False)
 
     def __repr__(self):
@@ -11,6 +11,10 @@ class User(db.Model):
     logger.debug("User Model class initialized")
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Alert sweeps and the scheduler work through users one timezone bucket at a time
+        db.Index("user_timezone_idx", "user_timezone"),
+    )
 
     user_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     user_uuid = db.Column(db.String(255), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
@@ -18,8 +22,14 @@ class User(db.Model):
     user_password = db.Column(db.String(255), nullable=False)
     user_email = db.Column(db.String(255), nullable=False)
     user_alert_webhook_url = db.Column(db.String(500), nullable=True)
+    # Send one digest message per alert sweep instead of one message per reminder
+    user_alert_digest_enabled = db.Column(db.Boolean, nullable=False, default=False)
+    # IANA timezone name (e.g. "Europe/Berlin") alerts are evaluated in, NULL uses the server's timezone
+    user_timezone = db.Column(db.String(64), nullable=True)
+    user_calendar_feed_token = db.Column(db.String(64), unique=True, nullable=True)
     created_on = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_on = db.Column(db.TIMESTAMP, default=datetime.utcnow, onupdate=db.func.current_timestamp(), nullable=False)
+    # Stamped by the DB clock on insert too, incremental alert sweeps compare it with a DB clock watermark
+    updated_on = db.Column(db.TIMESTAMP, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp(), nullable=False)
     is_deleted = db.Column(db.Boolean, nullable=False, default=False)
 
     def __repr__(self):
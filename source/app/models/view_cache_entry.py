@@ -0,0 +1,28 @@
+from datetime import datetime
+from .. import db
+from app.helpers.logging import setup_logger
+
+
+logger = setup_logger()
+
+
+class ViewCacheEntry(db.Model):
+    logger.debug("ViewCacheEntry Model class initialized")
+
+    __tablename__ = "view_cache_entries"
+    __table_args__ = (
+        db.Index("view_cache_user_uuid_idx", "view_cache_user_uuid"),
+    )
+
+    view_cache_entry_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    # "<view name>:<user uuid>:<dates the view depends on>"
+    view_cache_key = db.Column(db.String(255), unique=True, nullable=False)
+    view_cache_user_uuid = db.Column(db.String(255), nullable=False)
+    # JSON of the cached view, dates tagged so they come back as dates
+    view_cache_value = db.Column(db.Text(16777215), nullable=False)
+    view_cache_expires_at = db.Column(db.DateTime, nullable=False)
+    created_on = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_on = db.Column(db.TIMESTAMP, default=datetime.utcnow, onupdate=db.func.current_timestamp(), nullable=False)
+
+    def __repr__(self):
+        return "<ViewCacheEntry {}>".format(self.view_cache_key)
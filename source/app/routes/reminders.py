@@ -1,6 +1,9 @@
 # routes/reminder_routes.py
-from flask import Blueprint, abort, jsonify, render_template, request, redirect, url_for, flash
+from flask import Blueprint, Response, abort, current_app, jsonify, render_template, request, redirect, stream_with_context, url_for, flash
+from itertools import chain
+import json
 import random
+import secrets
 import string
 from .. import db
 from sqlalchemy.orm import aliased
@@ -9,18 +12,40 @@ import uuid
 from app.models.user import User
 from app.models.reminder import Reminder
 from app.models.shared_reminder import SharedReminder
-from app.helpers.reminders import get_reminder_next_occurrence, send_alert_notification
-from app.helpers.auth import check_login_for_page, check_login_for_api
-from app.helpers.rrule import build_rrule_string, parse_rrule, get_next_occurrences_date_only
-from app.helpers.stats import (
-    get_my_total_reminders_count,
-    get_my_total_shared_reminders_count,
-    get_upcoming_my_non_recurring_reminders_list,
-    get_upcoming_my_recurring_reminders_list,
-    get_upcoming_shared_non_recurring_reminders_list,
-    get_upcoming_shared_recurring_reminders_list,
-    get_overdue_my_non_recurring_reminders_list,
-    get_overdue_shared_non_recurring_reminders_list
+from app.helpers.reminders import (
+    compute_next_occurrences,
+    refresh_reminder_next_occurrence,
+    roll_forward_reminder_next_occurrences,
+    get_user_reminders_validator,
+    get_reminder_validator,
+    get_my_reminders_list,
+    get_shared_reminders_list
+)
+from app.helpers.alerts import run_locked_alert_sweep
+from app.helpers.alert_outbox import drain_alert_outbox
+from app.helpers.alert_telemetry import get_recent_alert_runs
+from app.helpers.webhooks import get_webhook_delivery_engine
+from app.helpers.timezones import get_timezone_choices, is_valid_timezone
+from app.helpers.auth import check_login_for_page, check_login_for_api, check_admin_token_for_api
+from app.helpers.http_cache import get_page_validator, get_not_modified_response, make_page_response
+from app.helpers.ical import generate_ical_feed
+from app.helpers.rrule import (
+    WEEKDAY_MAP,
+    build_rrule_string,
+    parse_rrule,
+    get_next_occurrences_date_only,
+    get_occurrence_dates_between,
+    get_preview_next_occurrences,
+    get_rrule_cache_stats
+)
+from app.helpers.stats import DASHBOARD_PANELS, get_dashboard_panel
+from app.helpers.view_cache import (
+    get_cached_view,
+    invalidate_reminder_views,
+    invalidate_user_views,
+    purge_expired_view_cache,
+    clear_view_cache,
+    get_view_cache_stats
 )
 from app.helpers.logging import setup_logger
 
@@ -28,6 +53,14 @@ from app.helpers.logging import setup_logger
 logger = setup_logger()
 reminders_bp = Blueprint("reminders", __name__)
 
+# Calendar API limits
+CALENDAR_MAX_WINDOW_DAYS = 366
+CALENDAR_ROWS_PER_FETCH = 500
+
+# Recurrence preview API limits
+PREVIEW_MAX_SPECS = 20
+PREVIEW_MAX_AGE_SECONDS = 300
+
 
 # Dashboard
 @reminders_bp.route("/dashboard")
@@ -38,28 +71,38 @@ def dashboard():
     check_login_result = check_login_for_page()
     if not isinstance(check_login_result, str):  # means it's a Response (redirect), not a UUID string
         return check_login_result
-    
-    # Get stats
-    my_total_reminders_count = get_my_total_reminders_count()
-    my_total_shared_reminders_count = get_my_total_shared_reminders_count()
-    upcoming_my_non_recurring_reminders_list = get_upcoming_my_non_recurring_reminders_list()
-    upcoming_my_recurring_reminders_list = get_upcoming_my_recurring_reminders_list()
-    upcoming_shared_non_recurring_reminders_list = get_upcoming_shared_non_recurring_reminders_list()
-    upcoming_shared_recurring_reminders_list = get_upcoming_shared_recurring_reminders_list()
-    overdue_my_non_recurring_reminders_list = get_overdue_my_non_recurring_reminders_list()
-    overdue_shared_non_recurring_reminders_list = get_overdue_shared_non_recurring_reminders_list()
-
-    return render_template("auth_pages/dashboard.html", 
-        my_total_reminders_count=my_total_reminders_count,
-        my_total_shared_reminders_count=my_total_shared_reminders_count,
-        upcoming_my_non_recurring_reminders_list=upcoming_my_non_recurring_reminders_list,
-        upcoming_my_recurring_reminders_list=upcoming_my_recurring_reminders_list,
-        upcoming_shared_non_recurring_reminders_list=upcoming_shared_non_recurring_reminders_list,
-        upcoming_shared_recurring_reminders_list=upcoming_shared_recurring_reminders_list,
-        overdue_my_non_recurring_reminders_list=overdue_my_non_recurring_reminders_list,
-        overdue_shared_non_recurring_reminders_list=overdue_shared_non_recurring_reminders_list
+    else:
+        session_user_uuid = check_login_result
+
+    # Only the page shell, the browser fetches the panels from dashboard_panel() in parallel
+    return render_template("auth_pages/dashboard.html", dashboard_panel_names=list(DASHBOARD_PANELS))
+
+
+# Dashboard panel fragment, loaded by the dashboard page
+@reminders_bp.route("/dashboard/panel/<string:panel_name>")
+def dashboard_panel(panel_name):
+    logger.info("/dashboard/panel route called")
+
+    # Check if user is logged in and return User UUID if authenticated, else redirect to login
+    check_login_result = check_login_for_page()
+    if not isinstance(check_login_result, str):  # means it's a Response (redirect), not a UUID string
+        return check_login_result
+    else:
+        session_user_uuid = check_login_result
+
+    if panel_name not in DASHBOARD_PANELS:
+        abort(404, description="Dashboard panel not found")
+
+    # Each panel is built and cached on its own, until one of the user's reminders changes
+    # (cached with the validator of the user's reminders, so a panel built before a write is rebuilt, not served)
+    _, reminders_etag = get_user_reminders_validator(session_user_uuid)
+    panel_stats = get_cached_view(
+        session_user_uuid, f"dashboard_{panel_name}", lambda: get_dashboard_panel(session_user_uuid, panel_name),
+        reminders_etag
     )
 
+    return render_template(f"partials/dashboard_panels/{panel_name}.html", **panel_stats)
+
 
 # My Reminders - List all reminders
 @reminders_bp.route("/my-reminders")
@@ -72,48 +115,26 @@ def my_reminders():
         return check_login_result
     else:
         session_user_uuid = check_login_result
-    
-    # Get reminders that belong to the logged-in user
-    my_reminders = Reminder.query.filter_by(
-        reminder_user_uuid=session_user_uuid,
-        is_deleted=False
-    ).order_by(Reminder.reminder_date_start).all()
-
-
-    # Add dynamic properties
-    for reminder in my_reminders:
-        # Dynamically add 'reminder_is_shared' property
-        reminder.reminder_is_shared = len(reminder.reminder_shared_with) > 0
-
-        # Dynamically add 'Reminder Next Occurrence' property - next 1 occurrence
-        # Property to only use for display
-        reminder.reminder_display_date_next_occurrence = None
-
-        # Property to only use for sorting
-        reminder.reminder_sort_date_next_occurrence = None
-
-        # Calculate next occurrence
-        reminder_display_date_next_occurrence, reminder_sort_date_next_occurrence = get_reminder_next_occurrence(
-            reminder.reminder_uuid,
-            reminder.reminder_recurrence_type,
-            reminder.reminder_recurrence_rrule,
-            reminder.reminder_date_start,
-            reminder.reminder_date_end
-        )
-
-        logger.debug("reminder_display_date_next_occurrence: %s", reminder_display_date_next_occurrence)
-        logger.debug("reminder_sort_date_next_occurrence: %s", reminder_sort_date_next_occurrence)
 
-        reminder.reminder_display_date_next_occurrence = reminder_display_date_next_occurrence
-        reminder.reminder_sort_date_next_occurrence = reminder_sort_date_next_occurrence
+    # Conditional GET, answered from aggregate queries before anything is loaded or rendered
+    last_modified, etag = get_page_validator("my-reminders", session_user_uuid, *get_user_reminders_validator(session_user_uuid))
+    not_modified_response = get_not_modified_response(last_modified, etag)
+    if not_modified_response:
+        return not_modified_response
     
+    # Get reminders that belong to the logged-in user, ordered by next occurrence
+    # (a cached list is only used when it was cached under the same ETag, so the body matches it)
+    my_reminders = get_cached_view(
+        session_user_uuid, "my_reminders", lambda: get_my_reminders_list(session_user_uuid), etag
+    )
 
-    # Sort by next occurrence
-    my_reminders = sorted(my_reminders, key=lambda x: x.reminder_sort_date_next_occurrence)
-
-    return render_template(
-        "auth_pages/reminder_list_mine.html",
-        my_reminders=my_reminders
+    return make_page_response(
+        render_template(
+            "auth_pages/reminder_list_mine.html",
+            my_reminders=my_reminders
+        ),
+        last_modified,
+        etag
     )
 
 
@@ -128,71 +149,25 @@ def reminders_shared_with_me():
     else:
         session_user_uuid = check_login_result
 
-    # Aliases for User table
-    user_reminder_shared_with = aliased(User)
-    user_reminder_owner = aliased(User)
-    
-    # Get reminders that are shared with the logged-in user
-    my_shared_reminders = (
-        db.session.query(Reminder, SharedReminder, user_reminder_shared_with, user_reminder_owner)
-            # Join shared reminder
-            .join(SharedReminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
-            # Join the user the reminder is shared with
-            .join(user_reminder_shared_with, SharedReminder.shared_reminder_user_uuid == user_reminder_shared_with.user_uuid)
-            # Join the owner of the reminder
-            .join(user_reminder_owner, Reminder.reminder_user_uuid == user_reminder_owner.user_uuid)
-            .filter(
-                SharedReminder.shared_reminder_user_uuid == session_user_uuid,
-                SharedReminder.is_deleted == False,
-                Reminder.is_deleted == False,
-                user_reminder_shared_with.is_deleted == False,
-                user_reminder_owner.is_deleted == False
-            )
-            .order_by(Reminder.reminder_date_start)
-            .all()
+    # Conditional GET, answered from aggregate queries before anything is loaded or rendered
+    last_modified, etag = get_page_validator(
+        "reminders-shared-with-me", session_user_uuid, *get_user_reminders_validator(session_user_uuid)
+    )
+    not_modified_response = get_not_modified_response(last_modified, etag)
+    if not_modified_response:
+        return not_modified_response
+
+    # Get reminders that are shared with the logged-in user, ordered by next occurrence
+    # (a cached list is only used when it was cached under the same ETag, so the body matches it)
+    my_shared_reminders = get_cached_view(
+        session_user_uuid, "shared_reminders", lambda: get_shared_reminders_list(session_user_uuid), etag
     )
 
-    # For debugging only, hence commented out
-    """
-    for reminder, shared, user_reminder_shared_with, user_reminder_owner in my_shared_reminders:
-        logger.debug(reminder.reminder_title)
-        logger.debug(shared.shared_reminder_user_uuid)
-        logger.debug(user_reminder_shared_with.user_username)
-        logger.debug(user_reminder_owner.user_username)
-        logger.debug("---\n")
-    """
-
-
-    # Add dynamic properties
-    for reminder, shared, user_reminder_shared_with, user_reminder_owner in my_shared_reminders:
-        
-        # Dynamically add 'Reminder Next Occurrence' property - next 1 occurrence
-        # Property to only use for display
-        reminder.reminder_display_date_next_occurrence = None
-
-        # Property to only use for sorting
-        reminder.reminder_sort_date_next_occurrence = None
-
-        # Calculate next occurrence
-        reminder_display_date_next_occurrence, reminder_sort_date_next_occurrence = get_reminder_next_occurrence(
-            reminder.reminder_uuid,
-            reminder.reminder_recurrence_type,
-            reminder.reminder_recurrence_rrule,
-            reminder.reminder_date_start,
-            reminder.reminder_date_end
-        )
-
-        logger.debug("reminder_display_date_next_occurrence: %s", reminder_display_date_next_occurrence)
-        logger.debug("reminder_sort_date_next_occurrence: %s", reminder_sort_date_next_occurrence)
-
-        reminder.reminder_display_date_next_occurrence = reminder_display_date_next_occurrence
-        reminder.reminder_sort_date_next_occurrence = reminder_sort_date_next_occurrence
-    
-
-    # Sort by next occurrence
-    my_shared_reminders = sorted(my_shared_reminders, key=lambda x: x[0].reminder_sort_date_next_occurrence)
-
-    return render_template("auth_pages/reminder_list_shared.html", my_shared_reminders=my_shared_reminders)
+    return make_page_response(
+        render_template("auth_pages/reminder_list_shared.html", my_shared_reminders=my_shared_reminders),
+        last_modified,
+        etag
+    )
 
 
 # Create Reminder
@@ -291,9 +266,11 @@ def create_reminder():
             reminder_is_completed=reminder_is_completed,
             reminder_user_uuid=session_user_uuid
         )
+        refresh_reminder_next_occurrence(reminder)
 
         db.session.add(reminder)
         db.session.commit()
+        invalidate_user_views([session_user_uuid])
         logger.info("Reminder created successfully!, Reminder UUID: %s", reminder.reminder_uuid)
         flash("Reminder created successfully!", "success")
         return redirect(url_for("reminders.my_reminders"))
@@ -411,8 +388,10 @@ def update_reminder(reminder_uuid):
         reminder.reminder_date_start = reminder_date_start_processed
         reminder.reminder_date_end = reminder_date_end_processed
         reminder.reminder_is_completed = reminder_is_completed
+        refresh_reminder_next_occurrence(reminder)
         
         db.session.commit()
+        invalidate_reminder_views(reminder)
         logger.info("Reminder updated successfully!, Reminder UUID: %s", reminder.reminder_uuid)
         flash("Reminder updated successfully!", "success")
         return redirect(url_for("reminders.my_reminders"))
@@ -447,6 +426,8 @@ def delete_reminder(reminder_uuid):
 
     reminder.is_deleted = True
     db.session.commit()
+    # The shares are left as they are, so the recipients are still found
+    invalidate_reminder_views(reminder)
     logger.info("Reminder deleted successfully!, Reminder UUID: %s", reminder.reminder_uuid)
     flash("Reminder deleted successfully!", "danger")
     return redirect(url_for("reminders.my_reminders"))
@@ -464,6 +445,17 @@ def view_reminder(reminder_uuid):
     else:
         session_user_uuid = check_login_result
 
+    # Conditional GET, only for a reminder the user may view, a missing or forbidden one takes the regular path
+    last_modified, etag = None, None
+    reminder_validator = get_reminder_validator(reminder_uuid, session_user_uuid)
+    if reminder_validator:
+        last_modified, etag = get_page_validator(
+            f"view-reminder/{reminder_uuid}", session_user_uuid, *reminder_validator
+        )
+        not_modified_response = get_not_modified_response(last_modified, etag)
+        if not_modified_response:
+            return not_modified_response
+
     # Fetch the reminder by UUID, ensure it is not deleted
     reminder = Reminder.query.filter_by(reminder_uuid=reminder_uuid, is_deleted=False).first()
 
@@ -495,37 +487,24 @@ def view_reminder(reminder_uuid):
     # Dynamically add 'reminder_is_shared' property
     reminder.reminder_is_shared = len(reminder.reminder_shared_with) > 0
 
-    # Dynamically add 'Reminder Next Occurrence' property - next 1 occurrence
-    # Property to only use for display
-    reminder.reminder_display_date_next_occurrence = None
-
-    # Property to only use for sorting
-    reminder.reminder_sort_date_next_occurrence = None
-
-    # Calculate next occurrence
-    reminder_display_date_next_occurrence, reminder_sort_date_next_occurrence = get_reminder_next_occurrence(
-        reminder.reminder_uuid,
-        reminder.reminder_recurrence_type,
-        reminder.reminder_recurrence_rrule,
-        reminder.reminder_date_start,
-        reminder.reminder_date_end
-    )
-
-    logger.debug("reminder_display_date_next_occurrence: %s", reminder_display_date_next_occurrence)
-    logger.debug("reminder_sort_date_next_occurrence: %s", reminder_sort_date_next_occurrence)
-
-    reminder.reminder_display_date_next_occurrence = reminder_display_date_next_occurrence
-    reminder.reminder_sort_date_next_occurrence = reminder_sort_date_next_occurrence
+    # Calculate next occurrence - next 1 occurrence
+    reminder_next_occurrence = compute_next_occurrences([reminder])[0]
+    logger.debug("reminder_next_occurrence: %s", reminder_next_occurrence)
 
 
     # Optional: determine if this is a share URL (unauthenticated) or normal view
     # For now, we assume authenticated user
     share_url = False
 
-    return render_template(
-        "auth_pages/reminder_view.html",
-        reminder=reminder,
-        share_url=share_url
+    return make_page_response(
+        render_template(
+            "auth_pages/reminder_view.html",
+            reminder=reminder,
+            reminder_next_occurrence=reminder_next_occurrence,
+            share_url=share_url
+        ),
+        last_modified,
+        etag
     )
 
 
@@ -558,9 +537,13 @@ def share_reminder_url(reminder_url_slug):
     # Note: Share URL feature is authenticated page
     share_url = True
 
+    # Calculate next occurrence - next 1 occurrence
+    reminder_next_occurrence = compute_next_occurrences([reminder])[0]
+
     return render_template(
         "auth_pages/reminder_view.html",
         reminder=reminder,
+        reminder_next_occurrence=reminder_next_occurrence,
         share_url=share_url
     )
 
@@ -587,20 +570,135 @@ def slack_settings():
 
     if request.method == "POST":
         user_alert_webhook_url = request.form.get("user_alert_webhook_url", "").strip()
+        user_alert_digest_enabled = request.form.get("user_alert_digest_enabled") == "1"
+        user_timezone = request.form.get("user_timezone", "").strip() or None
 
-       # Save the user_alert_webhook_url
-        user.user_alert_webhook_url = user_alert_webhook_url
-        db.session.commit()
-        msg_success = "Alert Webhook URL updated successfully."
+        if user_timezone is not None and not is_valid_timezone(user_timezone):
+            msg_error = "Invalid timezone."
+        else:
+            # Save the user_alert_webhook_url, digest and timezone settings
+            user.user_alert_webhook_url = user_alert_webhook_url
+            user.user_alert_digest_enabled = user_alert_digest_enabled
+            user.user_timezone = user_timezone
+            db.session.commit()
+            msg_success = "Alert Webhook settings updated successfully."
 
     return render_template(
         "auth_pages/alert_webhook.html",
         user=user,
+        timezone_choices=get_timezone_choices(),
         msg_success=msg_success,
         msg_error=msg_error
     )
 
 
+# Calendar Feed Settings
+@reminders_bp.route("/calendar-feed", methods=["GET", "POST"])
+def calendar_feed_settings():
+    logger.info("/calendar-feed route called")
+
+    # Check if user is logged in and return User UUID if authenticated, else redirect to login
+    check_login_result = check_login_for_page()
+    if not isinstance(check_login_result, str):  # means it's a Response (redirect), not a UUID string
+        return check_login_result
+    else:
+        session_user_uuid = check_login_result
+
+    # Fetch the user object by User UUID
+    user = User.query.filter_by(user_uuid=session_user_uuid, is_deleted=False).first()
+    if not user:
+        flash("User not found.", "danger")
+        return redirect(url_for("auth.login"))
+
+    msg_success, msg_error = None, None
+
+    if request.method == "POST":
+        # Generate a new token, this invalidates any previously shared feed URL
+        user.user_calendar_feed_token = secrets.token_urlsafe(32)
+        db.session.commit()
+        logger.info("Calendar feed token generated for user: %s", user.user_uuid)
+        msg_success = "Calendar Feed URL generated successfully."
+
+    calendar_feed_url = None
+    if user.user_calendar_feed_token:
+        calendar_feed_url = url_for("reminders.calendar_feed", calendar_feed_token=user.user_calendar_feed_token, _external=True)
+
+    return render_template(
+        "auth_pages/calendar_feed.html",
+        calendar_feed_url=calendar_feed_url,
+        msg_success=msg_success,
+        msg_error=msg_error
+    )
+
+
+# Calendar Feed (.ics) by calendar_feed_token
+# Note: Unauthenticated, the token in the URL identifies the user
+@reminders_bp.route("/calendar/<string:calendar_feed_token>.ics")
+def calendar_feed(calendar_feed_token):
+    logger.info("/calendar/<calendar_feed_token>.ics route called")
+
+    # Only columns are loaded here, ORM objects are loaded only when the feed has changed
+    user_row = (
+        db.session.query(User.user_uuid, User.user_username)
+        .filter(User.user_calendar_feed_token == calendar_feed_token, User.is_deleted == False)
+        .first()
+    )
+    if not user_row:
+        logger.error("Calendar feed not found")
+        abort(404, description="Calendar feed not found")
+
+    user_uuid, user_username = user_row
+
+    # Conditional GET, most polls end here
+    last_modified, etag = get_user_reminders_validator(user_uuid)
+    if request.if_none_match.contains(etag):
+        logger.info("Calendar feed not modified for user: %s", user_uuid)
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    my_reminders_query = (
+        Reminder.query
+        .filter(
+            Reminder.reminder_user_uuid == user_uuid,
+            Reminder.is_deleted == False
+        )
+        .order_by(Reminder.reminder_id)
+    )
+
+    user_reminder_owner = aliased(User)
+    my_shared_reminders_query = (
+        db.session.query(Reminder, user_reminder_owner.user_username)
+        # Join shared reminder
+        .join(SharedReminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
+        # Join the owner of the reminder
+        .join(user_reminder_owner, Reminder.reminder_user_uuid == user_reminder_owner.user_uuid)
+        .filter(
+            SharedReminder.shared_reminder_user_uuid == user_uuid,
+            SharedReminder.is_deleted == False,
+            Reminder.is_deleted == False,
+            user_reminder_owner.is_deleted == False
+        )
+        .order_by(Reminder.reminder_id)
+    )
+
+    reminder_rows = chain(
+        ((reminder, None) for reminder in my_reminders_query.yield_per(CALENDAR_ROWS_PER_FETCH)),
+        my_shared_reminders_query.yield_per(CALENDAR_ROWS_PER_FETCH)
+    )
+
+    calendar_name = f"{current_app.config['SITE_NAME']} - {user_username}"
+    response = Response(
+        stream_with_context(generate_ical_feed(calendar_name, reminder_rows, request.host)),
+        mimetype="text/calendar"
+    )
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
 # API endpoints
 # API to Share Reminder
 @reminders_bp.route("/api/reminder/share", methods=["POST"])
@@ -679,6 +777,7 @@ def share_reminder():
     )
     db.session.add(shared_reminder_record)
     db.session.commit()
+    invalidate_reminder_views(reminder)
 
     logger.info("Reminder shared successfully!, Reminder UUID: %s", share_reminder_uuid)
     return jsonify({"success": True, "message": "Reminder shared successfully."})
@@ -739,16 +838,58 @@ def unshare_reminder():
     # Soft delete
     shared_reminder_record.is_deleted = True
     db.session.commit()
+    # The removed share no longer finds its recipient, so pass them explicitly
+    invalidate_reminder_views(reminder, unshare_user_id)
 
     logger.info("Reminder unshared successfully!, Reminder UUID: %s", share_reminder_uuid)
     return jsonify({"success": True, "message": "Reminder unshared successfully."})
 
 
 # API to preview RRULE
-@reminders_bp.route("/api/reminder/preview-next-occurrences", methods=["POST"])
+def parse_preview_spec(data):
+    """
+    Validate one preview spec (dict) and return the keyword arguments for get_preview_next_occurrences().
+    Raises ValueError on invalid input.
+    """
+    reminder_date_start = data.get("reminder_date_start") or None
+    reminder_date_end = data.get("reminder_date_end") or None
+
+    # Validate date format, values stay as strings so they can be part of the cache key
+    for value in (reminder_date_start, reminder_date_end):
+        if value:
+            datetime.strptime(value, "%Y-%m-%d")
+
+    interval = int(data.get("interval") or 1)
+    if interval < 1:
+        raise ValueError("interval must be 1 or more")
+
+    byweekday = data.get("byweekday") or []
+    if isinstance(byweekday, str):
+        byweekday = byweekday.split(",")
+    if any(day not in WEEKDAY_MAP for day in byweekday):
+        raise ValueError("byweekday must be a list of MO, TU, WE, TH, FR, SA, SU")
+
+    bymonthday = data.get("bymonthday")
+    bymonthday = int(bymonthday) if bymonthday else None
+    if bymonthday is not None and not 1 <= bymonthday <= 31:
+        raise ValueError("bymonthday must be between 1 and 31")
+
+    return {
+        "recurrence_type": data.get("reminder_recurrence_type", "NONE"),
+        "start_date": reminder_date_start,
+        "end_date": reminder_date_end,
+        "interval": interval,
+        "byweekday": byweekday,
+        "bymonthday": bymonthday,
+    }
+
+
+@reminders_bp.route("/api/reminder/preview-next-occurrences", methods=["GET", "POST"])
 def api_preview_next_occurrences():
     """
     Build RRULE from user input and return next occurrences for live preview.
+    GET takes one spec as query parameters, so the browser can reuse cached responses.
+    POST takes one spec, or {"specs": [...]} to preview several candidate rules in one request.
     """
     logger.info("/api/reminder/preview-next-occurrences route called")
 
@@ -756,36 +897,141 @@ def api_preview_next_occurrences():
     check_login_result = check_login_for_api()
 
     # Validations
-    if not check_login_result:
+    if not isinstance(check_login_result, str):
         logger.info("User not logged in, returning error")
         return jsonify({"success": False, "message": "User not logged in."}), 401
 
-    data = request.json or {}
+    data = request.args.to_dict() if request.method == "GET" else (request.get_json(silent=True) or {})
+    specs = data.get("specs")
+    is_batch = isinstance(specs, list)
+    if not is_batch:
+        specs = [data]
+
+    if len(specs) > PREVIEW_MAX_SPECS:
+        logger.info("Validation: Too many preview specs.")
+        return jsonify({"success": False, "message": f"At most {PREVIEW_MAX_SPECS} specs can be previewed per request."}), 400
+
+    today = datetime.now().date()
+    previews = []
+    for spec in specs:
+        logger.debug(f"Preview spec: {spec}")
+        try:
+            preview_kwargs = parse_preview_spec(spec)
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.info("Validation: Invalid preview spec: %s", e)
+            return jsonify({"success": False, "message": f"Invalid preview spec: {e}"}), 400
+
+        previews.append({"next_occurrences": get_preview_next_occurrences(count=5, today=today, **preview_kwargs)})
+
+    response = jsonify({"previews": previews} if is_batch else previews[0])
+
+    # Previews only change when the day changes, let the browser reuse them until then
+    seconds_until_midnight = int((datetime.combine(today + timedelta(days=1), datetime.min.time()) - datetime.now()).total_seconds())
+    response.headers["Cache-Control"] = f"private, max-age={max(0, min(PREVIEW_MAX_AGE_SECONDS, seconds_until_midnight))}"
+    return response
+
 
-    reminder_recurrence_type = data.get("reminder_recurrence_type", "NONE")
-    reminder_date_start = data.get("reminder_date_start")
-    reminder_date_end = data.get("reminder_date_end")
+# API to list every occurrence of owned and shared reminders within a date window
+# Streamed as NDJSON, one occurrence per line, grouped by reminder
+@reminders_bp.route("/api/calendar", methods=["GET"])
+def api_calendar():
+    logger.info("/api/calendar route called")
 
-    logger.debug(f"Reminder Recurrence Type: {reminder_recurrence_type}")
-    logger.debug(f"Reminder Date Start: {reminder_date_start}")
-    logger.debug(f"Reminder Date End: {reminder_date_end}")
+    # Check if user is logged in and return User UUID if authenticated, else throw error
+    check_login_result = check_login_for_api()
+
+    # Validations-1
+    if not isinstance(check_login_result, str):
+        logger.info("User not logged in, returning error")
+        return jsonify({"success": False, "message": "User not logged in."}), 401
+    session_user_uuid = check_login_result
 
-    rrule_str = build_rrule_string(
-        reminder_recurrence_type,
-        reminder_date_start,
-        reminder_date_end,
-        interval=1,
-        byweekday=[],
-        bymonthday=None,
+    # Validations-2
+    try:
+        date_from = datetime.strptime(request.args.get("from", ""), "%Y-%m-%d").date()
+        date_to = datetime.strptime(request.args.get("to", ""), "%Y-%m-%d").date()
+    except ValueError:
+        logger.info("Validation: Invalid from/to date.")
+        return jsonify({"success": False, "message": "Parameters 'from' and 'to' must be dates in YYYY-MM-DD format."}), 400
+
+    if date_from > date_to:
+        logger.info("Validation: 'from' is after 'to'.")
+        return jsonify({"success": False, "message": "Parameter 'from' must be on or before 'to'."}), 400
+
+    if (date_to - date_from).days > CALENDAR_MAX_WINDOW_DAYS:
+        logger.info("Validation: Calendar window too large.")
+        return jsonify({"success": False, "message": f"Calendar window cannot exceed {CALENDAR_MAX_WINDOW_DAYS} days."}), 400
+
+    logger.debug("date_from: %s", date_from)
+    logger.debug("date_to: %s", date_to)
+
+    # Pre-filter in SQL so reminders outside the window are never loaded
+    in_window_filter = db.or_(
+        db.and_(
+            Reminder.reminder_recurrence_type == "NONE",
+            Reminder.reminder_date_end >= date_from,
+            Reminder.reminder_date_end <= date_to
+        ),
+        db.and_(
+            Reminder.reminder_recurrence_type != "NONE",
+            Reminder.reminder_date_start <= date_to,
+            db.or_(Reminder.reminder_date_end == None, Reminder.reminder_date_end >= date_from)
+        )
     )
-    logger.debug(f"RRULE: {rrule_str}")
 
-    if not rrule_str:
-        logger.error("Invalid RRULE")
-        return jsonify({"next_occurrences": []})
+    my_reminders_query = (
+        Reminder.query
+        .filter(
+            Reminder.reminder_user_uuid == session_user_uuid,
+            Reminder.is_deleted == False,
+            in_window_filter
+        )
+        .order_by(Reminder.reminder_id)
+    )
 
-    next_occurrences = get_next_occurrences_date_only(reminder_date_start, rrule_str, count=5)
-    return jsonify({"next_occurrences": next_occurrences})
+    user_reminder_owner = aliased(User)
+    my_shared_reminders_query = (
+        db.session.query(Reminder, user_reminder_owner)
+        # Join shared reminder
+        .join(SharedReminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
+        # Join the owner of the reminder
+        .join(user_reminder_owner, Reminder.reminder_user_uuid == user_reminder_owner.user_uuid)
+        .filter(
+            SharedReminder.shared_reminder_user_uuid == session_user_uuid,
+            SharedReminder.is_deleted == False,
+            Reminder.is_deleted == False,
+            user_reminder_owner.is_deleted == False,
+            in_window_filter
+        )
+        .order_by(Reminder.reminder_id)
+    )
+
+    def occurrence_lines(reminder, reminder_is_shared, reminder_owner_username):
+        if reminder.reminder_recurrence_type == "NONE":
+            occurrence_dates = [reminder.reminder_date_end]
+        else:
+            occurrence_dates = get_occurrence_dates_between(reminder.reminder_recurrence_rrule, date_from, date_to)
+
+        for occurrence_date in occurrence_dates:
+            yield json.dumps({
+                "reminder_uuid": reminder.reminder_uuid,
+                "reminder_title": reminder.reminder_title,
+                "reminder_type": reminder.reminder_type,
+                "reminder_recurrence_type": reminder.reminder_recurrence_type,
+                "reminder_is_completed": reminder.reminder_is_completed,
+                "reminder_is_shared": reminder_is_shared,
+                "reminder_owner_username": reminder_owner_username,
+                "occurrence_date": occurrence_date.isoformat(),
+            }) + "\n"
+
+    def generate():
+        for reminder in my_reminders_query.yield_per(CALENDAR_ROWS_PER_FETCH):
+            yield from occurrence_lines(reminder, False, None)
+
+        for reminder, reminder_owner in my_shared_reminders_query.yield_per(CALENDAR_ROWS_PER_FETCH):
+            yield from occurrence_lines(reminder, True, reminder_owner.user_username)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
 
 @reminders_bp.route("/api/reminder/update-completed", methods=["POST"])
@@ -828,7 +1074,9 @@ def mark_completed():
         return jsonify({"success": False, "message": "Not authorized"}), 401
 
     reminder.reminder_is_completed = reminder_is_completed
+    refresh_reminder_next_occurrence(reminder)
     db.session.commit()
+    invalidate_reminder_views(reminder)
 
     return jsonify({"success": True, "message": "Reminder updated"})
 
@@ -837,224 +1085,92 @@ def mark_completed():
 @reminders_bp.route('/api/reminder/send-alerts', methods=['GET'])
 def send_alerts():
     logger.info("/api/reminder/send-alerts route called")
-    
-    # Fetch the user object using the User UUID
-    users = User.query.filter_by(is_deleted=False).all()
-    if not users:
-        return jsonify({"success": False, "message": "Users data not found"}), 400
 
-    for each_user in users:
-        logger.debug("user_uuid: %s", each_user.user_uuid)
+    # Pass ?full=1 to rescan every due reminder instead of only what changed since the last sweep
+    full_scan = request.args.get("full") == "1"
+    # Safe to call from cron on every node, only one runs the sweep at a time
+    summary = run_locked_alert_sweep(full_scan=full_scan)
+    if summary is None:
+        return jsonify({"success": True, "message": "Alert sweep is already running on another node.", "skipped": True}), 200
 
-        if each_user.user_alert_webhook_url is None:
-            logger.info("Alert Webhook URL not found, skipping user: %s", each_user.user_uuid)
-            continue
-        else:
-            # Part-1: Get reminders that belong to that user
-            logger.info("Part-1: Get reminders that belong to that user: %s", each_user.user_uuid)
-
-            my_reminders = Reminder.query.filter_by(
-                reminder_user_uuid=each_user.user_uuid,
-                reminder_is_completed=False,
-                is_deleted=False
-            ).order_by(Reminder.reminder_date_start).all()
-
-
-            # Add dynamic properties
-            for reminder in my_reminders:
-                # Dynamically add 'reminder_is_shared' property
-                reminder.reminder_is_shared = len(reminder.reminder_shared_with) > 0
-
-                # Dynamically add 'Reminder Next Occurrence' property - next 1 occurrence
-                # Property to only use for display
-                reminder.reminder_display_date_next_occurrence = None
-
-                # Property to only use for sorting
-                reminder.reminder_sort_date_next_occurrence = None
-
-                # Calculate next occurrence
-                reminder_display_date_next_occurrence, reminder_sort_date_next_occurrence = get_reminder_next_occurrence(
-                    reminder.reminder_uuid,
-                    reminder.reminder_recurrence_type,
-                    reminder.reminder_recurrence_rrule,
-                    reminder.reminder_date_start,
-                    reminder.reminder_date_end
-                )
-
-                logger.debug("Owned Reminder: reminder_display_date_next_occurrence: %s", reminder_display_date_next_occurrence)
-                logger.debug("Owned Reminder: reminder_sort_date_next_occurrence: %s", reminder_sort_date_next_occurrence)
-
-                reminder.reminder_display_date_next_occurrence = reminder_display_date_next_occurrence
-                reminder.reminder_sort_date_next_occurrence = reminder_sort_date_next_occurrence
-            
-
-            # Sort by next occurrence
-            my_reminders = sorted(my_reminders, key=lambda x: x.reminder_sort_date_next_occurrence)
-            
-            # Logic for sending alerts
-            today = datetime.now().date()
-            
-            for each_owned_reminder in my_reminders:
-                if each_owned_reminder.reminder_display_date_next_occurrence == "N/A":
-                    # Skip reminders that don't have a next occurrence
-                    logger.debug("Owned Reminder: Skipping reminder as it doesn't have a next occurrence: %s", each_owned_reminder.reminder_uuid)
-                    continue
-                else:
-                    logger.debug("Owned Reminder: reminder_uuid: %s", each_owned_reminder.reminder_uuid)
-                    logger.debug("Owned Reminder: reminder_display_date_next_occurrence: %s", each_owned_reminder.reminder_display_date_next_occurrence)
-                    logger.debug("Owned Reminder: reminder_sort_date_next_occurrence: %s", each_owned_reminder.reminder_sort_date_next_occurrence)
-                
-                    reminder_due_date = each_owned_reminder.reminder_sort_date_next_occurrence
-                    logger.debug(f"Owned Reminder: reminder_due_date: {reminder_due_date}")
-
-                    # Calculate due date diff
-                    due_date_diff = reminder_due_date - today
-                    logger.debug(f"Owned Reminder: due_date_diff: {due_date_diff}")
-                    # Convert timedelta object to days
-                    due_date_diff_days = due_date_diff.days
-                    logger.debug(f"Owned Reminder: due_date_diff_days: {due_date_diff_days}")
-
-                    # Current threshold for sending alerts
-                    alert_threshold = 5
-                    logger.debug(f"Owned Reminder: alert_threshold: {alert_threshold}")
-                
-                    if due_date_diff_days <= alert_threshold and reminder_due_date >= today:
-                        # Send alert
-                        logger.info(f"Owned Reminder: Sending alert for reminder: {each_owned_reminder.reminder_uuid} | Due Date Diff Days: {due_date_diff_days} days")
-
-                        response_boolean_flag = send_alert_notification("Your Reminder", each_user.user_alert_webhook_url, each_owned_reminder.reminder_title, reminder_due_date)
-                        if response_boolean_flag == False:
-                            logger.error(f"Owned Reminder: Error sending notification for reminder: {each_owned_reminder.reminder_uuid}")
-                        else:
-                            logger.info(f"Owned Reminder: Notification sent successfully for reminder: {each_owned_reminder.reminder_uuid}")
-                    else:
-                        logger.debug(f"Owned Reminder: Skipping reminder as it's not due yet: {each_owned_reminder.reminder_uuid}")
-                        continue
-
-
-
-            # Part-2: Get reminders that have been shared with that user
-            logger.info("Part-2: Get reminders that have been shared with that user: %s", each_user.user_uuid)
-
-            user_reminder_shared_with = aliased(User)
-            user_reminder_owner = aliased(User)
-            
-            # Get reminders that are shared with that user
-            my_shared_reminders = (
-                db.session.query(Reminder, SharedReminder, user_reminder_shared_with, user_reminder_owner)
-                    # Join shared reminder
-                    .join(SharedReminder, SharedReminder.shared_reminder_reminder_uuid == Reminder.reminder_uuid)
-                    # Join the user the reminder is shared with
-                    .join(user_reminder_shared_with, SharedReminder.shared_reminder_user_uuid == user_reminder_shared_with.user_uuid)
-                    # Join the owner of the reminder
-                    .join(user_reminder_owner, Reminder.reminder_user_uuid == user_reminder_owner.user_uuid)
-                    .filter(
-                        SharedReminder.shared_reminder_user_uuid == each_user.user_uuid,
-                        SharedReminder.is_deleted == False,
-                        Reminder.is_deleted == False,
-                        Reminder.reminder_is_completed == False,
-                        user_reminder_shared_with.is_deleted == False,
-                        user_reminder_owner.is_deleted == False
-                    )
-                    .order_by(Reminder.reminder_date_start)
-                    .all()
-            )
-
-            # For debugging only, hence commented out
-            """
-            for reminder, shared, user_reminder_shared_with, user_reminder_owner in my_shared_reminders:
-                logger.debug(reminder.reminder_title)
-                logger.debug(shared.shared_reminder_user_uuid)
-                logger.debug(user_reminder_shared_with.user_username)
-                logger.debug(user_reminder_owner.user_username)
-                logger.debug("---\n")
-            """
-
-
-            # Add dynamic properties
-            for reminder, shared, user_reminder_shared_with, user_reminder_owner in my_shared_reminders:
-                
-                # Dynamically add 'Reminder Next Occurrence' property - next 1 occurrence
-                # Property to only use for display
-                reminder.reminder_display_date_next_occurrence = None
-
-                # Property to only use for sorting
-                reminder.reminder_sort_date_next_occurrence = None
-
-                # Calculate next occurrence
-                reminder_display_date_next_occurrence, reminder_sort_date_next_occurrence = get_reminder_next_occurrence(
-                    reminder.reminder_uuid,
-                    reminder.reminder_recurrence_type,
-                    reminder.reminder_recurrence_rrule,
-                    reminder.reminder_date_start,
-                    reminder.reminder_date_end
-                )
-
-                reminder.reminder_display_date_next_occurrence = reminder_display_date_next_occurrence
-                reminder.reminder_sort_date_next_occurrence = reminder_sort_date_next_occurrence
-
-                logger.debug("Shared Reminder: reminder.reminder_display_date_next_occurrence: %s", reminder.reminder_display_date_next_occurrence)
-                logger.debug("Shared Reminder: reminder.reminder_sort_date_next_occurrence: %s", reminder.reminder_sort_date_next_occurrence)
-            
-
-             # Sort by next occurrence
-            my_shared_reminders = sorted(my_shared_reminders, key=lambda x: x[0].reminder_sort_date_next_occurrence)
-
-            # For debugging only, hence commented out
-            """
-            logger.debug("---\n")
-            for reminder, shared, user_reminder_shared_with, user_reminder_owner in my_shared_reminders:
-                logger.debug(reminder.reminder_title)
-                logger.debug(shared.shared_reminder_user_uuid)
-                logger.debug(user_reminder_shared_with.user_username)
-                logger.debug(user_reminder_owner.user_username)
-                logger.debug(reminder.reminder_display_date_next_occurrence)
-                logger.debug(reminder.reminder_sort_date_next_occurrence)
-                logger.debug("---\n")
-            """
-            
-            # Logic for sending alerts
-            today = datetime.now().date()
-            
-            for reminder, shared, user_reminder_shared_with, user_reminder_owner in my_shared_reminders:
-                if reminder.reminder_display_date_next_occurrence == "N/A":
-                    # Skip reminders that don't have a next occurrence
-                    logger.debug("Shared Reminder: Skipping reminder as it doesn't have a next occurrence: %s", reminder.reminder_uuid)
-                    continue
-                else:
-                    logger.debug("Shared Reminder: reminder_uuid: %s", reminder.reminder_uuid)
-                    logger.debug("Shared Reminder: reminder_display_date_next_occurrence: %s", reminder.reminder_display_date_next_occurrence)
-                    logger.debug("Shared Reminder: reminder_sort_date_next_occurrence: %s", reminder.reminder_sort_date_next_occurrence)
-                
-                    reminder_due_date = reminder.reminder_sort_date_next_occurrence
-                    logger.debug(f"Shared Reminder: reminder_due_date: {reminder_due_date}")
-
-                    # Calculate due date diff
-                    due_date_diff = reminder_due_date - today
-                    logger.debug(f"Shared Reminder: due_date_diff: {due_date_diff}")
-                    # Convert timedelta object to days
-                    due_date_diff_days = due_date_diff.days
-                    logger.debug(f"Shared Reminder: due_date_diff_days: {due_date_diff_days}")
-
-                    # Current threshold for sending alerts
-                    alert_threshold = 5
-                    logger.debug(f"Shared Reminder: alert_threshold: {alert_threshold}")
-                
-                    if due_date_diff_days <= alert_threshold and reminder_due_date >= today:
-                        # Send alert
-                        logger.info(f"Shared Reminder: Sending alert for reminder: {reminder.reminder_uuid} | Due Date Diff Days: {due_date_diff_days} days")
-
-                        response_boolean_flag = send_alert_notification("Shared Reminder", each_user.user_alert_webhook_url, reminder.reminder_title, reminder_due_date)
-                        if response_boolean_flag == False:
-                            logger.error(f"Shared Reminder: Error sending notification for reminder: {reminder.reminder_uuid}")
-                        else:
-                            logger.info(f"Shared Reminder: Notification sent successfully for reminder: {reminder.reminder_uuid}")
-                    else:
-                        logger.debug(f"Shared Reminder: Skipping reminder as it's not due yet: {reminder.reminder_uuid}")
-                        continue
-            
-                        
-
-    return jsonify({"success": True, "message": "Sending Alerts completed successfully!"}), 200
-
-        
\ No newline at end of file
+    return jsonify({"success": True, "message": "Sending Alerts completed successfully!", **summary}), 200
+
+
+# API to retry queued alerts between sweeps
+# Note: This API is for internal use only and unauthenticated endpoint, meant to be run from cron every few minutes
+@reminders_bp.route('/api/reminder/drain-alert-outbox', methods=['GET'])
+def drain_alert_outbox_api():
+    logger.info("/api/reminder/drain-alert-outbox route called")
+
+    summary = drain_alert_outbox()
+
+    return jsonify({"success": True, "message": "Alert outbox drained successfully!", **summary}), 200
+
+
+# API to roll stored next occurrences forward
+# Note: This API is for internal use only and unauthenticated endpoint, meant to be run daily
+# Pass ?backfill=1 once after adding the reminder_next_occurrence column to populate existing reminders
+@reminders_bp.route('/api/reminder/roll-forward-next-occurrences', methods=['GET'])
+def roll_forward_next_occurrences():
+    logger.info("/api/reminder/roll-forward-next-occurrences route called")
+
+    backfill = request.args.get("backfill") == "1"
+    updated_count = roll_forward_reminder_next_occurrences(backfill=backfill)
+
+    if backfill:
+        # Cached views may show next occurrences from before the backfill
+        clear_view_cache()
+    else:
+        purge_expired_view_cache()
+
+    return jsonify({"success": True, "message": "Next occurrences updated successfully!", "updated_count": updated_count}), 200
+
+
+# API to monitor alert runs: timings, DB time, deliveries and per-host webhook latency histograms
+# Note: This API is for internal use only and requires the ADMIN_API_TOKEN bearer token, read-only
+@reminders_bp.route('/api/admin/alert-runs', methods=['GET'])
+def alert_runs():
+    logger.info("/api/admin/alert-runs route called")
+
+    if not check_admin_token_for_api():
+        return jsonify({"success": False, "message": "Admin token required."}), 401
+
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), 500))
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid limit"}), 400
+
+    run_type = request.args.get("type", "").upper() or None
+
+    return jsonify({"success": True, "alert_runs": get_recent_alert_runs(limit=limit, run_type=run_type)}), 200
+
+
+# API to monitor the webhook circuit breakers of this worker process, lists hosts that are currently failing
+# Note: This API is for internal use only and requires the ADMIN_API_TOKEN bearer token, read-only
+# (hosts come from users' webhook URLs)
+@reminders_bp.route('/api/admin/webhook-circuits', methods=['GET'])
+def webhook_circuits():
+    logger.info("/api/admin/webhook-circuits route called")
+
+    if not check_admin_token_for_api():
+        return jsonify({"success": False, "message": "Admin token required."}), 401
+
+    return jsonify({"success": True, "webhook_circuits": get_webhook_delivery_engine().circuit_breaker.get_stats()}), 200
+
+
+# API to monitor the compiled RRULE cache of this worker process
+# Note: This API is for internal use only and unauthenticated endpoint
+@reminders_bp.route('/api/rrule-cache/stats', methods=['GET'])
+def rrule_cache_stats():
+    logger.info("/api/rrule-cache/stats route called")
+
+    return jsonify({"success": True, "rrule_cache": get_rrule_cache_stats()}), 200
+
+
+# API to monitor the dashboard and list view cache of this worker process
+# Note: This API is for internal use only and unauthenticated endpoint
+@reminders_bp.route('/api/view-cache/stats', methods=['GET'])
+def view_cache_stats():
+    logger.info("/api/view-cache/stats route called")
+
+    return jsonify({"success": True, "view_cache": get_view_cache_stats()}), 200
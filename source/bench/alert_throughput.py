@@ -0,0 +1,284 @@
+# source/bench/alert_throughput.py
+"""
+Alert dispatch throughput benchmark, fully offline.
+
+Seeds N users with M reminders each into a scratch database, points their webhooks at local
+webhook sinks (see bench/webhook_sink.py), runs one full alert sweep (run_alert_sweep) and reports
+deliveries/sec, webhook latency percentiles and DB query counts.
+
+Run from the source directory:
+    python -m bench.alert_throughput --users 500 --reminders 20 --latency-ms 50
+    python -m bench.alert_throughput --users 500 --reminders 20 --json > before.json
+
+The database defaults to in-memory SQLite. Pass --database-url to bench against a local MySQL,
+it must point at an empty scratch database (tables are created, nothing is dropped).
+Delivery settings come from the usual env vars (WEBHOOK_WORKERS, WEBHOOK_MAX_PER_HOST, ...).
+"""
+import argparse
+from datetime import date, timedelta
+import json
+import os
+import random
+import threading
+import time
+from sqlalchemy import BigInteger, event
+from sqlalchemy.ext.compiler import compiles
+from bench.webhook_sink import WebhookSink, add_sink_arguments
+
+
+RECURRENCE_TYPES = ["NONE", "DAILY", "WEEKLY", "MONTHLY", "YEARLY"]
+
+
+# SQLite only autoincrements INTEGER PRIMARY KEY columns, the models use BIGINT ids for MySQL
+@compiles(BigInteger, "sqlite")
+def compile_big_integer_for_sqlite(type_, compiler, **kw):
+    return "INTEGER"
+
+
+class QueryCounter:
+    """
+    Counts statements (in total and per SQL verb) and DB time on an engine while active.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.queries = 0
+        self.queries_by_verb = {}
+        self.db_ms = 0.0
+        self._query_started = threading.local()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._query_started.value = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.db_ms += (time.perf_counter() - self._query_started.value) * 1000
+        self.queries += 1
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        self.queries_by_verb[verb] = self.queries_by_verb.get(verb, 0) + 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(self.engine, "after_cursor_execute", self._after_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(self.engine, "after_cursor_execute", self._after_cursor_execute)
+        return False
+
+
+def get_percentile(sorted_values, percentile):
+    """
+    Nearest-rank percentile of an already sorted list, None when empty.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * percentile // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def seed_bench_data(db, sink_urls, users_count, reminders_per_user, webhook_rate, digest_rate, share_rate, rng, today):
+    """
+    Inserts the benchmark users, reminders and shares. Webhook users are spread round-robin over the sinks,
+    so each sink is a separate host for per-host limits and circuits.
+    Returns (users, reminders, shares) counts.
+    """
+    from app.models.user import User
+    from app.models.reminder import Reminder
+    from app.models.shared_reminder import SharedReminder
+    from app.helpers.reminders import refresh_reminders_next_occurrence
+    from app.helpers.rrule import build_rrule_string
+
+    users = []
+    for user_index in range(users_count):
+        has_webhook = rng.random() < webhook_rate
+        users.append(User(
+            user_username=f"bench{user_index}",
+            user_password="x",
+            user_email=f"bench{user_index}@bench.local",
+            user_alert_webhook_url=f"{sink_urls[user_index % len(sink_urls)]}/hook/{user_index}" if has_webhook else None,
+            user_alert_digest_enabled=rng.random() < digest_rate,
+        ))
+    db.session.add_all(users)
+    db.session.commit()
+
+    reminders = []
+    for user in users:
+        for reminder_index in range(reminders_per_user):
+            recurrence_type = rng.choice(RECURRENCE_TYPES)
+            if recurrence_type == "NONE":
+                date_start = today + timedelta(days=rng.randint(0, 30))
+                date_end = date_start
+            else:
+                date_start = today - timedelta(days=rng.randint(0, 400))
+                date_end = today + timedelta(days=rng.randint(30, 900))
+            reminders.append(Reminder(
+                reminder_url_slug=f"{user.user_username}-{reminder_index}",
+                reminder_title=f"Bench reminder {reminder_index} of {user.user_username}",
+                reminder_type="Bench",
+                reminder_recurrence_type=recurrence_type,
+                reminder_recurrence_rrule=build_rrule_string(recurrence_type, date_start, date_end),
+                reminder_date_start=date_start,
+                reminder_date_end=date_end,
+                reminder_user_uuid=user.user_uuid,
+            ))
+    refresh_reminders_next_occurrence(reminders, today=today)
+    db.session.add_all(reminders)
+    db.session.commit()
+
+    shares = []
+    if len(users) > 1:
+        for reminder in reminders:
+            if rng.random() < share_rate:
+                recipient = rng.choice(users)
+                if recipient.user_uuid != reminder.reminder_user_uuid:
+                    shares.append(SharedReminder(
+                        shared_reminder_reminder_uuid=reminder.reminder_uuid,
+                        shared_reminder_user_uuid=recipient.user_uuid,
+                    ))
+    db.session.add_all(shares)
+    db.session.commit()
+
+    return len(users), len(reminders), len(shares)
+
+
+def run_benchmark(args):
+    # Configure before the app is imported, module level loggers and settings are read at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from app import init_app, db
+    from app.helpers import webhooks
+    from app.helpers.alerts import run_alert_sweep
+
+    latencies_ms = []
+    latencies_lock = threading.Lock()
+
+    class SampledDeliveryEngine(webhooks.WebhookDeliveryEngine):
+        # Keeps every POST's latency for exact percentiles, the sweep's own histogram is bucketed
+        def _post(self, url, host, payload):
+            delivery_result = super()._post(url, host, payload)
+            with latencies_lock:
+                latencies_ms.append(delivery_result.latency_ms)
+            return delivery_result
+
+    app = init_app()
+    rng = random.Random(args.seed)
+    today = date.today()
+
+    sinks = [
+        WebhookSink(
+            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+            error_status=args.error_status, slow_drip_rate=args.slow_drip_rate,
+            slow_drip_seconds=args.slow_drip_seconds, seed=args.seed + sink_index,
+        ).start()
+        for sink_index in range(args.hosts)
+    ]
+
+    try:
+        with app.app_context():
+            from app import models  # noqa: F401 (registers every model before create_all)
+            db.create_all()
+            database_dialect = db.engine.dialect.name
+
+            from app.models.user import User
+            if db.session.query(User.user_id).first() is not None:
+                raise SystemExit("The benchmark database must be empty, point --database-url at a scratch database.")
+
+            seed_started = time.perf_counter()
+            users_count, reminders_count, shares_count = seed_bench_data(
+                db, [sink.url for sink in sinks], args.users, args.reminders, args.webhook_rate,
+                args.digest_rate, args.share_rate, rng, today,
+            )
+            seed_seconds = time.perf_counter() - seed_started
+
+            webhooks.webhook_delivery_engine = SampledDeliveryEngine()
+            try:
+                with QueryCounter(db.engine) as query_counter:
+                    sweep_started = time.perf_counter()
+                    summary = run_alert_sweep(today=today, full_scan=True)
+                    sweep_seconds = time.perf_counter() - sweep_started
+            finally:
+                webhooks.webhook_delivery_engine.close()
+    finally:
+        for sink in sinks:
+            sink.stop()
+
+    latencies_ms.sort()
+    sink_stats = [sink.get_stats() for sink in sinks]
+
+    return {
+        "database": database_dialect,
+        "users": users_count,
+        "reminders": reminders_count,
+        "shares": shares_count,
+        "seed_seconds": round(seed_seconds, 3),
+        "sweep_seconds": round(sweep_seconds, 3),
+        "alerts_due": summary.get("alerts_due", 0),
+        "alerts_enqueued": summary.get("alerts_enqueued", 0),
+        "alerts_sent": summary.get("alerts_sent", 0),
+        "alerts_failed": summary.get("alerts_failed", 0),
+        "deliveries": summary.get("deliveries", 0),
+        "deliveries_failed": summary.get("deliveries_failed", 0),
+        "deliveries_skipped": summary.get("deliveries_skipped", 0),
+        "deliveries_per_second": round(summary.get("deliveries", 0) / sweep_seconds, 1) if sweep_seconds else None,
+        "alerts_per_second": round(summary.get("alerts_enqueued", 0) / sweep_seconds, 1) if sweep_seconds else None,
+        "latency_ms": {
+            "p50": round(get_percentile(latencies_ms, 50), 1) if latencies_ms else None,
+            "p90": round(get_percentile(latencies_ms, 90), 1) if latencies_ms else None,
+            "p99": round(get_percentile(latencies_ms, 99), 1) if latencies_ms else None,
+            "max": round(latencies_ms[-1], 1) if latencies_ms else None,
+        },
+        "db_queries": query_counter.queries,
+        "db_queries_by_verb": query_counter.queries_by_verb,
+        "db_ms": round(query_counter.db_ms, 1),
+        "sink_requests": sum(stats["requests"] for stats in sink_stats),
+        "sink_errors": sum(stats["error"] for stats in sink_stats),
+        "sink_slow_drips": sum(stats["slow_drip"] for stats in sink_stats),
+    }
+
+
+def print_report(result):
+    latency_ms = result["latency_ms"]
+    print(f"Database:        {result['database']}")
+    print(f"Seeded:          {result['users']} users, {result['reminders']} reminders, {result['shares']} shares "
+          f"in {result['seed_seconds']}s")
+    print(f"Sweep:           {result['sweep_seconds']}s")
+    print(f"Alerts:          {result['alerts_due']} due, {result['alerts_enqueued']} queued, "
+          f"{result['alerts_sent']} sent, {result['alerts_failed']} failed")
+    print(f"Deliveries:      {result['deliveries']} ({result['deliveries_failed']} failed, "
+          f"{result['deliveries_skipped']} skipped by open circuits)")
+    print(f"Throughput:      {result['deliveries_per_second']} deliveries/s, {result['alerts_per_second']} alerts/s")
+    print(f"Latency (ms):    p50 {latency_ms['p50']} | p90 {latency_ms['p90']} | p99 {latency_ms['p99']} "
+          f"| max {latency_ms['max']}")
+    verbs = ", ".join(f"{verb} {count}" for verb, count in sorted(result["db_queries_by_verb"].items()))
+    print(f"DB queries:      {result['db_queries']} ({verbs}) in {result['db_ms']} ms")
+    print(f"Sink:            {result['sink_requests']} requests, {result['sink_errors']} errors, "
+          f"{result['sink_slow_drips']} slow drips")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline alert dispatch throughput benchmark.")
+    parser.add_argument("--users", type=int, default=200, help="Users to seed (default: 200)")
+    parser.add_argument("--reminders", type=int, default=20, help="Reminders per user (default: 20)")
+    parser.add_argument("--webhook-rate", type=float, default=0.8, help="Share of users with a webhook (default: 0.8)")
+    parser.add_argument("--digest-rate", type=float, default=0.0, help="Share of users with digests on (default: 0)")
+    parser.add_argument("--share-rate", type=float, default=0.2,
+                        help="Share of reminders shared with another user (default: 0.2)")
+    parser.add_argument("--hosts", type=int, default=4, help="Number of sinks, each a separate webhook host (default: 4)")
+    parser.add_argument("--database-url", default="sqlite://",
+                        help="SQLAlchemy URL of an empty scratch database (default: in-memory SQLite)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for data and sink outcomes (default: 1)")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON, e.g. to diff two runs")
+    add_sink_arguments(parser)
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
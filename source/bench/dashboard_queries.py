@@ -0,0 +1,151 @@
+# source/bench/dashboard_queries.py
+"""
+Statement count check of the dashboard, fully offline.
+
+Seeds users, reminders and shares into a scratch database, builds every dashboard panel
+(get_dashboard_panel, view cache off) for a sample of users and counts the statements each one runs
+with the same cursor events as bench/alert_throughput.py. A panel that runs more SELECTs than its budget,
+e.g. a query per reminder creeping back in, fails the check with exit status 1.
+
+Run from the source directory:
+    python -m bench.dashboard_queries --users 200 --reminders 50
+    python -m bench.dashboard_queries --stale-rate 0.3   # some stored next occurrences out of date
+
+Stale stored next occurrences are written back for the reminders a panel shows, those UPDATEs are reported
+but not budgeted (at most one per reminder shown).
+"""
+import argparse
+from datetime import date, timedelta
+import json
+import os
+import random
+import sys
+from bench.alert_throughput import QueryCounter, seed_bench_data
+
+
+# SELECTs per panel however many reminders a user has: two COUNTs, one streamed query per reminder panel
+DASHBOARD_SELECT_BUDGET = {
+    "counts": 2,
+    "upcoming_mine": 1,
+    "upcoming_shared": 1,
+    "overdue_mine": 1,
+    "overdue_shared": 1,
+}
+
+
+def make_next_occurrences_stale(db, stale_rate, rng, today):
+    """
+    Moves the stored next occurrence of a share of recurring reminders into the past, as if the daily
+    roll forward had not run. Returns how many were changed.
+    """
+    from app.models.reminder import Reminder
+
+    recurring_reminders = Reminder.query.filter(Reminder.reminder_recurrence_type != "NONE").all()
+    stale_reminders = [reminder for reminder in recurring_reminders if rng.random() < stale_rate]
+    for reminder in stale_reminders:
+        reminder.reminder_next_occurrence = today - timedelta(days=rng.randint(2, 60))
+    db.session.commit()
+    return len(stale_reminders)
+
+
+def run_check(args):
+    # Configure before the app is imported, module level loggers and settings are read at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["VIEW_CACHE_BACKEND"] = "none"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from app import init_app, db
+    from app.helpers.stats import DASHBOARD_PANELS, get_dashboard_panel
+
+    missing_budgets = set(DASHBOARD_PANELS) - set(DASHBOARD_SELECT_BUDGET)
+    if missing_budgets:
+        raise SystemExit(f"No statement budget for dashboard panels: {', '.join(sorted(missing_budgets))}")
+
+    app = init_app()
+    rng = random.Random(args.seed)
+    today = date.today()
+
+    with app.app_context():
+        from app import models  # noqa: F401 (registers every model before create_all)
+        db.create_all()
+
+        from app.models.user import User
+        if db.session.query(User.user_id).first() is not None:
+            raise SystemExit("The check database must be empty, point --database-url at a scratch database.")
+
+        users_count, reminders_count, shares_count = seed_bench_data(
+            db, ["http://127.0.0.1:9"], args.users, args.reminders, 0.0, 0.0, args.share_rate, rng, today,
+        )
+        stale_count = make_next_occurrences_stale(db, args.stale_rate, rng, today) if args.stale_rate else 0
+
+        user_uuids = [row[0] for row in db.session.query(User.user_uuid).order_by(User.user_id).all()]
+        sample_user_uuids = rng.sample(user_uuids, min(args.sample_users, len(user_uuids)))
+
+        panels = {
+            panel_name: {"max_selects": 0, "max_updates": 0, "max_statements": 0, "budget": DASHBOARD_SELECT_BUDGET[panel_name]}
+            for panel_name in DASHBOARD_PANELS
+        }
+        max_dashboard_statements = 0
+        for user_uuid in sample_user_uuids:
+            dashboard_statements = 0
+            for panel_name, panel in panels.items():
+                db.session.remove()
+                with QueryCounter(db.engine) as query_counter:
+                    get_dashboard_panel(user_uuid, panel_name)
+                panel["max_selects"] = max(panel["max_selects"], query_counter.queries_by_verb.get("SELECT", 0))
+                panel["max_updates"] = max(panel["max_updates"], query_counter.queries_by_verb.get("UPDATE", 0))
+                panel["max_statements"] = max(panel["max_statements"], query_counter.queries)
+                dashboard_statements += query_counter.queries
+            max_dashboard_statements = max(max_dashboard_statements, dashboard_statements)
+
+    over_budget = [panel_name for panel_name, panel in panels.items() if panel["max_selects"] > panel["budget"]]
+
+    return {
+        "database": args.database_url.split(":", 1)[0],
+        "users": users_count,
+        "reminders": reminders_count,
+        "shares": shares_count,
+        "stale_next_occurrences": stale_count,
+        "users_checked": len(sample_user_uuids),
+        "panels": panels,
+        "max_dashboard_statements": max_dashboard_statements,
+        "over_budget": over_budget,
+    }
+
+
+def print_report(result):
+    print(f"Seeded:          {result['users']} users, {result['reminders']} reminders, {result['shares']} shares, "
+          f"{result['stale_next_occurrences']} stale next occurrences")
+    print(f"Checked:         {result['users_checked']} users, worst case per panel")
+    for panel_name, panel in result["panels"].items():
+        status = "OVER BUDGET" if panel_name in result["over_budget"] else "ok"
+        print(f"  {panel_name:<17} {panel['max_selects']} SELECT (budget {panel['budget']}), "
+              f"{panel['max_updates']} UPDATE, {panel['max_statements']} statements  {status}")
+    print(f"Whole dashboard: at most {result['max_dashboard_statements']} statements")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the statements each dashboard panel runs.")
+    parser.add_argument("--users", type=int, default=200, help="Users to seed (default: 200)")
+    parser.add_argument("--reminders", type=int, default=50, help="Reminders per user (default: 50)")
+    parser.add_argument("--share-rate", type=float, default=0.3,
+                        help="Share of reminders shared with another user (default: 0.3)")
+    parser.add_argument("--stale-rate", type=float, default=0.0,
+                        help="Share of recurring reminders whose stored next occurrence is out of date (default: 0)")
+    parser.add_argument("--sample-users", type=int, default=20, help="Users whose dashboard is checked (default: 20)")
+    parser.add_argument("--database-url", default="sqlite://",
+                        help="SQLAlchemy URL of an empty scratch database (default: in-memory SQLite)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    result = run_check(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+    sys.exit(1 if result["over_budget"] else 0)
+
+
+if __name__ == "__main__":
+    main()
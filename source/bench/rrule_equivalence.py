@@ -0,0 +1,133 @@
+# source/bench/rrule_equivalence.py
+"""
+Randomized equivalence check of the closed-form RRULE fast path against dateutil.
+
+Generates rules in every shape build_rrule_string() produces (DAILY/WEEKLY/MONTHLY/YEARLY with random
+DTSTART, UNTIL, INTERVAL, BYDAY and BYMONTHDAY) and, for random points in time, checks that
+get_fast_path_occurrences_after() returns exactly what rrulestr().xafter() does, that
+get_occurrence_dates_from() matches xafter(inc=True) from the start of the day (the bound of the stored next occurrence),
+and that get_occurrence_dates_between() matches rule.between(). Exits with status 1 on the first mismatches.
+
+Run from the source directory:
+    python -m bench.rrule_equivalence --rules 2000 --seed 1
+    python -m bench.rrule_equivalence --today 2024-02-28   # points around another day than the server date
+"""
+import argparse
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+import random
+import sys
+from dateutil.rrule import rrulestr
+from app.helpers.rrule import (
+    WEEKDAY_MAP, build_rrule_string, get_fast_path_occurrences_after, get_occurrence_dates_between,
+    get_occurrence_dates_from, is_fast_path_rrule,
+)
+
+
+RECURRENCE_TYPES = ["DAILY", "WEEKLY", "MONTHLY", "YEARLY"]
+
+
+def get_random_date(rng, first_date, last_date):
+    return first_date + timedelta(days=rng.randint(0, (last_date - first_date).days))
+
+
+def get_random_rule_inputs(rng, today):
+    """
+    Random build_rrule_string() arguments, biased towards the edges the arithmetic has to get right:
+    month ends (29-31), leap days, large intervals, UNTIL before or on DTSTART, no UNTIL at all.
+    """
+    recurrence_type = rng.choice(RECURRENCE_TYPES)
+    if rng.random() < 0.1:
+        start_date = date(rng.choice([2000, 2004, 2020, 2024]), 2, 29)
+    else:
+        start_date = get_random_date(rng, today - timedelta(days=3000), today + timedelta(days=400))
+
+    end_date = None
+    if rng.random() < 0.8:
+        end_date = start_date + timedelta(days=rng.randint(-5, 4000))
+
+    interval = rng.choice([1, 1, 1, 2, 3, 5, 7, 12, 13, 100])
+    byweekday = None
+    bymonthday = None
+    if recurrence_type == "WEEKLY" and rng.random() < 0.7:
+        byweekday = rng.sample(list(WEEKDAY_MAP), rng.randint(1, 7))
+    if recurrence_type == "MONTHLY" and rng.random() < 0.7:
+        bymonthday = rng.choice([1, 15, 28, 29, 30, 31, rng.randint(1, 31)])
+
+    return recurrence_type, start_date, end_date, interval, byweekday, bymonthday
+
+
+def get_random_after(rng, rule, today):
+    # Before, on and after DTSTART, at midnight or during the day
+    after_date = get_random_date(rng, rule._dtstart.date() - timedelta(days=40), today + timedelta(days=3000))
+    if rng.random() < 0.5:
+        return datetime.combine(after_date, time.min)
+    return datetime.combine(after_date, time(rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59)))
+
+
+def check_rule(rng, rrule_string, today, count, samples):
+    """
+    Returns a list of mismatch descriptions for one rule, empty when the fast path agrees with dateutil.
+    """
+    rule = rrulestr(rrule_string)
+    if not is_fast_path_rrule(rule):
+        return [f"not on the fast path: {rrule_string!r}"]
+
+    mismatches = []
+    for _ in range(samples):
+        after = get_random_after(rng, rule, today)
+        expected = list(islice(rule.xafter(after, count=count), count))
+        actual = get_fast_path_occurrences_after(rule, after, count)
+        if actual != expected:
+            mismatches.append(f"xafter({after}, count={count}) of {rrule_string!r}: {actual} != {expected}")
+
+        # From the start of the day, whatever the time of day, as compute_next_occurrences() does for any `today`
+        date_from = after.date()
+        expected_from = [dt.date() for dt in islice(
+            rule.xafter(datetime.combine(date_from, time.min), count=count, inc=True), count
+        )]
+        actual_from = get_occurrence_dates_from(rrule_string, date_from, count)
+        if actual_from != expected_from:
+            mismatches.append(f"from({date_from}, count={count}) of {rrule_string!r}: {actual_from} != {expected_from}")
+
+        date_to = date_from + timedelta(days=rng.randint(0, 800))
+        expected_dates = [dt.date() for dt in rule.between(
+            datetime.combine(date_from, time.min), datetime.combine(date_to, time.max), inc=True
+        )]
+        actual_dates = get_occurrence_dates_between(rrule_string, date_from, date_to)
+        if actual_dates != expected_dates:
+            mismatches.append(f"between({date_from}, {date_to}) of {rrule_string!r}: {actual_dates} != {expected_dates}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the RRULE fast path against dateutil on random rules.")
+    parser.add_argument("--rules", type=int, default=2000, help="Random rules to check (default: 2000)")
+    parser.add_argument("--samples", type=int, default=5, help="Random points in time per rule (default: 5)")
+    parser.add_argument("--count", type=int, default=5, help="Occurrences compared per point (default: 5)")
+    parser.add_argument("--today", type=date.fromisoformat, default=date.today(),
+                        help="Day the random rules and points are spread around, YYYY-MM-DD (default: the server date)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--max-mismatches", type=int, default=10, help="Mismatches printed before stopping (default: 10)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    today = args.today
+    mismatches = []
+    checked = 0
+
+    for _ in range(args.rules):
+        rrule_string = build_rrule_string(*get_random_rule_inputs(rng, today))
+        mismatches.extend(check_rule(rng, rrule_string, today, args.count, args.samples))
+        checked += 1
+        if len(mismatches) >= args.max_mismatches:
+            break
+
+    for mismatch in mismatches[:args.max_mismatches]:
+        print(mismatch)
+    print(f"Checked {checked} rules x {args.samples} points: {len(mismatches)} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
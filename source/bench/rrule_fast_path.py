@@ -0,0 +1,96 @@
+# source/bench/rrule_fast_path.py
+"""
+Next-occurrence benchmark: closed-form RRULE fast path against dateutil's xafter().
+
+For each recurrence type, times get_fast_path_occurrences_after() and list(rule.xafter()) on the same
+compiled rules (DTSTART --years-back years ago, so dateutil has that many years of occurrences to walk)
+and reports the mean time per call and the speedup.
+
+Run from the source directory:
+    python -m bench.rrule_fast_path --years-back 10 --rounds 200
+    python -m bench.rrule_fast_path --json > before.json
+"""
+import argparse
+from datetime import date, datetime
+from itertools import islice
+import json
+import time
+from dateutil.rrule import rrulestr
+from app.helpers.rrule import build_rrule_string, get_fast_path_occurrences_after, is_fast_path_rrule
+
+
+# (recurrence type, build_rrule_string() keyword arguments) of the benchmarked rules
+BENCH_RULES = [
+    ("DAILY", {}),
+    ("DAILY", {"interval": 3}),
+    ("WEEKLY", {"byweekday": ["MO", "WE", "FR"]}),
+    ("WEEKLY", {"interval": 2, "byweekday": ["TU"]}),
+    ("MONTHLY", {"bymonthday": 31}),
+    ("MONTHLY", {"interval": 3, "bymonthday": 15}),
+    ("YEARLY", {}),
+]
+
+
+def time_calls(function, rounds):
+    """
+    Mean microseconds per call of function() over rounds calls.
+    """
+    started = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - started) / rounds * 1_000_000
+
+
+def run_benchmark(args):
+    today = date.today()
+    start_date = today.replace(year=today.year - args.years_back, day=min(today.day, 28))
+    after = datetime.now()
+
+    results = []
+    for recurrence_type, rule_kwargs in BENCH_RULES:
+        rrule_string = build_rrule_string(recurrence_type, start_date, **rule_kwargs)
+        rule = rrulestr(rrule_string)
+        if not is_fast_path_rrule(rule):
+            raise SystemExit(f"Not on the fast path: {rrule_string!r}")
+
+        expected = list(islice(rule.xafter(after, count=args.count), args.count))
+        if get_fast_path_occurrences_after(rule, after, args.count) != expected:
+            raise SystemExit(f"Fast path disagrees with dateutil on {rrule_string!r}, run bench.rrule_equivalence")
+
+        fast_path_us = time_calls(lambda: get_fast_path_occurrences_after(rule, after, args.count), args.rounds)
+        dateutil_us = time_calls(lambda: list(islice(rule.xafter(after, count=args.count), args.count)), args.rounds)
+        results.append({
+            "rule": rrule_string.split("RRULE:", 1)[-1],
+            "fast_path_us": round(fast_path_us, 1),
+            "dateutil_us": round(dateutil_us, 1),
+            "speedup": round(dateutil_us / fast_path_us, 1) if fast_path_us else None,
+        })
+
+    return {"dtstart": start_date.isoformat(), "count": args.count, "rounds": args.rounds, "rules": results}
+
+
+def print_report(result):
+    print(f"DTSTART {result['dtstart']}, next {result['count']} occurrences, {result['rounds']} rounds per rule")
+    print(f"{'Rule':<50} {'Fast path us':>13} {'dateutil us':>13} {'Speedup':>9}")
+    for rule_result in result["rules"]:
+        print(f"{rule_result['rule']:<50} {rule_result['fast_path_us']:>13} {rule_result['dateutil_us']:>13} "
+              f"{rule_result['speedup']:>8}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RRULE fast path against dateutil.")
+    parser.add_argument("--years-back", type=int, default=10, help="Age of the rules' DTSTART in years (default: 10)")
+    parser.add_argument("--count", type=int, default=1, help="Next occurrences per call (default: 1)")
+    parser.add_argument("--rounds", type=int, default=200, help="Timed calls per rule and path (default: 200)")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON, e.g. to diff two runs")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
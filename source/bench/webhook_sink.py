@@ -0,0 +1,186 @@
+# source/bench/webhook_sink.py
+"""
+Local stand-in for Slack incoming webhooks, for benchmarking alert delivery offline.
+
+Every POST is answered after a configurable latency (plus random jitter). A configurable share of
+requests fail with an error status, and another share is answered "slow drip": the response body is
+trickled one byte at a time, so the connection stays busy for a while but each socket read still
+returns before the client's read timeout.
+
+Run standalone from the source directory:
+    python -m bench.webhook_sink --port 8099 --latency-ms 50 --error-rate 0.01
+and point user webhook URLs at http://127.0.0.1:8099/<anything>.
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import random
+import threading
+import time
+
+
+SLOW_DRIP_BYTE_INTERVAL_SECONDS = 0.5
+
+
+class WebhookSinkHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so client connection pooling behaves as it does against Slack
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, without this Nagle + delayed ACK add ~40 ms per response
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        sink = self.server.sink
+        request_body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        outcome = sink.choose_outcome()
+        sink.record(outcome, len(request_body))
+        time.sleep(sink.get_latency_seconds())
+
+        try:
+            if outcome == "error":
+                self._respond(sink.error_status, b"service_unavailable")
+            elif outcome == "slow_drip":
+                self._respond_slow_drip(sink.slow_drip_seconds)
+            else:
+                self._respond(200, b"ok")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (read timeout), nothing left to do
+            self.close_connection = True
+
+    def _respond(self, status_code, body):
+        self.send_response(status_code)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _respond_slow_drip(self, seconds):
+        body = b"o" * max(1, int(seconds / SLOW_DRIP_BYTE_INTERVAL_SECONDS)) + b"k"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.flush()
+        for byte_index in range(len(body)):
+            self.wfile.write(body[byte_index:byte_index + 1])
+            self.wfile.flush()
+            if byte_index < len(body) - 1:
+                time.sleep(SLOW_DRIP_BYTE_INTERVAL_SECONDS)
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate the benchmark output
+        pass
+
+
+class WebhookSink:
+    """
+    A webhook sink HTTP server running on a background thread.
+    Outcome shares are drawn per request: error_rate for error_status responses, slow_drip_rate
+    for slow drip responses, everything else is a plain 200 "ok".
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 error_status=503, slow_drip_rate=0.0, slow_drip_seconds=5.0, seed=None):
+        if error_rate + slow_drip_rate > 1:
+            raise ValueError("error_rate + slow_drip_rate can't be more than 1")
+
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.slow_drip_rate = slow_drip_rate
+        self.slow_drip_seconds = slow_drip_seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "ok": 0, "error": 0, "slow_drip": 0, "bytes_received": 0}
+
+        self._server = ThreadingHTTPServer((host, port), WebhookSinkHandler)
+        self._server.daemon_threads = True
+        self._server.sink = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def choose_outcome(self):
+        with self._lock:
+            draw = self._random.random()
+        if draw < self.error_rate:
+            return "error"
+        if draw < self.error_rate + self.slow_drip_rate:
+            return "slow_drip"
+        return "ok"
+
+    def get_latency_seconds(self):
+        with self._lock:
+            jitter_ms = self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return (self.latency_ms + jitter_ms) / 1000
+
+    def record(self, outcome, bytes_received):
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats[outcome] += 1
+            self._stats["bytes_received"] += bytes_received
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="webhook-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+def add_sink_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Base response latency (default: 50)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random latency, uniform 0..N (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503, help="Status code of error responses (default: 503)")
+    parser.add_argument("--slow-drip-rate", type=float, default=0.0, help="Share of requests answered as a slow drip")
+    parser.add_argument("--slow-drip-seconds", type=float, default=5.0,
+                        help="How long a slow drip response takes to finish (default: 5)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local webhook sink for alert delivery benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible outcomes")
+    add_sink_arguments(parser)
+    args = parser.parse_args()
+
+    sink = WebhookSink(
+        host=args.host, port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, error_status=args.error_status, slow_drip_rate=args.slow_drip_rate,
+        slow_drip_seconds=args.slow_drip_seconds, seed=args.seed,
+    )
+    print(f"Webhook sink listening on {sink.url}, Ctrl-C to stop")
+    sink.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.stop()
+        print(f"Webhook sink stats: {sink.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()